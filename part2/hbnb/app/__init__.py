@@ -1,18 +1,26 @@
+from importlib import import_module
+
 from flask import Flask
 from flask_restx import Api
-from app.api.v1.users import api as users_ns
-from app.api.v1.places import api as places_ns
-from app.api.v1.amenities import api as amenities_ns
-from app.api.v1.reviews import api as reviews_ns
 
 
-def create_app():
+NAMESPACES = (
+    ('app.api.v1.users', '/api/v1/users'),
+    ('app.api.v1.amenities', '/api/v1/amenities'),
+    ('app.api.v1.places', '/api/v1/places'),
+    ('app.api.v1.reviews', '/api/v1/reviews'),
+)
+
+
+def create_app(config_class="config.DevelopmentConfig"):
     app = Flask(__name__)
+    app.config.from_object(config_class)
     api = Api(app, version='1.0', title='HBnB API', description='HBnB Application API')
 
-    api.add_namespace(users_ns, path='/api/v1/users')
-    api.add_namespace(amenities_ns, path='/api/v1/amenities')
-    api.add_namespace(places_ns, path='/api/v1/places')
-    api.add_namespace(reviews_ns, path='/api/v1/reviews')
-    
-    return app
\ No newline at end of file
+    for module_name, path in NAMESPACES:
+        api.add_namespace(import_module(module_name).api, path=path)
+
+    from app.services import init_facade
+    init_facade(app)
+
+    return app
@@ -1,5 +1,5 @@
 from flask_restx import Namespace, Resource, fields
-from app.services.facade import HBnBFacade
+from app.services import facade
 
 
 api = Namespace('amenities', description='Amenity operations')
@@ -10,9 +10,6 @@ amenity_model = api.model('Amenity', {
 })
 
 
-facade = HBnBFacade()
-
-
 @api.route('/')
 class AmenityList(Resource):
     """
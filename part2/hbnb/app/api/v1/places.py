@@ -1,5 +1,6 @@
+from flask import request
 from flask_restx import Namespace, Resource, fields
-from app.services.facade import HBnBFacade
+from app.services import facade
 
 
 api = Namespace('places', description='Place operations')
@@ -38,9 +39,6 @@ place_model = api.model('Place', {
 })
 
 
-facade = HBnBFacade()
-
-
 @api.route('/')
 class PlaceList(Resource):
     """
@@ -68,7 +66,10 @@ class PlaceList(Resource):
         if not place_data:
             return {'message': 'Invalid input data'}, 400
         
-        new_place = facade.create_place(place_data)
+        try:
+            new_place = facade.create_place(place_data)
+        except ValueError as error:
+            return {'error': str(error)}, 400
         
         return {
             "id": new_place.id,
@@ -81,21 +82,78 @@ class PlaceList(Resource):
         }, 201
         
 
+    @api.doc(params={
+        'min_price': 'Minimum price per night',
+        'max_price': 'Maximum price per night',
+        'bbox': 'Bounding box as south,west,north,east (degrees)',
+        'lat': 'Latitude of the centre of a radius search',
+        'lon': 'Longitude of the centre of a radius search',
+        'radius': 'Radius of the search around lat/lon, in km',
+        'amenities': 'Comma-separated amenity names or IDs the places must all have',
+        'filter': 'Filter expression, e.g. price<=120 and (rating>=4 or reviews=0)',
+        'sort': 'Comma-separated fields to sort on, - for descending, e.g. -rating,price'
+    })
     @api.response(200, 'List of places retrieved successfully')
+    @api.response(400, 'Invalid filter')
     def get(self):
         """
-        Retrieve a list of all places.
+        Retrieve a list of all places, optionally filtered.
         
         This method handles the GET request to retrieve all available places.
         It returns a list of dictionaries with basic place details (ID, title, 
-        latitude, longitude).
+        latitude, longitude). The price, bounding box and radius query
+        parameters narrow the list down; they are evaluated together in one
+        vectorized pass over the place columns. The amenities parameter keeps
+        the places having all the listed amenities, by intersecting the
+        amenity bitmaps.
+        
+        The filter parameter takes comparisons on title, owner_id, price,
+        latitude, longitude, rating and reviews (=, !=, <, <=, >, >=),
+        combined with and, or, not and parentheses; the sort parameter
+        orders the result. Comparisons on price and coordinates run on the
+        place columns, the others on the places they select.
         
         Returns:
             list: A list of place dictionaries with details such as ID, title, 
                   latitude, and longitude.
+            tuple: Error message and status code 400 if a filter is invalid.
         """
         
-        places = facade.get_all_places()
+        args = request.args
+        filters = {
+            'min_price': args.get('min_price', type=float),
+            'max_price': args.get('max_price', type=float),
+            'radius_km': args.get('radius', type=float),
+        }
+        
+        if 'bbox' in args:
+            try:
+                filters['bbox'] = [float(edge) for edge in args['bbox'].split(',')]
+            except ValueError:
+                filters['bbox'] = None
+            if not filters['bbox'] or len(filters['bbox']) != 4:
+                return {'error': 'bbox must be south,west,north,east'}, 400
+        
+        if 'lat' in args or 'lon' in args or 'radius' in args:
+            center = (args.get('lat', type=float), args.get('lon', type=float))
+            if None in center or filters['radius_km'] is None:
+                return {'error': 'lat, lon and radius must be numbers and given together'}, 400
+            filters['center'] = center
+        
+        if 'amenities' in args:
+            filters['amenities'] = [name.strip() for name in args['amenities'].split(',') if name.strip()]
+        
+        places = None
+        if any(value is not None for value in filters.values()):
+            places = facade.search_places(**filters)
+        
+        if args.get('filter') or args.get('sort'):
+            try:
+                places = facade.query_places(args.get('filter'), args.get('sort'), places)
+            except ValueError as error:
+                return {'error': str(error)}, 400
+        elif places is None:
+            places = facade.get_all_places()
         
         return [
             {
@@ -107,6 +165,166 @@ class PlaceList(Resource):
         ]
 
 
+@api.route('/nearest')
+class NearestPlaceList(Resource):
+    """
+    Resource for the places closest to a point.
+    """
+
+    @api.doc(params={
+        'lat': 'Latitude of the point',
+        'lng': 'Longitude of the point',
+        'k': 'Number of places to return (default 10, at most 100)'
+    })
+    @api.response(200, 'Nearest places retrieved successfully')
+    @api.response(400, 'Invalid coordinates')
+    def get(self):
+        """
+        Retrieve the k places nearest to a point, nearest first.
+        
+        Served by a KD-tree over the place coordinates, and ordered by
+        great-circle (haversine) distance.
+        
+        Returns:
+            list: A list of place dictionaries with their distance in km.
+            tuple: Error message and status code 400 if the coordinates are invalid.
+        """
+        
+        latitude = request.args.get('lat', type=float)
+        longitude = request.args.get('lng', type=float)
+        k = min(max(request.args.get('k', 10, type=int), 0), 100)
+        
+        if latitude is None or longitude is None or not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+            return {'error': 'lat and lng must be valid coordinates'}, 400
+        
+        return [
+            {
+                "id": place.id,
+                "title": place.title,
+                "latitude": place.latitude,
+                "longitude": place.longitude,
+                "distance_km": round(distance, 3),
+            } for place, distance in facade.get_nearest_places(latitude, longitude, k)
+        ]
+
+
+@api.route('/clusters')
+class PlaceClusterList(Resource):
+    """
+    Resource for the place markers of a map view.
+    """
+
+    @api.doc(params={
+        'bbox': 'Map view as south,west,north,east (degrees)',
+        'zoom': 'Map zoom level (0-22)'
+    })
+    @api.response(200, 'Clusters retrieved successfully')
+    @api.response(400, 'Invalid bbox or zoom')
+    def get(self):
+        """
+        Retrieve the places of a map view, grouped per grid cell.
+        
+        Each cluster gives the number of places of a cell, their centroid
+        and their minimum price; cells are a quarter of a map tile wide at
+        the requested zoom. They are read from grid aggregates maintained as
+        places change. At street-level zooms, beyond the finest precomputed
+        grid, the places of the view are grouped on the fly.
+        
+        Returns:
+            list: A list of cluster dictionaries.
+            tuple: Error message and status code 400 if bbox or zoom is invalid.
+        """
+        
+        zoom = request.args.get('zoom', type=int)
+        
+        try:
+            bbox = [float(edge) for edge in request.args.get('bbox', '').split(',')]
+        except ValueError:
+            bbox = None
+        
+        if not bbox or len(bbox) != 4 or bbox[0] > bbox[2]:
+            return {'error': 'bbox must be south,west,north,east'}, 400
+        
+        if zoom is None or not 0 <= zoom <= 22:
+            return {'error': 'zoom must be an integer between 0 and 22'}, 400
+        
+        return facade.get_place_clusters(bbox, zoom)
+
+
+@api.route('/top')
+class TopPlaceList(Resource):
+    """
+    Resource for the leaderboard of the best rated places.
+    """
+
+    @api.doc(params={
+        'limit': 'Maximum number of places to return (default 10)',
+        'min_reviews': 'Only rank places with at least this many reviews (default 0)'
+    })
+    @api.response(200, 'Top places retrieved successfully')
+    def get(self):
+        """
+        Retrieve the best rated places, best first.
+        
+        Places are ranked by the Bayesian average of their ratings, which
+        pulls places with few reviews towards a prior rating. The ranking is
+        maintained as reviews are created, updated and deleted, so this
+        request does not read any review.
+        
+        Returns:
+            list: A list of place dictionaries with their score, number of
+                  reviews and average rating.
+        """
+        
+        limit = min(max(request.args.get('limit', 10, type=int), 0), 100)
+        min_reviews = max(request.args.get('min_reviews', 0, type=int), 0)
+        
+        return [
+            {
+                "id": place.id,
+                "title": place.title,
+                "latitude": place.latitude,
+                "longitude": place.longitude,
+                "score": round(score, 4),
+                "review_count": review_count,
+                "average_rating": round(average, 4),
+            } for place, score, review_count, average in facade.get_top_places(limit, min_reviews)
+        ]
+
+
+@api.route('/trending')
+class TrendingPlaceList(Resource):
+    """
+    Resource for the places with the most recent activity.
+    """
+
+    @api.doc(params={'limit': 'Maximum number of places to return (default 10)'})
+    @api.response(200, 'Trending places retrieved successfully')
+    def get(self):
+        """
+        Retrieve the trending places, most active first.
+        
+        Every new review and every view of a place adds to its activity
+        score, and scores decay exponentially with time, so recent activity
+        weighs the most.
+        
+        Returns:
+            list: A list of place dictionaries with their current score.
+        """
+        
+        limit = min(max(request.args.get('limit', 10, type=int), 0), 100)
+        
+        return [
+            {
+                "id": place.id,
+                "title": place.title,
+                "latitude": place.latitude,
+                "longitude": place.longitude,
+                "score": round(score, 4),
+            } for place, score in facade.get_trending_places(limit)
+        ]
+
+
 @api.route('/<place_id>')
 class PlaceResource(Resource):
     """
@@ -131,7 +349,7 @@ class PlaceResource(Resource):
             tuple: Error message and status code 404 if the place is not found.
         """
         
-        places_data = facade.get_place(place_id)
+        places_data = facade.view_place(place_id)
         
         if not places_data:
             return {'message': 'Place not found'}, 404
@@ -200,7 +418,10 @@ class PlaceResource(Resource):
         if not place_data:
             return {'message': 'Invalid input data'}, 400
     
-        updated_place = facade.update_place(place_id, place_data)
+        try:
+            updated_place = facade.update_place(place_id, place_data)
+        except ValueError as error:
+            return {'error': str(error)}, 400
         
         if not updated_place:
             return {'message': 'Place not found'}, 404
@@ -212,4 +433,46 @@ class PlaceResource(Resource):
             "latitude": updated_place.latitude,
             "longitude": updated_place.longitude,
             "owner_id": updated_place.owner_id
-        }, 200
\ No newline at end of file
+        }, 200
+
+@api.route('/<place_id>/similar')
+class SimilarPlaceList(Resource):
+    """
+    Resource for the places most similar to a place.
+    """
+
+    @api.doc(params={'limit': 'Maximum number of places to return (default and maximum 10)'})
+    @api.response(200, 'Similar places retrieved successfully')
+    @api.response(404, 'Place not found')
+    def get(self, place_id):
+        """
+        Retrieve the places most similar to a place, most similar first.
+        
+        Similarity combines shared amenities (Jaccard index), price and
+        distance. Neighbours are precomputed for every place by a batch
+        build in the background, so this is a lookup.
+        
+        Args:
+            place_id (str): The ID of the place.
+        
+        Returns:
+            list: A list of place dictionaries with their similarity score.
+            tuple: Error message and status code 404 if the place is not found.
+        """
+        
+        limit = min(max(request.args.get('limit', 10, type=int), 0), 10)
+        similar = facade.get_similar_places(place_id, limit)
+        
+        if similar is None:
+            return {'message': 'Place not found'}, 404
+        
+        return [
+            {
+                "id": place.id,
+                "title": place.title,
+                "price": place.price,
+                "latitude": place.latitude,
+                "longitude": place.longitude,
+                "score": round(score, 4),
+            } for place, score in similar
+        ]
@@ -1,5 +1,6 @@
+from flask import request
 from flask_restx import Namespace, Resource, fields
-from app.services.facade import HBnBFacade
+from app.services import facade
 
 
 api = Namespace('reviews', description='Review operations')
@@ -13,9 +14,6 @@ review_model = api.model('Review', {
 })
 
 
-facade = HBnBFacade()
-
-
 @api.route('/')
 class ReviewList(Resource):
     """
@@ -185,14 +183,20 @@ class PlaceReviewList(Resource):
     """
 
 
+    @api.doc(params={
+        'offset': 'Number of reviews to skip (default 0)',
+        'limit': 'Maximum number of reviews to return (default all)'
+    })
     @api.response(200, 'List of reviews for the place retrieved successfully')
+    @api.response(400, 'Invalid offset or limit')
     @api.response(404, 'Place not found')
     def get(self, place_id):
         """
-        Get all reviews for a specific place.
+        Get the reviews for a specific place, oldest first.
 
-        This method handles the GET request to fetch all reviews for a given place
-        identified by its ID. If the place exists, a list of reviews is returned.
+        This method handles the GET request to fetch the reviews of a given place
+        identified by its ID. If the place exists, one page of its reviews is
+        returned, as selected by the `offset` and `limit` query parameters.
         Otherwise, a 404 error is returned.
 
         Args:
@@ -200,13 +204,19 @@ class PlaceReviewList(Resource):
 
         Returns:
             list: A list of dictionaries containing review details for the specified place.
-            tuple: Error message and status code 404 if the place is not found.
+            tuple: Error message and status code 400 for a negative limit, 404 if the place is not found.
         """
         
-        place_reviews = facade.get_reviews_by_place(place_id)
-        
-        if not place_reviews:
+        if not facade.get_place(place_id):
             return {'error': 'Place not found'}, 404
+
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        limit = request.args.get('limit', type=int)
+
+        if limit is not None and limit < 0:
+            return {'error': 'limit must be a non-negative integer'}, 400
+
+        place_reviews = facade.get_reviews_by_place(place_id, offset, limit)
         
         return [
             {
@@ -1,5 +1,5 @@
 from flask_restx import Namespace, Resource, fields
-from app.services.facade import HBnBFacade
+from app.services import facade
 
 
 api = Namespace('users', description='User operations')
@@ -12,9 +12,6 @@ user_model = api.model('User', {
 })
 
 
-facade = HBnBFacade()
-
-
 @api.route('/')
 class UserList(Resource):
     """
@@ -171,7 +168,10 @@ class UserResource(Resource):
         
         updated_data = api.payload
         
-        user = facade.update_user(user_id, updated_data)
+        try:
+            user = facade.update_user(user_id, updated_data)
+        except ValueError as error:
+            return {'error': str(error)}, 400
         
         if not user:
             return {"error": "User not found"}, 404
@@ -1,9 +1,7 @@
-import uuid
 from .base_model import BaseModel
-from datetime import datetime
 
 
-class Amenity:
+class Amenity(BaseModel):
     """
     Represents an amenity with a unique identifier, name, and timestamps.
 
@@ -15,6 +13,9 @@ class Amenity:
     """
 
 
+    __slots__ = ('name',)
+
+
     def __init__(self, name):
         """
         Initializes an Amenity instance.
@@ -29,20 +30,8 @@ class Amenity:
         if not name or len(name) > 50:
             raise ValueError("Amenity name is required and must be at most 50 characters long.")
 
+        super().__init__()
         self.name = name
-        self.id = str(uuid.uuid4())
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
-
-
-    def save(self):
-        """
-        Updates the updated_at timestamp to the current time.
-
-        This method should be called whenever the amenity is modified to keep track of the last update time.
-        """
-        
-        self.updated_at = datetime.now()
 
 
     def dict(self):
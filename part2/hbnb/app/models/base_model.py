@@ -1,5 +1,6 @@
 import uuid
 from datetime import datetime
+from functools import lru_cache
 
 
 class BaseModel:
@@ -10,19 +11,26 @@ class BaseModel:
         id (str): A unique identifier for the object.
         created_at (datetime): Timestamp when the object was created.
         updated_at (datetime): Timestamp when the object was last updated.
+
+    Models declare `__slots__` instead of carrying a per-instance `__dict__`,
+    which keeps each entity small when millions are held in memory.
     """
 
 
+    __slots__ = ('id', 'created_at', 'updated_at', '_observers')
+
+
     def __init__(self):
         """
         Initializes a BaseModel instance with a unique ID and timestamps.
 
-        The ID is generated using UUID4, and the timestamps are set to the current datetime.
+        The ID is generated using UUID4, and both timestamps are set to the
+        same current datetime object.
         """
         
         self.id = str(uuid.uuid4())
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
+        self.created_at = self.updated_at = datetime.now()
+        self._observers = ()
 
 
     def save(self):
@@ -34,6 +42,51 @@ class BaseModel:
         """
         
         self.updated_at = datetime.now()
+        for callback in self._observers:
+            callback(self)
+
+
+    def __getstate__(self):
+        """
+        Return the state used to pickle and copy the object, without its observers.
+        """
+        
+        return {name: getattr(self, name) for name in slot_names(type(self)) if hasattr(self, name)}
+
+
+    def __setstate__(self, state):
+        """
+        Restore an object from the state returned by `__getstate__`.
+        """
+        
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._observers = ()
+
+
+    def add_observer(self, callback):
+        """
+        Register a callback called with the object each time it is saved.
+
+        Repositories use this to keep their secondary indexes in sync with
+        attribute changes made through `update`.
+
+        Args:
+            callback (callable): A function taking the modified object.
+        """
+        
+        self._observers = self._observers + (callback,)
+
+
+    def remove_observer(self, callback):
+        """
+        Unregister a callback previously added with `add_observer`.
+
+        Args:
+            callback (callable): The callback to remove.
+        """
+        
+        self._observers = tuple(c for c in self._observers if c != callback)
 
 
     def update(self, data):
@@ -51,4 +104,25 @@ class BaseModel:
         for key, value in data.items():
             if hasattr(self, key):
                 setattr(self, key, value)
-        self.save()
\ No newline at end of file
+        self.save()
+
+
+@lru_cache(maxsize=None)
+def slot_names(cls):
+    """
+    Return the names of the slots declared by a model class and its bases,
+    excluding the observers.
+
+    Args:
+        cls (type): A BaseModel subclass.
+
+    Returns:
+        tuple: The slot names.
+    """
+    
+    return tuple(
+        name
+        for klass in reversed(cls.__mro__)
+        for name in getattr(klass, '__slots__', ())
+        if name != '_observers'
+    )
\ No newline at end of file
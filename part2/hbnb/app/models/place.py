@@ -1,3 +1,5 @@
+import numbers
+import sys
 import uuid
 from datetime import datetime
 from app.models.base_model import BaseModel
@@ -21,10 +23,17 @@ class Place(BaseModel):
         reviews (list): A list of reviews associated with the place.
         amenities (list): A list of amenities available at the place.
         users (list): A list of users associated with the place.
+
+    The reviews, amenities and users lists are only created on first access,
+    and the owner ID is interned so the places of one owner share it.
     """
 
 
-    def __init__(self, title, description, price, latitude, longitude, owner_id: str, id=None, amenities=[]):
+    __slots__ = ('_title', '_description', '_price', 'latitude', 'longitude', 'owner_id',
+                 '_reviews', '_amenities', '_users')
+
+
+    def __init__(self, title, description, price, latitude, longitude, owner_id: str, id=None, amenities=None):
         """
         Initializes a Place instance.
 
@@ -46,10 +55,70 @@ class Place(BaseModel):
         self._price = price
         self.latitude = latitude
         self.longitude = longitude
-        self.owner_id = owner_id
-        self.reviews = []
-        self.amenities = amenities
-        self.users = []
+        self.owner_id = sys.intern(owner_id) if isinstance(owner_id, str) else owner_id
+        self._reviews = None
+        self._amenities = list(amenities) if amenities else None
+        self._users = None
+
+
+    @property
+    def reviews(self):
+        """
+        list: The reviews associated with the place.
+        """
+        
+        if self._reviews is None:
+            self._reviews = []
+        return self._reviews
+
+
+    @reviews.setter
+    def reviews(self, value):
+        """
+        Replace the reviews associated with the place.
+        """
+        
+        self._reviews = list(value)
+
+
+    @property
+    def amenities(self):
+        """
+        list: The amenities available at the place.
+        """
+        
+        if self._amenities is None:
+            self._amenities = []
+        return self._amenities
+
+
+    @amenities.setter
+    def amenities(self, value):
+        """
+        Replace the amenities available at the place.
+        """
+        
+        self._amenities = list(value)
+
+
+    @property
+    def users(self):
+        """
+        list: The users associated with the place.
+        """
+        
+        if self._users is None:
+            self._users = []
+        return self._users
+
+
+    @users.setter
+    def users(self, value):
+        """
+        Replace the users associated with the place.
+        """
+        
+        self._users = list(value)
 
 
     @property
@@ -160,11 +229,18 @@ class Place(BaseModel):
         """
         Add an amenity to the place.
 
+        The place stores amenity IDs, as PUT /places/<id> does. The list is
+        replaced rather than appended to (copy-on-write versions of a place
+        share it), and `save` lets the repository reindex the place.
+
         Args:
-            amenity: The amenity object to add to the place.
+            amenity: The amenity object, or its ID, to add to the place.
         """
         
-        self.amenities.append(amenity)
+        amenity_id = getattr(amenity, 'id', amenity)
+        if amenity_id not in self.amenities:
+            self.amenities = self.amenities + [amenity_id]
+            self.save()
 
 
     def add_user(self, user):
@@ -175,4 +251,41 @@ class Place(BaseModel):
             user: The user object to associate with the place.
         """
         
-        self.users.append(user)
\ No newline at end of file
+        self.users.append(user)
+
+
+    @staticmethod
+    def validate_request_data(data: dict):
+        """
+        Validate the request data for creating or updating a place.
+
+        The numeric attributes are checked before anything is stored, as the
+        column store and clusters of the place repository require numbers.
+
+        Args:
+            data (dict): A dictionary containing place attributes.
+
+        Raises:
+            ValueError: If any of the provided attributes are invalid.
+
+        Returns:
+            dict: The validated data if all checks pass.
+        """
+        
+        for key in ('price', 'latitude', 'longitude'):
+            if key in data and (isinstance(data[key], bool) or not isinstance(data[key], numbers.Real)):
+                raise ValueError("{} must be a number.".format(key.capitalize()))
+        
+        if 'price' in data and data['price'] < 0:
+            raise ValueError("Price can't be negative")
+        
+        if 'latitude' in data and not -90 <= data['latitude'] <= 90:
+            raise ValueError("Latitude must be between -90 and 90.")
+        
+        if 'longitude' in data and not -180 <= data['longitude'] <= 180:
+            raise ValueError("Longitude must be between -180 and 180.")
+        
+        if 'title' in data and (not isinstance(data['title'], str) or len(data['title']) > 100):
+            raise ValueError("Title must be a string of at most 100 chars.")
+        
+        return data
@@ -1,8 +1,8 @@
-import uuid
-from datetime import datetime
+import sys
+from app.models.base_model import BaseModel
 
 
-class Review:
+class Review(BaseModel):
     """
     Represents a review for a place.
 
@@ -16,9 +16,15 @@ class Review:
         user_id (str): The ID of the user who wrote the review.
         created_at (datetime): The timestamp when the review was created.
         updated_at (datetime): The timestamp when the review was last updated.
+
+    The place and user IDs are interned, so reviews of the same place or by
+    the same user share one string object.
     """
 
 
+    __slots__ = ('text', 'rating', 'place_id', 'user_id')
+
+
     def __init__(self, text, rating, place_id, user_id, id=None):
         """
         Initializes a Review instance.
@@ -34,6 +40,8 @@ class Review:
             ValueError: If the text is empty, the rating is not between 0 and 5, or the IDs are not strings.
         """
         
+        super().__init__()
+
         if not text:
             raise ValueError("Review text is required")
         self.text = text
@@ -44,23 +52,13 @@ class Review:
 
         if not isinstance(place_id, str):
             raise ValueError("Invalid Place ID")
-        self.place_id = place_id
+        self.place_id = sys.intern(place_id)
 
         if not isinstance(user_id, str):
             raise ValueError("Invalid User ID")
-        self.user_id = user_id
-
-        self.id = id or str(uuid.uuid4())
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
+        self.user_id = sys.intern(user_id)
 
-
-    def save(self):
-        """
-        Update the 'updated_at' timestamp whenever the review is modified.
-        """
-        
-        self.updated_at = datetime.now()
+        self.id = id or self.id
 
 
     def dict(self):
@@ -19,10 +19,13 @@ class User(BaseModel):
         last_name (str): The user's last name.
         email (str): The user's email address.
         is_admin (bool): Indicates if the user is an administrator.
-        places (list): A list of places associated with the user.
+        places (list): A list of places associated with the user, created on first access.
     """
 
 
+    __slots__ = ('first_name', 'last_name', 'email', 'is_admin', '_places')
+
+
     def __init__(self, first_name, last_name, email):
         """
         Initializes a User instance.
@@ -41,7 +44,29 @@ class User(BaseModel):
         self.last_name = last_name
         self.email = email
         self.is_admin = False
-        self.places = []
+        self._places = None
+
+
+    @property
+    def places(self):
+        """
+        list: The places associated with the user.
+
+        The list is only allocated once something reads or adds to it.
+        """
+        
+        if self._places is None:
+            self._places = []
+        return self._places
+
+
+    @places.setter
+    def places(self, value):
+        """
+        Replace the places associated with the user.
+        """
+        
+        self._places = list(value)
 
 
     def save(self):
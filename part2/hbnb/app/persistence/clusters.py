@@ -0,0 +1,226 @@
+import math
+import threading
+
+import numpy as np
+
+
+MAX_LATITUDE = 85.05112878
+
+
+def tile(latitude, longitude, level):
+    """
+    Return the (x, y) Web Mercator tile holding a point at a zoom level.
+
+    Args:
+        latitude, longitude (float): The point, in degrees.
+        level (int): The zoom level; the world is 2**level tiles wide.
+    """
+    n = 1 << level
+    latitude = min(max(latitude, -MAX_LATITUDE), MAX_LATITUDE)
+    x = int((longitude + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(latitude))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def cluster_points(latitudes, longitudes, prices, level):
+    """
+    Group points per tile of a level in one vectorized pass.
+
+    Used for the levels finer than those GridClusters precomputes, on the
+    rows of a small map view.
+
+    Args:
+        latitudes, longitudes, prices (numpy.ndarray): The points; NaN prices are ignored.
+        level (int): The zoom level of the tiles.
+
+    Returns:
+        list: (count, centroid latitude, centroid longitude, minimum price
+        or None) tuples, one per non-empty tile.
+    """
+    if not len(latitudes):
+        return []
+    n = 1 << level
+    clipped = np.radians(np.clip(latitudes, -MAX_LATITUDE, MAX_LATITUDE))
+    x = np.clip(((longitudes + 180.0) / 360.0 * n).astype(np.int64), 0, n - 1)
+    y = np.clip(((1.0 - np.arcsinh(np.tan(clipped)) / np.pi) / 2.0 * n).astype(np.int64), 0, n - 1)
+    keys, cells = np.unique(x << 32 | y, return_inverse=True)
+    counts = np.bincount(cells)
+    latitude_sums = np.bincount(cells, weights=latitudes)
+    longitude_sums = np.bincount(cells, weights=longitudes)
+    min_prices = np.full(len(keys), np.inf)
+    np.minimum.at(min_prices, cells, np.where(np.isnan(prices), np.inf, prices))
+    return [(int(count), lat_sum / count, lon_sum / count, None if min_price == np.inf else float(min_price))
+            for count, lat_sum, lon_sum, min_price in zip(counts, latitude_sums, longitude_sums, min_prices)]
+
+
+class GridClusters:
+    """
+    Multi-resolution grid aggregates of the positions and prices of places.
+
+    For every zoom level up to `max_level`, each Web Mercator tile holding
+    places has an entry [count, latitude sum, longitude sum, minimum price].
+    A place added, moved or removed updates one entry per level, from the
+    finest up: counts and sums by difference, minimum prices from the price
+    counts of the finest cell and then from the 4 children of each coarser
+    cell. A map view is then answered by looking up the cells it covers.
+
+    Attributes:
+        max_level (int): The finest precomputed level.
+        lat, lon, price (str): The attributes aggregated.
+        _levels (list): Per level, packed (x, y) keys mapped to their entry.
+        _prices (dict): Finest cell keys mapped to {price: number of places}.
+        _cells (dict): Place IDs mapped to the (x, y, latitude, longitude, price)
+            they are aggregated under.
+        _lock (threading.Lock): Serializes writes and reads.
+    """
+
+
+    def __init__(self, max_level=14, lat='latitude', lon='longitude', price='price'):
+        """
+        Initialize empty aggregates.
+
+        Args:
+            max_level (int, optional): The finest precomputed level.
+            lat, lon, price (str, optional): The attributes to aggregate.
+        """
+        self.max_level = max_level
+        self.lat = lat
+        self.lon = lon
+        self.price = price
+        self._levels = [{} for _ in range(max_level + 1)]
+        self._prices = {}
+        self._cells = {}
+        self._lock = threading.Lock()
+
+
+    def _values(self, obj):
+        latitude = getattr(obj, self.lat, None)
+        longitude = getattr(obj, self.lon, None)
+        if latitude is None or longitude is None:
+            return None
+        price = getattr(obj, self.price, None)
+        x, y = tile(latitude, longitude, self.max_level)
+        return x, y, latitude, longitude, math.inf if price is None else price
+
+
+    def _apply(self, values, sign):
+        """
+        Add (sign 1) or remove (sign -1) one place from every level.
+        """
+        x, y, latitude, longitude, price = values
+
+        key = x << 32 | y
+        prices = self._prices.setdefault(key, {})
+        remaining = prices.get(price, 0) + sign
+        if remaining > 0:
+            prices[price] = remaining
+        else:
+            prices.pop(price, None)
+        if not prices:
+            del self._prices[key]
+
+        for level in range(self.max_level, -1, -1):
+            shift = self.max_level - level
+            cell_x, cell_y = x >> shift, y >> shift
+            key = cell_x << 32 | cell_y
+            cells = self._levels[level]
+            entry = cells.get(key)
+            if entry is None:
+                entry = cells[key] = [0, 0.0, 0.0, math.inf]
+            entry[0] += sign
+            if entry[0] <= 0:
+                del cells[key]
+                continue
+            entry[1] += sign * latitude
+            entry[2] += sign * longitude
+            if level == self.max_level:
+                entry[3] = min(self._prices[key])
+            else:
+                children = self._levels[level + 1]
+                entry[3] = min(
+                    (child[3] for child in (
+                        children.get((2 * cell_x + dx) << 32 | (2 * cell_y + dy)) for dx in (0, 1) for dy in (0, 1)
+                    ) if child is not None),
+                    default=math.inf
+                )
+
+
+    def add(self, obj):
+        """
+        Aggregate a place, or move it if already aggregated.
+        """
+        with self._lock:
+            old = self._cells.pop(obj.id, None)
+            if old is not None:
+                self._apply(old, -1)
+            values = self._values(obj)
+            if values is not None:
+                self._apply(values, 1)
+                self._cells[obj.id] = values
+
+
+    def remove(self, obj):
+        """
+        Remove a place from the aggregates.
+        """
+        with self._lock:
+            old = self._cells.pop(obj.id, None)
+            if old is not None:
+                self._apply(old, -1)
+
+
+    def update(self, obj):
+        """
+        Move a place if its position or price changed.
+        """
+        values = self._values(obj)
+        if self._cells.get(obj.id) != values:
+            self.add(obj)
+
+
+    def replace(self, old_obj, new_obj):
+        """
+        Refresh a place with its new version (copy-on-write updates).
+        """
+        self.update(new_obj)
+
+
+    def clusters(self, south, west, north, east, level):
+        """
+        Return the aggregates of the cells of a level overlapping a bounding box.
+
+        A box whose west edge is greater than its east edge crosses the
+        antimeridian.
+
+        Args:
+            south, west, north, east (float): The box edges, in degrees.
+            level (int): The level of the cells, at most `max_level`.
+
+        Returns:
+            list: (count, centroid latitude, centroid longitude, minimum price
+            or None) tuples, one per non-empty cell.
+        """
+        x_west, y_north = tile(north, west, level)
+        x_east, y_south = tile(south, east, level)
+        if west <= east:
+            x_ranges = [(x_west, x_east)]
+        else:
+            x_ranges = [(x_west, (1 << level) - 1), (0, x_east)]
+
+        def inside(key):
+            x, y = key >> 32, key & 0xFFFFFFFF
+            return y_north <= y <= y_south and any(low <= x <= high for low, high in x_ranges)
+
+        with self._lock:
+            cells = self._levels[level]
+            size = sum(high - low + 1 for low, high in x_ranges) * (y_south - y_north + 1)
+            if size <= len(cells):
+                entries = [cells.get(x << 32 | y)
+                           for low, high in x_ranges for x in range(low, high + 1)
+                           for y in range(y_north, y_south + 1)]
+                entries = [list(entry) for entry in entries if entry is not None]
+            else:
+                entries = [list(entry) for key, entry in cells.items() if inside(key)]
+
+        return [(count, lat_sum / count, lon_sum / count, None if min_price == math.inf else min_price)
+                for count, lat_sum, lon_sum, min_price in entries]
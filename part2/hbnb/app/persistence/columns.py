@@ -0,0 +1,386 @@
+import threading
+
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+
+
+class ColumnStore:
+    """
+    Column-oriented copy of numeric attributes of the objects in a repository.
+
+    Each attribute is kept in a contiguous float64 NumPy array, one row per
+    object, so filters over millions of objects run as single vectorized
+    passes instead of Python loops. Rows stay dense: a deleted row is
+    replaced by the last one. Missing values are stored as NaN and never
+    match a filter.
+
+    The repository keeps the store in sync on add, update and delete (see
+    InMemoryRepository). Queries return object IDs; the repository maps them
+    back to objects.
+
+    With `track_changes`, the store also logs the IDs it writes, so derived
+    structures built from a snapshot of the columns (see SpatialIndex) can
+    catch up with what changed since, instead of being rebuilt every time.
+
+    Attributes:
+        attr_names (tuple): The stored attributes.
+        version (int): The number of writes so far.
+        _columns (dict): Attribute names mapped to their arrays (capacity sized).
+        _ids (numpy.ndarray): Object IDs, by row.
+        _rows (dict): Object IDs mapped to their row.
+        _size (int): The number of rows in use.
+        _changes (list): The IDs written since version `_changes_start`, if tracked.
+    """
+
+
+    def __init__(self, attr_names, capacity=1024, track_changes=False):
+        """
+        Initialize an empty store.
+
+        Args:
+            attr_names (iterable): The numeric attributes to store.
+            capacity (int, optional): The number of rows allocated up front.
+            track_changes (bool, optional): Log written IDs for `changed_since`.
+        """
+        self.attr_names = tuple(attr_names)
+        self._columns = {name: np.empty(capacity) for name in self.attr_names}
+        self._ids = np.empty(capacity, dtype=object)
+        self._rows = {}
+        self._size = 0
+        self.version = 0
+        self._changes = [] if track_changes else None
+        self._changes_start = 0
+        self._changes_lock = threading.Lock()
+
+
+    def __len__(self):
+        return self._size
+
+
+    def _grow(self):
+        """
+        Double the capacity of every array.
+
+        New arrays are allocated and filled before being swapped in, so a
+        reader holding the old ones still sees consistent rows.
+        """
+        capacity = max(2 * len(self._ids), 1024)
+        for name, column in self._columns.items():
+            grown = np.empty(capacity)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+        ids = np.empty(capacity, dtype=object)
+        ids[:self._size] = self._ids[:self._size]
+        self._ids = ids
+
+
+    def _write(self, row, obj):
+        for name, column in self._columns.items():
+            value = getattr(obj, name, None)
+            column[row] = np.nan if value is None else value
+
+
+    def _changed(self, obj_id):
+        if self._changes is None:
+            self.version += 1
+            return
+        with self._changes_lock:
+            self._changes.append(obj_id)
+            self.version += 1
+
+
+    def changed_since(self, version):
+        """
+        Return the IDs written after `version`, or None if that is no longer known.
+
+        Includes the IDs of added, updated and removed objects, and of
+        objects whose row moved.
+        """
+        if self._changes is None:
+            return None
+        with self._changes_lock:
+            if version < self._changes_start:
+                return None
+            return set(self._changes[version - self._changes_start:])
+
+
+    def forget_changes(self, version):
+        """
+        Drop the change log up to `version`, once no reader needs it.
+        """
+        if self._changes is None:
+            return
+        with self._changes_lock:
+            if version > self._changes_start:
+                del self._changes[:version - self._changes_start]
+                self._changes_start = version
+
+
+    def snapshot(self, names):
+        """
+        Return the version, the IDs and copies of some columns.
+
+        Rows written concurrently may be torn in the copy, but their IDs are
+        then in `changed_since(version)`.
+
+        Args:
+            names (iterable): The attributes to copy.
+
+        Returns:
+            tuple: (version, ids array, list of column arrays).
+        """
+        version = self.version
+        size = self._size
+        columns = [self._columns[name][:size].copy() for name in names]
+        return version, self._ids[:size].copy(), columns
+
+
+    def add(self, obj):
+        """
+        Append a row for an object, or refresh it if already stored.
+        """
+        row = self._rows.get(obj.id)
+        if row is None:
+            if self._size == len(self._ids):
+                self._grow()
+            row = self._size
+            self._write(row, obj)
+            self._ids[row] = obj.id
+            self._rows[obj.id] = row
+            self._size += 1
+        else:
+            self._write(row, obj)
+        self._changed(obj.id)
+
+
+    def remove(self, obj):
+        """
+        Drop the row of an object, moving the last row into its place.
+        """
+        row = self._rows.pop(obj.id, None)
+        if row is None:
+            return
+        last = self._size - 1
+        if row != last:
+            for column in self._columns.values():
+                column[row] = column[last]
+            moved_id = self._ids[last]
+            self._ids[row] = moved_id
+            self._rows[moved_id] = row
+            self._changed(moved_id)
+        self._ids[last] = None
+        self._size = last
+        self._changed(obj.id)
+
+
+    def update(self, obj):
+        """
+        Refresh the row of an object after its attributes changed.
+        """
+        row = self._rows.get(obj.id)
+        if row is not None:
+            self._write(row, obj)
+            self._changed(obj.id)
+
+
+    def replace(self, old_obj, new_obj):
+        """
+        Refresh the row of an object with its new version (copy-on-write updates).
+        """
+        self.update(new_obj)
+
+
+    def lookup(self, obj_ids, names):
+        """
+        Return the stored values of some attributes for several objects.
+
+        Args:
+            obj_ids (list): The object IDs; those not stored are skipped.
+            names (iterable): The attributes to read.
+
+        Returns:
+            tuple: (the stored IDs, list of value arrays aligned with them).
+        """
+        get = self._rows.get
+        rows = np.fromiter((get(obj_id, -1) for obj_id in obj_ids), dtype=np.intp, count=len(obj_ids))
+        found = rows >= 0
+        rows = rows[found]
+        stored_ids = [obj_id for obj_id, is_found in zip(obj_ids, found.tolist()) if is_found]
+        return stored_ids, [self._columns[name][rows] for name in names]
+
+
+    def ids(self, mask=None):
+        """
+        Return the IDs of the rows selected by a boolean mask (all rows if None).
+
+        The mask covers the rows that were in use when it was built; rows
+        removed since then yield None.
+        """
+        ids = self._ids[:self._size if mask is None else len(mask)]
+        return (ids if mask is None else ids[mask]).tolist()
+
+
+    def view(self):
+        """
+        Return a ColumnView of the rows currently in use, to build filters on.
+        """
+        size = self._size
+        return ColumnView({name: column[:size] for name, column in self._columns.items()}, self._ids[:size])
+
+
+class ColumnView:
+    """
+    The rows of a ColumnStore in use at one moment, with vectorized filters.
+
+    Every filter built on the same view is a mask of the same length, so
+    masks can be combined with `&` and `|` even while writers add or remove
+    rows; `ColumnStore.ids` maps them back to object IDs.
+
+    Attributes:
+        _columns (dict): Attribute names mapped to read-only array views.
+        _ids (numpy.ndarray): Object IDs, by row.
+    """
+
+
+    def __init__(self, columns, ids):
+        """
+        Initialize a view over column arrays of the same length.
+
+        Args:
+            columns (dict): Attribute names mapped to arrays.
+            ids (numpy.ndarray): Object IDs, by row.
+        """
+        for column in columns.values():
+            column.flags.writeable = False
+        self._columns = columns
+        self._ids = ids
+
+
+    def __len__(self):
+        return len(self._ids)
+
+
+    def column(self, name):
+        """
+        Return the values of one attribute, by row.
+
+        Args:
+            name (str): A stored attribute.
+        """
+        return self._columns[name]
+
+
+    def all(self):
+        """
+        Return a mask selecting every row, to combine filters with `&`.
+        """
+        return np.ones(len(self._ids), dtype=bool)
+
+
+    def between(self, name, low=None, high=None):
+        """
+        Select the rows whose attribute lies in [low, high].
+
+        Args:
+            name (str): A stored attribute.
+            low (float, optional): The inclusive lower bound.
+            high (float, optional): The inclusive upper bound.
+
+        Returns:
+            numpy.ndarray: A boolean mask over the rows.
+        """
+        column = self.column(name)
+        mask = ~np.isnan(column)
+        if low is not None:
+            mask &= column >= low
+        if high is not None:
+            mask &= column <= high
+        return mask
+
+
+    def within_bbox(self, south, west, north, east, lat='latitude', lon='longitude'):
+        """
+        Select the rows inside a bounding box.
+
+        A box whose west edge is greater than its east edge crosses the
+        antimeridian.
+
+        Args:
+            south, west, north, east (float): The box edges, in degrees.
+            lat (str, optional): The latitude attribute.
+            lon (str, optional): The longitude attribute.
+
+        Returns:
+            numpy.ndarray: A boolean mask over the rows.
+        """
+        mask = self.between(lat, south, north)
+        longitudes = self.column(lon)
+        if west <= east:
+            mask &= (longitudes >= west) & (longitudes <= east)
+        else:
+            mask &= (longitudes >= west) | (longitudes <= east)
+        return mask
+
+
+    def distances_km(self, latitude, longitude, mask=None, lat='latitude', lon='longitude'):
+        """
+        Compute the great-circle (haversine) distance from a point to every row.
+
+        Args:
+            latitude, longitude (float): The reference point, in degrees.
+            mask (numpy.ndarray, optional): Only compute the selected rows.
+            lat (str, optional): The latitude attribute.
+            lon (str, optional): The longitude attribute.
+
+        Returns:
+            numpy.ndarray: The distances in kilometres, one per (selected) row.
+        """
+        latitudes = self.column(lat)
+        longitudes = self.column(lon)
+        if mask is not None:
+            latitudes = latitudes[mask]
+            longitudes = longitudes[mask]
+        return haversine_km(latitude, longitude, latitudes, longitudes)
+
+
+    def within_radius(self, latitude, longitude, radius_km, lat='latitude', lon='longitude'):
+        """
+        Select the rows within a distance of a point.
+
+        Rows outside the latitude band of the circle are discarded with a
+        cheap comparison before the haversine distance is computed.
+
+        Args:
+            latitude, longitude (float): The centre, in degrees.
+            radius_km (float): The radius, in kilometres.
+            lat (str, optional): The latitude attribute.
+            lon (str, optional): The longitude attribute.
+
+        Returns:
+            numpy.ndarray: A boolean mask over the rows.
+        """
+        band = radius_km / KM_PER_DEGREE
+        mask = self.between(lat, latitude - band, latitude + band)
+        rows = np.flatnonzero(mask)
+        distances = self.distances_km(latitude, longitude, mask, lat, lon)
+        mask[rows[~(distances <= radius_km)]] = False
+        return mask
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """
+    Return the great-circle distances in kilometres between a point and arrays of points.
+
+    Args:
+        latitude, longitude (float): The reference point, in degrees.
+        latitudes, longitudes (numpy.ndarray): The other points, in degrees.
+    """
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(latitudes)
+    half_dlat = (lat2 - lat1) / 2
+    half_dlon = np.radians(np.asarray(longitudes) - longitude) / 2
+    a = np.sin(half_dlat) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(half_dlon) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
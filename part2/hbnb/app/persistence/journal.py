@@ -0,0 +1,288 @@
+import gc
+import mmap
+import os
+import pickle
+import struct
+import threading
+
+
+HEADER = struct.Struct('<I')
+
+
+class Journal:
+    """
+    Durable persistence for in-memory repositories.
+
+    Every add, update and delete of the attached repositories is appended to
+    an operation log. A background thread flushes and fsyncs the log every
+    `commit_interval` seconds, so concurrent writers share one fsync (group
+    commit). Every `snapshot_every` records, the full state is written to a
+    compact snapshot and the log is restarted. On startup the snapshot is
+    loaded through mmap and the log is replayed on top of it.
+
+    Files in `directory`:
+        snapshot.pkl: The last complete snapshot.
+        journal.log: Operations recorded since that snapshot.
+        journal.log.old: Operations being folded into a snapshot in progress.
+
+    Attributes:
+        directory (str): The directory holding the files.
+        commit_interval (float): Seconds between two group commits.
+        snapshot_every (int): Records after which a snapshot is taken.
+        sync (bool): Whether writers wait for their record to be fsynced.
+    """
+
+
+    def __init__(self, directory, commit_interval=0.01, snapshot_every=100000, sync=False):
+        """
+        Initialize a journal stored in `directory`.
+
+        Args:
+            directory (str): The directory holding the snapshot and log files.
+            commit_interval (float, optional): Seconds between two group commits.
+            snapshot_every (int, optional): Records after which a snapshot is taken.
+            sync (bool, optional): Make writers wait until their record is on disk.
+        """
+        self.directory = directory
+        self.commit_interval = commit_interval
+        self.snapshot_every = snapshot_every
+        self.sync = sync
+        self._repositories = {}
+        self._log = None
+        self._lock = threading.Lock()
+        self._synced = threading.Condition(self._lock)
+        self._snapshot_lock = threading.Lock()
+        self._written = 0
+        self._synced_seq = 0
+        self._since_snapshot = 0
+        self._closed = threading.Event()
+        self._flusher = None
+
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+
+    def open(self, repositories):
+        """
+        Restore the repositories from disk, then start recording their changes.
+
+        Args:
+            repositories (dict): Repositories keyed by the name used in the files.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self._repositories = dict(repositories)
+
+        # Millions of objects are created and none are garbage: skip the cyclic GC passes
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self._load_snapshot()
+            replayed = self._replay(self._path('journal.log.old'))
+            replayed += self._replay(self._path('journal.log'))
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        if replayed:
+            # Fold the replayed logs into a new snapshot so the next start is fast
+            self._write_snapshot({name: repository.get_all() for name, repository in self._repositories.items()})
+            for log in ('journal.log.old', 'journal.log'):
+                if os.path.exists(self._path(log)):
+                    os.remove(self._path(log))
+
+        self._log = open(self._path('journal.log'), 'ab')
+        for name, repository in self._repositories.items():
+            repository.journal = self
+            repository.journal_name = name
+
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+
+    def _load_snapshot(self):
+        """
+        Load snapshot.pkl through a read-only memory map.
+        """
+        path = self._path('snapshot.pkl')
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            state = pickle.loads(data)
+
+        for name, objects in state.items():
+            repository = self._repositories.get(name)
+            if repository is not None:
+                repository.load(objects)
+
+
+    def _replay(self, path):
+        """
+        Apply the records of a log file, ignoring a torn record at its end.
+
+        Returns:
+            int: The number of records applied.
+        """
+        if not os.path.exists(path):
+            return 0
+
+        count = 0
+
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else b''
+            offset = 0
+            try:
+                while offset + HEADER.size <= len(data):
+                    (size,) = HEADER.unpack_from(data, offset)
+                    end = offset + HEADER.size + size
+                    if end > len(data):
+                        break
+                    name, op, payload = pickle.loads(data[offset + HEADER.size:end])
+                    repository = self._repositories.get(name)
+                    if repository is not None:
+                        self._apply(repository, op, payload)
+                    offset = end
+                    count += 1
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+
+        if offset < os.path.getsize(path):
+            with open(path, 'r+b') as f:
+                f.truncate(offset)
+
+        return count
+
+
+    @staticmethod
+    def _apply(repository, op, payload):
+        """
+        Apply one recorded operation to a repository.
+        """
+        if op == 'put':
+            repository.delete(payload.id)
+            repository.add(payload)
+        elif op == 'delete':
+            repository.delete(payload)
+
+
+    def record(self, name, op, payload):
+        """
+        Append an operation to the log.
+
+        Args:
+            name (str): The name of the repository the operation applies to.
+            op (str): 'put' (payload is the object) or 'delete' (payload is its ID).
+            payload: The object or ID.
+
+        Returns:
+            int: The sequence number of the record, to pass to `wait`.
+
+        Raises:
+            RuntimeError: If the journal was closed, e.g. by a write racing shutdown.
+        """
+        data = pickle.dumps((name, op, payload), pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            if self._log is None:
+                raise RuntimeError("The journal is closed, the change could not be recorded")
+            self._log.write(HEADER.pack(len(data)))
+            self._log.write(data)
+            self._written += 1
+            seq = self._written
+            self._since_snapshot += 1
+            snapshot_due = self._since_snapshot >= self.snapshot_every
+            if snapshot_due:
+                self._since_snapshot = 0
+
+        if snapshot_due:
+            threading.Thread(target=self.snapshot, daemon=True).start()
+
+        return seq
+
+
+    def wait(self, seq):
+        """
+        In sync mode, block until the record `seq` has been fsynced.
+
+        Writers call this after releasing their own locks, so all the
+        records appended during one commit interval share a single fsync.
+        """
+        if not self.sync:
+            return
+        with self._lock:
+            while self._synced_seq < seq and not self._closed.is_set():
+                self._synced.wait()
+
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.commit_interval):
+            self.commit()
+
+
+    def commit(self):
+        """
+        Flush and fsync the log, releasing the writers waiting on it.
+        """
+        with self._lock:
+            if self._log is None or self._synced_seq == self._written:
+                return
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._synced_seq = self._written
+            self._synced.notify_all()
+
+
+    def snapshot(self):
+        """
+        Write the current state to snapshot.pkl and restart the log.
+
+        The log is rotated to journal.log.old under the lock, then the
+        snapshot is written to a temporary file, fsynced and renamed, and
+        only then is the old log removed. A crash at any point leaves a
+        snapshot and logs that replay to the latest state.
+        """
+        with self._snapshot_lock:
+            with self._lock:
+                if self._log is None:
+                    return
+                self._log.flush()
+                os.fsync(self._log.fileno())
+                self._log.close()
+                os.replace(self._path('journal.log'), self._path('journal.log.old'))
+                self._log = open(self._path('journal.log'), 'ab')
+                self._synced_seq = self._written
+                self._synced.notify_all()
+                state = {name: repository.get_all() for name, repository in self._repositories.items()}
+
+            self._write_snapshot(state)
+            os.remove(self._path('journal.log.old'))
+
+
+    def _write_snapshot(self, state):
+        """
+        Atomically replace snapshot.pkl with the given state.
+        """
+        temporary = self._path('snapshot.pkl.tmp')
+        with open(temporary, 'wb') as f:
+            pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self._path('snapshot.pkl'))
+
+
+    def close(self):
+        """
+        Commit pending records and stop the background flusher.
+        """
+        if self._log is None:
+            return
+        self.commit()
+        self._closed.set()
+        with self._lock:
+            self._synced.notify_all()
+            self._log.close()
+            self._log = None
+        for repository in self._repositories.values():
+            repository.journal = None
@@ -1,4 +1,7 @@
+import copy
+import threading
 from abc import ABC, abstractmethod
+from bisect import bisect_left, insort
 
 
 class Repository(ABC):
@@ -101,14 +104,38 @@ class InMemoryRepository(Repository):
 
     Attributes:
         _storage (dict): A dictionary that stores objects using their IDs as keys.
+        _indexes (dict): Secondary indexes keyed by the attribute they index.
+        columns (ColumnStore): Columnar copy of numeric attributes, if any.
+        _derived (tuple): The column store and aggregates, maintained on every write.
+        observe_objects (bool): Whether added objects report their own changes
+            (see `reindex`).
+        journal (Journal): The journal recording changes, if persistence is enabled.
+        journal_name (str): The name of the repository in the journal.
     """
 
 
-    def __init__(self):
+    observe_objects = True
+    journal = None
+    journal_name = None
+
+
+    def __init__(self, indexes=(), columns=None, aggregates=()):
         """
         Initialize the in-memory storage dictionary.
+
+        Args:
+            indexes (iterable, optional): Secondary indexes (e.g. HashIndex) maintained
+                on add, update and delete.
+            columns (ColumnStore, optional): A column store maintained on add,
+                update and delete, for vectorized filtering (see `filter_columns`).
+            aggregates (iterable, optional): Other derived structures (e.g.
+                GridClusters) maintained on add, update and delete. Like
+                indexes, they implement add, remove, update and replace.
         """
         self._storage = {}
+        self._indexes = {index.attr_name: index for index in indexes}
+        self.columns = columns
+        self._derived = tuple(aggregates) + ((columns,) if columns is not None else ())
 
 
     def add(self, obj):
@@ -117,8 +144,79 @@ class InMemoryRepository(Repository):
 
         Args:
             obj: The object to be added.
+
+        Raises:
+            ValueError: If the object violates a unique index.
+        """
+        self._wait(self._add(obj))
+
+
+    def _add(self, obj):
+        """
+        Store and index an object, returning its journal sequence number.
         """
+        for index in self._indexes.values():
+            index.check(obj.id, getattr(obj, index.attr_name))
         self._storage[obj.id] = obj
+        for index in self._indexes.values():
+            index.add(obj)
+        for derived in self._derived:
+            derived.add(obj)
+        if self.observe_objects and hasattr(obj, 'add_observer'):
+            obj.add_observer(self.reindex)
+        return self._record('put', obj)
+
+
+    def load(self, objects):
+        """
+        Bulk-add objects restored from disk into an empty repository.
+
+        Skips the per-call locking and journal waits of `add`; only meant for
+        startup, before the repository is shared.
+
+        Args:
+            objects (iterable): The objects to add.
+        """
+        for obj in objects:
+            self._add(obj)
+
+
+    def reindex(self, obj):
+        """
+        Refresh the secondary indexes of an object after its attributes changed,
+        and record the new state in the journal.
+
+        Registered as an observer on the objects added to the repository, so
+        changes made through `BaseModel.update` are picked up as well.
+
+        Args:
+            obj: The modified object.
+        """
+        if self._storage.get(obj.id) is obj:
+            for index in self._indexes.values():
+                index.update(obj)
+            for derived in self._derived:
+                derived.update(obj)
+            self._wait(self._record('put', obj))
+
+
+    def _record(self, op, payload):
+        """
+        Append an operation to the journal, if persistence is enabled.
+
+        Returns:
+            int: The journal sequence number of the operation, or None.
+        """
+        if self.journal is not None:
+            return self.journal.record(self.journal_name, op, payload)
+
+
+    def _wait(self, seq):
+        """
+        Wait until a journaled operation is durable (journal sync mode).
+        """
+        if seq is not None and self.journal is not None:
+            self.journal.wait(seq)
 
 
     def get(self, obj_id):
@@ -151,10 +249,30 @@ class InMemoryRepository(Repository):
         Args:
             obj_id (str): The ID of the object to update.
             data (dict): A dictionary of new values to update the object with.
+
+        Returns:
+            The updated object, or None if not found.
+
+        Raises:
+            ValueError: If the new values violate a unique index.
         """
         obj = self.get(obj_id)
         if obj:
+            self._check_unique(obj_id, data)
             obj.update(data)
+        return obj
+
+
+    def _check_unique(self, obj_id, data):
+        """
+        Ensure new attribute values would not break a unique index.
+
+        Raises:
+            ValueError: If a value is already held by another object.
+        """
+        for attr_name, value in data.items():
+            if attr_name in self._indexes:
+                self._indexes[attr_name].check(obj_id, value)
 
 
     def delete(self, obj_id):
@@ -164,8 +282,22 @@ class InMemoryRepository(Repository):
         Args:
             obj_id (str): The ID of the object to delete.
         """
-        if obj_id in self._storage:
-            del self._storage[obj_id]
+        self._wait(self._delete(obj_id))
+
+
+    def _delete(self, obj_id):
+        """
+        Remove an object and its index entries, returning its journal sequence number.
+        """
+        obj = self._storage.pop(obj_id, None)
+        if obj is not None:
+            for index in self._indexes.values():
+                index.remove(obj)
+            for derived in self._derived:
+                derived.remove(obj)
+            if self.observe_objects and hasattr(obj, 'remove_observer'):
+                obj.remove_observer(self.reindex)
+            return self._record('delete', obj_id)
 
 
     def get_by_attribute(self, attr_name, attr_value):
@@ -179,4 +311,572 @@ class InMemoryRepository(Repository):
         Returns:
             The first object that matches the attribute value, or None if not found.
         """
-        return next((obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value), None)
\ No newline at end of file
+        index = self._indexes.get(attr_name)
+        if index is not None:
+            return next(iter(index.get(attr_value)), None)
+        return next((obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value), None)
+
+
+    def get_all_by_attribute(self, attr_name, attr_value):
+        """
+        Retrieve every object matching a specific attribute value.
+
+        Args:
+            attr_name (str): The name of the attribute to filter by.
+            attr_value: The value of the attribute to match.
+
+        Returns:
+            A list of the matching objects.
+        """
+        index = self._indexes.get(attr_name)
+        if index is not None:
+            return list(index.get(attr_value))
+        return [obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value]
+
+
+    def get_page_by_attribute(self, attr_name, attr_value, offset=0, limit=None):
+        """
+        Retrieve one page of the objects matching a specific attribute value.
+
+        Uses the index's own ordering and slicing when it provides one (see
+        SortedIndex), so a page costs O(log n + limit) instead of a scan.
+
+        Args:
+            attr_name (str): The name of the attribute to filter by.
+            attr_value: The value of the attribute to match.
+            offset (int, optional): The number of matching objects to skip.
+            limit (int, optional): The maximum number of objects to return.
+
+        Returns:
+            A list of the matching objects.
+        """
+        index = self._indexes.get(attr_name)
+        if hasattr(index, 'page'):
+            return index.page(attr_value, offset, limit)
+        matches = self.get_all_by_attribute(attr_name, attr_value)
+        return matches[offset:None if limit is None else offset + limit]
+
+
+    def get_all_having(self, attr_name, values):
+        """
+        Retrieve the objects whose multi-valued attribute holds every given value.
+
+        Answered by bitset intersection when the attribute has a BitmapIndex.
+
+        Args:
+            attr_name (str): The multi-valued attribute (e.g. 'amenities').
+            values (iterable): The values the objects must all hold.
+
+        Returns:
+            A list of the matching objects.
+        """
+        index = self._indexes.get(attr_name)
+        if hasattr(index, 'get_all_of'):
+            return index.get_all_of(values)
+        values = set(values)
+        return [obj for obj in self._storage.values()
+                if values <= {getattr(item, 'id', item) for item in getattr(obj, attr_name) or ()}]
+
+
+    def filter_columns(self, mask):
+        """
+        Retrieve the objects selected by a boolean mask over the column store.
+
+        Args:
+            mask (numpy.ndarray): A mask built on a view of the columns
+                (e.g. `repo.columns.view().between('price', 50, 100)`).
+
+        Returns:
+            A list of the selected objects.
+        """
+        get = self._storage.get
+        return [obj for obj in map(get, self.columns.ids(mask)) if obj is not None]
+
+
+class ConcurrentInMemoryRepository(InMemoryRepository):
+    """
+    Thread-safe variant of InMemoryRepository for threaded WSGI servers.
+
+    Writers are serialized by a lock; readers never take it. Updates are
+    copy-on-write: the stored object is copied, the copy is modified and then
+    swapped in, so a reader holding (or serializing) an object never sees it
+    half updated. Stored objects should therefore not be mutated in place; go
+    through `update` instead. Changes still made in place (e.g. by a model
+    method calling `save`) are reindexed under the lock, but readers may see
+    them half applied.
+
+    Attributes:
+        _lock (threading.Lock): Serializes add, update, delete and reindex.
+    """
+
+
+    def __init__(self, indexes=(), columns=None, aggregates=()):
+        """
+        Initialize the storage, indexes and writer lock.
+
+        Args:
+            indexes (iterable, optional): Secondary indexes maintained on writes.
+            columns (ColumnStore, optional): A column store maintained on writes.
+            aggregates (iterable, optional): Other derived structures maintained on writes.
+        """
+        super().__init__(indexes, columns, aggregates)
+        self._lock = threading.Lock()
+
+
+    def add(self, obj):
+        """
+        Add a new object to the repository.
+
+        Args:
+            obj: The object to be added.
+        """
+        with self._lock:
+            seq = self._add(obj)
+        self._wait(seq)
+
+
+    def update(self, obj_id, data):
+        """
+        Replace an object by an updated copy.
+
+        Args:
+            obj_id (str): The ID of the object to update.
+            data (dict): A dictionary of new values to update the object with.
+
+        Returns:
+            The new version of the object, or None if not found.
+
+        Raises:
+            ValueError: If the new values violate a unique index.
+        """
+        with self._lock:
+            obj = self._storage.get(obj_id)
+            if obj is None:
+                return None
+            self._check_unique(obj_id, data)
+            new_obj = copy.copy(obj)
+            new_obj.update(data)
+            self._storage[obj_id] = new_obj
+            for index in self._indexes.values():
+                index.replace(obj, new_obj)
+            for derived in self._derived:
+                derived.replace(obj, new_obj)
+            if hasattr(obj, 'remove_observer'):
+                obj.remove_observer(self.reindex)
+                new_obj.add_observer(self.reindex)
+            seq = self._record('put', new_obj)
+        self._wait(seq)
+        return new_obj
+
+
+    def reindex(self, obj):
+        """
+        Refresh the indexes of an object changed in place, under the writer lock.
+
+        Args:
+            obj: The modified object.
+        """
+        with self._lock:
+            if self._storage.get(obj.id) is not obj:
+                return
+            for index in self._indexes.values():
+                index.update(obj)
+            for derived in self._derived:
+                derived.update(obj)
+            seq = self._record('put', obj)
+        self._wait(seq)
+
+
+    def delete(self, obj_id):
+        """
+        Delete an object by its ID.
+
+        Args:
+            obj_id (str): The ID of the object to delete.
+        """
+        with self._lock:
+            seq = self._delete(obj_id)
+        self._wait(seq)
+
+
+class HashIndex:
+    """
+    Secondary hash index over one attribute of the objects in a repository.
+
+    Maps each attribute value to the objects holding it, so lookups by that
+    attribute are O(1) instead of a scan of the whole storage.
+
+    Attributes:
+        attr_name (str): The indexed attribute.
+        unique (bool): Whether two objects may share the same value.
+        _entries (dict): Attribute values mapped to {object id: object}.
+        _keys (dict): Object IDs mapped to the value they are indexed under.
+    """
+
+
+    def __init__(self, attr_name, unique=False):
+        """
+        Initialize an empty index.
+
+        Args:
+            attr_name (str): The attribute to index.
+            unique (bool, optional): Reject two objects with the same value.
+        """
+        self.attr_name = attr_name
+        self.unique = unique
+        self._entries = {}
+        self._keys = {}
+
+
+    def check(self, obj_id, value):
+        """
+        Ensure indexing an object under a value would not break the unique constraint.
+
+        Args:
+            obj_id (str): The ID of the object to index.
+            value: The attribute value it would be indexed under.
+
+        Raises:
+            ValueError: If another object already holds the same value.
+        """
+        if self.unique:
+            holders = self._entries.get(value)
+            if holders and obj_id not in holders:
+                raise ValueError("{} already exists".format(self.attr_name))
+
+
+    def add(self, obj):
+        """
+        Index an object under its current attribute value.
+        """
+        key = getattr(obj, self.attr_name)
+        self._entries.setdefault(key, {})[obj.id] = obj
+        self._keys[obj.id] = key
+
+
+    def remove(self, obj):
+        """
+        Remove an object from the index.
+        """
+        key = self._keys.pop(obj.id, None)
+        holders = self._entries.get(key)
+        if holders is not None:
+            holders.pop(obj.id, None)
+            if not holders:
+                del self._entries[key]
+
+
+    def update(self, obj):
+        """
+        Move an object to its new attribute value if it changed.
+
+        Raises:
+            ValueError: If the new value is already held by another object.
+        """
+        if self._keys.get(obj.id) != getattr(obj, self.attr_name):
+            self.check(obj.id, getattr(obj, self.attr_name))
+            self.remove(obj)
+            self.add(obj)
+
+
+    def replace(self, old_obj, new_obj):
+        """
+        Swap a stored object for its new version (copy-on-write updates).
+
+        The new version is indexed before the old one is dropped, so
+        concurrent readers always find one of them.
+        """
+        old_key = self._keys.get(old_obj.id)
+        new_key = getattr(new_obj, self.attr_name)
+        self._entries.setdefault(new_key, {})[new_obj.id] = new_obj
+        self._keys[new_obj.id] = new_key
+        if old_key != new_key:
+            holders = self._entries.get(old_key)
+            if holders is not None:
+                holders.pop(old_obj.id, None)
+                if not holders:
+                    del self._entries[old_key]
+
+
+    def get(self, value):
+        """
+        Return the objects indexed under a value.
+        """
+        return list(self._entries.get(value, {}).values())
+
+
+class SortedIndex:
+    """
+    Secondary index over one attribute, keeping each group ordered by another.
+
+    For every value of `attr_name`, the objects are kept in a list sorted by
+    (`sort_attr`, id), so a page of a group is a slice rather than a scan and
+    sort. Used for reviews per place ordered by creation time.
+
+    Attributes:
+        attr_name (str): The indexed attribute.
+        sort_attr (str): The attribute each group is ordered by.
+        unique (bool): Always False; groups hold any number of objects.
+        _entries (dict): Attribute values mapped to sorted (sort value, id, object) lists.
+        _keys (dict): Object IDs mapped to their (attribute value, sort value).
+    """
+
+
+    unique = False
+
+
+    def __init__(self, attr_name, sort_attr):
+        """
+        Initialize an empty index.
+
+        Args:
+            attr_name (str): The attribute to group by.
+            sort_attr (str): The attribute to order each group by.
+        """
+        self.attr_name = attr_name
+        self.sort_attr = sort_attr
+        self._entries = {}
+        self._keys = {}
+
+
+    def check(self, obj_id, value):
+        """
+        Groups are not unique, so any value is accepted.
+        """
+
+
+    def add(self, obj):
+        """
+        Insert an object in its group at its sort position.
+        """
+        key = getattr(obj, self.attr_name)
+        sort_value = getattr(obj, self.sort_attr)
+        insort(self._entries.setdefault(key, []), (sort_value, obj.id, obj))
+        self._keys[obj.id] = (key, sort_value)
+
+
+    def remove(self, obj):
+        """
+        Remove an object from its group.
+        """
+        key, sort_value = self._keys.pop(obj.id, (None, None))
+        group = self._entries.get(key)
+        if group is None:
+            return
+        position = bisect_left(group, (sort_value, obj.id))
+        if position < len(group) and group[position][1] == obj.id:
+            del group[position]
+        if not group:
+            del self._entries[key]
+
+
+    def update(self, obj):
+        """
+        Move an object if its group or sort value changed.
+        """
+        if self._keys.get(obj.id) != (getattr(obj, self.attr_name), getattr(obj, self.sort_attr)):
+            self.remove(obj)
+            self.add(obj)
+
+
+    def replace(self, old_obj, new_obj):
+        """
+        Swap a stored object for its new version (copy-on-write updates).
+        """
+        key, sort_value = self._keys.get(old_obj.id, (None, None))
+        group = self._entries.get(key)
+        if (group is not None
+                and (key, sort_value) == (getattr(new_obj, self.attr_name), getattr(new_obj, self.sort_attr))):
+            position = bisect_left(group, (sort_value, old_obj.id))
+            group[position] = (sort_value, new_obj.id, new_obj)
+        else:
+            self.remove(old_obj)
+            self.add(new_obj)
+
+
+    def get(self, value):
+        """
+        Return the objects of a group, in order.
+        """
+        return [entry[2] for entry in self._entries.get(value, ())]
+
+
+    def count(self, value):
+        """
+        Return the number of objects in a group.
+        """
+        return len(self._entries.get(value, ()))
+
+
+    def page(self, value, offset=0, limit=None):
+        """
+        Return a slice of a group, in order.
+
+        Args:
+            value: The group to read.
+            offset (int, optional): The number of objects to skip.
+            limit (int, optional): The maximum number of objects to return.
+        """
+        group = self._entries.get(value, ())
+        end = None if limit is None else offset + limit
+        return [entry[2] for entry in group[offset:end]]
+
+
+class BitmapIndex:
+    """
+    Secondary bitmap index over a multi-valued attribute (e.g. place amenities).
+
+    Every indexed object gets a dense row number (rows freed by deletes are
+    reused), and every value maps to a Python int used as a bitset over those
+    rows. Objects holding all of several values are found by AND-ing their
+    bitsets, without touching the objects that do not match.
+
+    Items of the attribute are indexed by their `id` when they have one, so
+    a list of Amenity objects and a list of amenity IDs index the same way.
+
+    Attributes:
+        attr_name (str): The indexed attribute (an iterable of values).
+        unique (bool): Always False.
+        _bitsets (dict): Values mapped to the bitset of the rows holding them.
+        _rows (dict): Object IDs mapped to their row.
+        _objects (list): Objects by row (None for a free row).
+        _free (list): Free rows, reused before new ones are allocated.
+        _keys (dict): Object IDs mapped to the frozenset of values they are indexed under.
+    """
+
+
+    unique = False
+
+
+    def __init__(self, attr_name):
+        """
+        Initialize an empty index.
+
+        Args:
+            attr_name (str): The multi-valued attribute to index.
+        """
+        self.attr_name = attr_name
+        self._bitsets = {}
+        self._rows = {}
+        self._objects = []
+        self._free = []
+        self._keys = {}
+
+
+    def _values(self, obj):
+        return frozenset(getattr(item, 'id', item) for item in getattr(obj, self.attr_name) or ())
+
+
+    def check(self, obj_id, value):
+        """
+        Values are not unique, so any value is accepted.
+        """
+
+
+    def add(self, obj):
+        """
+        Give an object a row and set its bit for each of its values.
+        """
+        if obj.id in self._rows:
+            self.update(obj)
+            return
+        if self._free:
+            row = self._free.pop()
+            self._objects[row] = obj
+        else:
+            row = len(self._objects)
+            self._objects.append(obj)
+        self._rows[obj.id] = row
+        self._keys[obj.id] = frozenset()
+        self._set_values(obj.id, row, self._values(obj))
+
+
+    def _set_values(self, obj_id, row, values):
+        """
+        Move a row from the values it is indexed under to `values`.
+        """
+        bit = 1 << row
+        old_values = self._keys[obj_id]
+        for value in values - old_values:
+            self._bitsets[value] = self._bitsets.get(value, 0) | bit
+        for value in old_values - values:
+            bits = self._bitsets.get(value, 0) & ~bit
+            if bits:
+                self._bitsets[value] = bits
+            else:
+                self._bitsets.pop(value, None)
+        self._keys[obj_id] = values
+
+
+    def remove(self, obj):
+        """
+        Clear the bits of an object and free its row.
+        """
+        row = self._rows.get(obj.id)
+        if row is None:
+            return
+        self._set_values(obj.id, row, frozenset())
+        del self._rows[obj.id]
+        del self._keys[obj.id]
+        self._objects[row] = None
+        self._free.append(row)
+
+
+    def update(self, obj):
+        """
+        Refresh the bits of an object after its values changed.
+        """
+        row = self._rows.get(obj.id)
+        if row is not None:
+            self._set_values(obj.id, row, self._values(obj))
+
+
+    def replace(self, old_obj, new_obj):
+        """
+        Swap a stored object for its new version (copy-on-write updates).
+        """
+        row = self._rows.get(old_obj.id)
+        if row is None:
+            self.add(new_obj)
+            return
+        self._objects[row] = new_obj
+        self._set_values(new_obj.id, row, self._values(new_obj))
+
+
+    def get(self, value):
+        """
+        Return the objects indexed under a value.
+        """
+        return self._objects_of(self._bitsets.get(value, 0))
+
+
+    def get_all_of(self, values):
+        """
+        Return the objects indexed under every one of the given values.
+
+        Args:
+            values (iterable): The values the objects must all hold.
+        """
+        bits = -1
+        for value in values:
+            bits &= self._bitsets.get(value, 0)
+            if not bits:
+                return []
+        return [] if bits == -1 else self._objects_of(bits)
+
+
+    def _objects_of(self, bits):
+        """
+        Return the objects of the rows set in a bitset, in row order.
+        """
+        objects = self._objects
+        matches = []
+        # bin() scans the whole bitset in C; only the set bits are visited in Python
+        digits = bin(bits)[:1:-1]
+        row = digits.find('1')
+        while row != -1:
+            obj = objects[row]
+            if obj is not None:
+                matches.append(obj)
+            row = digits.find('1', row + 1)
+        return matches
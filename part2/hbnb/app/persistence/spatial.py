@@ -0,0 +1,285 @@
+import heapq
+import threading
+
+import numpy as np
+
+from app.persistence.columns import haversine_km
+
+
+def unit_vectors(latitudes, longitudes):
+    """
+    Return the points of the unit sphere at the given coordinates, as an (n, 3) array.
+
+    The straight-line (chord) distance between two such points grows with
+    their great-circle distance, so nearest neighbours on the sphere are
+    nearest neighbours in 3D, without the distortions of raw lat/lon.
+    """
+    lat = np.radians(latitudes)
+    lon = np.radians(longitudes)
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+class KDTree:
+    """
+    Static KD-tree over 3D points, for k-nearest-neighbour queries.
+
+    Points are reordered so every node covers a contiguous slice; leaves
+    hold up to `leaf_size` points and are scanned with NumPy. A query visits
+    nodes closest-box-first and stops once no box can hold a closer point.
+
+    Attributes:
+        points (numpy.ndarray): The points, in tree order.
+        order (numpy.ndarray): The original index of each point, in tree order.
+        _starts, _ends (list): The slice of each node.
+        _children (list): (left, right) node numbers, or None for a leaf.
+        _lows, _highs (numpy.ndarray): The bounding box of each node.
+    """
+
+
+    def __init__(self, points, leaf_size=64):
+        """
+        Build the tree.
+
+        Args:
+            points (numpy.ndarray): An (n, 3) array of points.
+            leaf_size (int, optional): The maximum number of points per leaf.
+        """
+        self.points = np.array(points, dtype=float)
+        self.order = np.arange(len(self.points))
+        self._starts = []
+        self._ends = []
+        self._children = []
+        lows = []
+        highs = []
+
+        stack = [(0, len(self.points))] if len(self.points) else []
+        parents = [None]
+        while stack:
+            start, end = stack.pop()
+            parent = parents.pop()
+            node = len(self._starts)
+            if parent is not None:
+                parent_node, side = parent
+                children = self._children[parent_node]
+                self._children[parent_node] = (node, children[1]) if side == 0 else (children[0], node)
+
+            chunk = self.points[start:end]
+            low = chunk.min(axis=0)
+            high = chunk.max(axis=0)
+            self._starts.append(start)
+            self._ends.append(end)
+            lows.append(low)
+            highs.append(high)
+
+            if end - start <= leaf_size:
+                self._children.append(None)
+                continue
+
+            self._children.append((None, None))
+            dim = int(np.argmax(high - low))
+            middle = (end - start) // 2
+            partition = np.argpartition(chunk[:, dim], middle)
+            self.points[start:end] = chunk[partition]
+            self.order[start:end] = self.order[start:end][partition]
+            stack.append((start + middle, end))
+            parents.append((node, 1))
+            stack.append((start, start + middle))
+            parents.append((node, 0))
+
+        self._lows = np.array(lows).reshape(-1, 3)
+        self._highs = np.array(highs).reshape(-1, 3)
+
+
+    def __len__(self):
+        return len(self.points)
+
+
+    def _box_distance(self, node, point):
+        gap = np.maximum(np.maximum(self._lows[node] - point, point - self._highs[node]), 0)
+        return float(gap @ gap)
+
+
+    def query(self, point, k, excluded=None):
+        """
+        Return the k points nearest to `point`.
+
+        Args:
+            point (numpy.ndarray): The query point.
+            k (int): The number of neighbours.
+            excluded (numpy.ndarray, optional): A boolean mask, over the
+                original indexes, of points to ignore.
+
+        Returns:
+            tuple: (original indexes, squared distances), not sorted.
+        """
+        best_rows = np.empty(0, dtype=np.intp)
+        best_distances = np.empty(0)
+        if not len(self.points) or k <= 0:
+            return best_rows, best_distances
+
+        worst = np.inf
+        heap = [(self._box_distance(0, point), 0)]
+        while heap:
+            box_distance, node = heapq.heappop(heap)
+            if box_distance > worst:
+                break
+            children = self._children[node]
+            if children is not None:
+                for child in children:
+                    heapq.heappush(heap, (self._box_distance(child, point), child))
+                continue
+
+            start, end = self._starts[node], self._ends[node]
+            difference = self.points[start:end] - point
+            distances = np.einsum('ij,ij->i', difference, difference)
+            rows = self.order[start:end]
+            if excluded is not None:
+                keep = ~excluded[rows]
+                rows = rows[keep]
+                distances = distances[keep]
+            best_rows = np.concatenate((best_rows, rows))
+            best_distances = np.concatenate((best_distances, distances))
+            if len(best_distances) > k:
+                nearest = np.argpartition(best_distances, k - 1)[:k]
+                best_rows = best_rows[nearest]
+                best_distances = best_distances[nearest]
+            if len(best_distances) == k:
+                worst = best_distances.max()
+
+        return best_rows, best_distances
+
+
+class SpatialIndex:
+    """
+    k-nearest-neighbour index over the coordinates of a ColumnStore.
+
+    A KDTree is built in a background thread from a snapshot of the
+    latitude/longitude columns, as points on the unit sphere. Objects
+    written since the snapshot (the store's change log) are ignored in the
+    tree and searched by brute force at their current position, so answers
+    stay exact while the tree ages. Once too many objects changed, a new
+    tree is built in the background. Until the first tree is ready, queries
+    scan the columns with a vectorized brute force.
+
+    Attributes:
+        columns (ColumnStore): The store holding the coordinates; must track changes.
+        lat, lon (str): The coordinate attributes.
+        leaf_size (int): The maximum number of points per KD-tree leaf.
+        rebuild_ratio (float): The share of changed objects that triggers a rebuild.
+        _state (tuple): (version, tree, ids, rows by id) of the current tree, or None.
+        _rebuilding (threading.Lock): Held while a rebuild runs.
+    """
+
+
+    min_rebuild_changes = 1000
+
+
+    def __init__(self, columns, lat='latitude', lon='longitude', leaf_size=64, rebuild_ratio=0.001):
+        """
+        Initialize the index; the first tree is built on the first query.
+
+        Args:
+            columns (ColumnStore): The store holding the coordinates.
+            lat (str, optional): The latitude attribute.
+            lon (str, optional): The longitude attribute.
+            leaf_size (int, optional): The maximum number of points per KD-tree leaf.
+            rebuild_ratio (float, optional): The share of changed objects that
+                triggers a background rebuild.
+        """
+        self.columns = columns
+        self.lat = lat
+        self.lon = lon
+        self.leaf_size = leaf_size
+        self.rebuild_ratio = rebuild_ratio
+        self._state = None
+        self._rebuilding = threading.Lock()
+
+
+    def rebuild(self):
+        """
+        Build a new tree from the current columns and swap it in.
+        """
+        version, ids, (latitudes, longitudes) = self.columns.snapshot((self.lat, self.lon))
+        valid = ~(np.isnan(latitudes) | np.isnan(longitudes))
+        ids = ids[valid]
+        tree = KDTree(unit_vectors(latitudes[valid], longitudes[valid]), self.leaf_size)
+        rows = {obj_id: row for row, obj_id in enumerate(ids.tolist())}
+        self._state = (version, tree, ids, rows)
+        self.columns.forget_changes(version)
+
+
+    def rebuild_in_background(self):
+        """
+        Start a rebuild in a daemon thread, unless one is already running.
+        """
+        if not self._rebuilding.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.rebuild()
+            finally:
+                self._rebuilding.release()
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+    def nearest(self, latitude, longitude, k=10):
+        """
+        Return the k objects nearest to a point, nearest first.
+
+        Args:
+            latitude, longitude (float): The point, in degrees.
+            k (int, optional): The number of objects to return.
+
+        Returns:
+            list: (object ID, distance in km) tuples, ordered by exact haversine distance.
+        """
+        state = self._state
+        changed = None if state is None else self.columns.changed_since(state[0])
+
+        if changed is None:
+            self.rebuild_in_background()
+            return self._brute_force(latitude, longitude, k)
+
+        version, tree, ids, rows = state
+        if len(changed) > max(self.min_rebuild_changes, self.rebuild_ratio * len(tree)):
+            self.rebuild_in_background()
+
+        point = unit_vectors(latitude, longitude)[0]
+        excluded = None
+        if changed:
+            excluded = np.zeros(len(tree), dtype=bool)
+            excluded[[rows[obj_id] for obj_id in changed if obj_id in rows]] = True
+        tree_rows, _ = tree.query(point, k, excluded)
+        # Changed objects are searched at their current position (if they still exist)
+        candidates = ids[tree_rows].tolist() + list(changed)
+        return self._closest(candidates, latitude, longitude, k)
+
+
+    def _closest(self, candidates, latitude, longitude, k):
+        """
+        Order candidate IDs by haversine distance and keep the k closest.
+        """
+        ids, (latitudes, longitudes) = self.columns.lookup(candidates, (self.lat, self.lon))
+        valid = ~(np.isnan(latitudes) | np.isnan(longitudes))
+        ids = np.asarray(ids, dtype=object)[valid]
+        distances = haversine_km(latitude, longitude, latitudes[valid], longitudes[valid])
+        order = np.argsort(distances, kind='stable')[:k]
+        return [(ids[i], float(distances[i])) for i in order]
+
+
+    def _brute_force(self, latitude, longitude, k):
+        """
+        Scan every row of the columns for the k nearest objects.
+        """
+        _, ids, (latitudes, longitudes) = self.columns.snapshot((self.lat, self.lon))
+        valid = ~(np.isnan(latitudes) | np.isnan(longitudes))
+        ids = ids[valid]
+        distances = haversine_km(latitude, longitude, latitudes[valid], longitudes[valid])
+        if len(distances) > k:
+            nearest = np.argpartition(distances, k - 1)[:k]
+            ids, distances = ids[nearest], distances[nearest]
+        order = np.argsort(distances, kind='stable')
+        return [(ids[i], float(distances[i])) for i in order]
@@ -0,0 +1,75 @@
+import atexit
+
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+from app.persistence.journal import Journal
+from app.persistence.repository import ConcurrentInMemoryRepository, InMemoryRepository
+from app.services.facade import HBnBFacade
+from app.services.similarity import SimilarPlaces
+
+
+def init_facade(app):
+    """
+    Create the single HBnBFacade shared by every namespace of the application.
+
+    The facade (and the repositories it owns) is stored in `app.extensions`
+    so that caches, indexes and pools are built once per application instead
+    of once per API module. With `CONCURRENT_REPOSITORIES` set, the
+    repositories are safe to share between the threads of a threaded server.
+    With `PERSISTENCE_DIR` set, they are restored from and journaled to disk.
+
+    Args:
+        app (Flask): The application to register the facade on.
+
+    Returns:
+        HBnBFacade: The registered facade.
+    """
+
+    if app.config.get('CONCURRENT_REPOSITORIES'):
+        repository_class = ConcurrentInMemoryRepository
+    else:
+        repository_class = InMemoryRepository
+
+    facade = HBnBFacade(
+        repository_class,
+        rating_prior=(app.config.get('TOP_PLACES_PRIOR_MEAN', 3.0), app.config.get('TOP_PLACES_PRIOR_WEIGHT', 5)),
+        trending_half_life=app.config.get('TRENDING_HALF_LIFE', 86400),
+        trending_view_weight=app.config.get('TRENDING_VIEW_WEIGHT', 0.1),
+        similar_places=SimilarPlaces(
+            workers=app.config.get('SIMILAR_PLACES_WORKERS'),
+            max_age=app.config.get('SIMILAR_PLACES_MAX_AGE', 3600),
+            max_changes=app.config.get('SIMILAR_PLACES_MAX_CHANGES', 1000)
+        )
+    )
+
+    if app.config.get('PERSISTENCE_DIR'):
+        journal = Journal(
+            app.config['PERSISTENCE_DIR'],
+            commit_interval=app.config.get('JOURNAL_COMMIT_INTERVAL', 0.01),
+            snapshot_every=app.config.get('JOURNAL_SNAPSHOT_EVERY', 100000),
+            sync=app.config.get('JOURNAL_SYNC', False)
+        )
+        journal.open({
+            'users': facade.user_repo,
+            'places': facade.place_repo,
+            'reviews': facade.review_repo,
+            'amenities': facade.amenity_repo,
+        })
+        atexit.register(journal.close)
+        facade.rebuild_rankings()
+        app.extensions['hbnb_journal'] = journal
+
+    app.extensions['hbnb_facade'] = facade
+    return facade
+
+
+def get_facade():
+    """
+    Return the facade registered on the current application.
+    """
+
+    return current_app.extensions['hbnb_facade']
+
+
+facade = LocalProxy(get_facade)
@@ -1,5 +1,14 @@
 import uuid
-from app.persistence.repository import InMemoryRepository
+from operator import attrgetter
+from app.persistence.repository import InMemoryRepository, HashIndex, SortedIndex, BitmapIndex
+from app.persistence.columns import ColumnStore
+from app.persistence.spatial import SpatialIndex
+from app.persistence.clusters import GridClusters, cluster_points
+from app.persistence.query import (parse_filter, parse_sort, conjuncts, fields_of, combine,
+                                   compile_mask, compile_predicate, sort_objects)
+from app.services.leaderboard import RatingLeaderboard
+from app.services.trending import TrendingPlaces
+from app.services.similarity import SimilarPlaces
 from app.models.user import User
 from app.models.amenity import Amenity
 from app.models.place import Place
@@ -7,11 +16,29 @@ from app.models.review import Review
 
 
 class HBnBFacade:
-    def __init__(self):
-        self.user_repo = InMemoryRepository()
-        self.place_repo = InMemoryRepository()
-        self.review_repo = InMemoryRepository()
-        self.amenity_repo = InMemoryRepository()
+    def __init__(self, repository_class=InMemoryRepository, rating_prior=(3.0, 5),
+                 trending_half_life=86400, trending_view_weight=0.1, similar_places=None):
+        self.user_repo = repository_class(indexes=[HashIndex('email', unique=True)])
+        self.place_clusters = GridClusters()
+        self.similar_places = similar_places or SimilarPlaces()
+        self.place_repo = repository_class(indexes=[BitmapIndex('amenities')],
+                                           columns=ColumnStore(('latitude', 'longitude', 'price'), track_changes=True),
+                                           aggregates=[self.place_clusters, self.similar_places])
+        self.nearby_places = SpatialIndex(self.place_repo.columns)
+        self.review_repo = repository_class(indexes=[SortedIndex('place_id', 'created_at'), HashIndex('user_id')])
+        self.amenity_repo = repository_class(indexes=[HashIndex('name')])
+        self.top_places = RatingLeaderboard(*rating_prior)
+        self.trending_places = TrendingPlaces(trending_half_life)
+        self.trending_view_weight = trending_view_weight
+        self.place_fields = {
+            'title': (str, attrgetter('title')),
+            'owner_id': (str, attrgetter('owner_id')),
+            'price': (float, attrgetter('price')),
+            'latitude': (float, attrgetter('latitude')),
+            'longitude': (float, attrgetter('longitude')),
+            'rating': (float, lambda place: (self.top_places.stats(place.id) or (0, None))[1]),
+            'reviews': (float, lambda place: (self.top_places.stats(place.id) or (0, None))[0]),
+        }
 
 
 #---------------------------User---------------------------#
@@ -38,10 +65,7 @@ class HBnBFacade:
 
     def update_user(self, user_id, user_data):
         User.validate_request_data(user_data)
-        obj = self.get_user(user_id)
-        if obj:
-            obj.update(user_data)
-        return obj
+        return self.user_repo.update(user_id, user_data)
 
 
     def delete_user(self, user_id):
@@ -55,6 +79,7 @@ class HBnBFacade:
 
 
     def create_place(self, place_data):
+        Place.validate_request_data(place_data)
         place = Place(**place_data)
         self.place_repo.add(place)
         return place
@@ -68,32 +93,139 @@ class HBnBFacade:
         return self.place_repo.get_all()
 
 
-    def update_place(self, place_id, place_data):
+    def search_places(self, min_price=None, max_price=None, bbox=None, center=None, radius_km=None,
+                      amenities=None):
+        view = self.place_repo.columns.view()
+        mask = view.between('price', min_price, max_price)
+        if bbox is not None:
+            mask &= view.within_bbox(*bbox)
+        if center is not None and radius_km is not None:
+            mask &= view.within_radius(center[0], center[1], radius_km)
+        if amenities is None:
+            return self.place_repo.filter_columns(mask)
+
+        amenity_ids = self.resolve_amenity_ids(amenities)
+        if amenity_ids is None:
+            return []
+        places = self.place_repo.get_all_having('amenities', amenity_ids)
+        if mask.all():
+            return places
+        matching_ids = set(self.place_repo.columns.ids(mask))
+        return [place for place in places if place.id in matching_ids]
+
+
+    def query_places(self, filter_text=None, sort_text=None, places=None):
+        types = {name: kind for name, (kind, _) in self.place_fields.items()}
+        getters = {name: get for name, (_, get) in self.place_fields.items()}
+        node = parse_filter(filter_text, types) if filter_text else None
+        keys = parse_sort(sort_text, types) if sort_text else []
+
+        if places is None and node is not None:
+            # Conditions on stored columns are evaluated in one vectorized pass,
+            # the rest on the places it selects
+            columns = self.place_repo.columns
+            vectorized, residual = [], []
+            for condition in conjuncts(node):
+                if fields_of(condition) <= set(columns.attr_names):
+                    vectorized.append(condition)
+                else:
+                    residual.append(condition)
+            if vectorized:
+                places = self.place_repo.filter_columns(compile_mask(combine('and', vectorized), columns.view()))
+            node = combine('and', residual) if residual else None
+        if places is None:
+            places = self.place_repo.get_all()
+        if node is not None:
+            places = filter(compile_predicate(node, getters), places)
+        return sort_objects(places, keys, getters) if keys else list(places)
+
+
+    def get_nearest_places(self, latitude, longitude, k=10):
+        nearest = []
+        for place_id, distance in self.nearby_places.nearest(latitude, longitude, k):
+            place = self.place_repo.get(place_id)
+            if place:
+                nearest.append((place, distance))
+        return nearest
+
+
+    def get_similar_places(self, place_id, limit=10):
         place = self.place_repo.get(place_id)
-        if place:
-            if 'title' in place_data:
-                place.title = place_data['title']
-            if 'description' in place_data:
-                place.description = place_data['description']
-            if 'price' in place_data:
-                place.price = place_data['price']
-            if 'latitude' in place_data:
-                place.latitude = place_data['latitude']
-            if 'longitude' in place_data:
-                place.longitude = place_data['longitude']
-            if 'owner_id' in place_data:
-                place.owner_id = place_data['owner_id']
-            self.place_repo.update(place, place_data)
-        return place
+        if place is None:
+            return None
+        self.similar_places.refresh(self.place_repo.get_all, self.place_repo.columns.version,
+                                    len(self.place_repo.columns))
+        similar = []
+        for similar_id, score in self.similar_places.similar(place, limit):
+            similar_place = self.place_repo.get(similar_id)
+            if similar_place:
+                similar.append((similar_place, score))
+        return similar
+
+
+    def get_place_clusters(self, bbox, zoom):
+        level = zoom + 2
+        if level <= self.place_clusters.max_level:
+            return [
+                {'count': count, 'latitude': latitude, 'longitude': longitude, 'min_price': min_price}
+                for count, latitude, longitude, min_price in self.place_clusters.clusters(*bbox, level)
+            ]
+        view = self.place_repo.columns.view()
+        mask = view.within_bbox(*bbox)
+        return [
+            {'count': count, 'latitude': latitude, 'longitude': longitude, 'min_price': min_price}
+            for count, latitude, longitude, min_price in cluster_points(
+                view.column('latitude')[mask], view.column('longitude')[mask],
+                view.column('price')[mask], level)
+        ]
+
+
+    def update_place(self, place_id, place_data):
+        Place.validate_request_data(place_data)
+        fields = ('title', 'description', 'price', 'latitude', 'longitude', 'owner_id', 'amenities')
+        return self.place_repo.update(place_id, {key: place_data[key] for key in fields if key in place_data})
 
 
     def delete_place(self, place_id):
         place = self.place_repo.get(place_id)
         if place:
             self.place_repo.delete(place_id)
+            self.top_places.remove_place(place_id)
+            self.trending_places.remove_place(place_id)
             return {"message": "Place deleted successfully"}
 
 
+    def get_top_places(self, limit=10, min_reviews=0):
+        top = []
+        for place_id, score, review_count, average in self.top_places.top(limit, min_reviews):
+            place = self.place_repo.get(place_id)
+            if place:
+                top.append((place, score, review_count, average))
+        return top
+
+
+    def view_place(self, place_id):
+        place = self.place_repo.get(place_id)
+        if place:
+            self.trending_places.record(place_id, self.trending_view_weight)
+        return place
+
+
+    def get_trending_places(self, limit=10):
+        trending = []
+        for place_id, score in self.trending_places.top(limit):
+            place = self.place_repo.get(place_id)
+            if place:
+                trending.append((place, score))
+        return trending
+
+
+    def rebuild_rankings(self):
+        reviews = self.review_repo.get_all()
+        self.top_places.rebuild(reviews)
+        self.trending_places.rebuild((review.place_id, 1.0, review.created_at.timestamp()) for review in reviews)
+
+
 #---------------------------Amenity---------------------------#
 
 
@@ -111,18 +243,27 @@ class HBnBFacade:
         return self.amenity_repo.get_all()
 
 
+    def resolve_amenity_ids(self, amenities):
+        amenity_ids = []
+        for key in amenities:
+            amenity = self.amenity_repo.get(key) or self.amenity_repo.get_by_attribute('name', key)
+            if amenity is None:
+                return None
+            amenity_ids.append(amenity.id)
+        return amenity_ids
+
+
     def update_amenity(self, amenity_id, amenity_data):
-        amenity = self.get_amenity(amenity_id)
-        if amenity:
-            if 'name' in amenity_data:
-                amenity.name = amenity_data['name']
-            self.amenity_repo.update(amenity, amenity_data)
-        return amenity
+        fields = ('name',)
+        return self.amenity_repo.update(amenity_id, {key: amenity_data[key] for key in fields if key in amenity_data})
 
 
     def delete_amenity(self, amenity_id):
         amenity = self.amenity_repo.get(amenity_id)
         if amenity:
+            for place in self.place_repo.get_all_having('amenities', [amenity_id]):
+                self.place_repo.update(place.id, {'amenities': [
+                    key for key in place.amenities if getattr(key, 'id', key) != amenity_id]})
             self.amenity_repo.delete(amenity_id)
             return {"message": "Amenity deleted successfully"}
 
@@ -133,6 +274,8 @@ class HBnBFacade:
     def create_review(self, review_data):
         review = Review(**review_data)
         self.review_repo.add(review)
+        self.top_places.add(review.place_id, review.rating)
+        self.trending_places.record(review.place_id, 1.0, review.created_at.timestamp())
         return review
 
 
@@ -144,20 +287,19 @@ class HBnBFacade:
         return self.review_repo.get_all()
 
 
-    def get_reviews_by_place(self, place_id):
-        return self.review_repo.get(place_id)
+    def get_reviews_by_place(self, place_id, offset=0, limit=None):
+        return self.review_repo.get_page_by_attribute('place_id', place_id, offset, limit)
 
 
     def update_review(self, review_id, review_data):
+        fields = ('text', 'rating', 'user_id')
         review = self.review_repo.get(review_id)
-        if review:
-            if 'text' in review_data:
-                review.text = review_data['text']
-            if 'rating' in review_data:
-                review.rating = review_data['rating']
-            if 'user_id' in review_data:
-                review.user_id = review_data['user_id']
-            self.review_repo.update(review, review_data)
+        if not review:
+            return None
+        old_rating = review.rating
+        review = self.review_repo.update(review_id, {key: review_data[key] for key in fields if key in review_data})
+        if review and review.rating != old_rating:
+            self.top_places.change(review.place_id, old_rating, review.rating)
         return review
 
 
@@ -165,4 +307,5 @@ class HBnBFacade:
         review = self.review_repo.get(review_id)
         if review:
             self.review_repo.delete(review_id)
+            self.top_places.remove(review.place_id, review.rating)
             return {'message': 'Review deleted successfully'}
\ No newline at end of file
@@ -0,0 +1,158 @@
+import threading
+from bisect import bisect_left, insort
+
+
+class RatingLeaderboard:
+    """
+    Places ranked by the Bayesian average of their review ratings.
+
+    The score of a place with `count` ratings summing to `total` is
+    (prior_weight * prior_mean + total) / (prior_weight + count): a place
+    with few reviews stays close to the prior mean, so one 5-star review
+    does not outrank hundreds of 4.8s. The prior is fixed rather than the
+    live global mean, so a new review only moves the score of its own place.
+
+    Per-place counts and totals are updated on each review change and the
+    ranking is a list kept sorted with bisect, so reading the top N never
+    scans the reviews.
+
+    Attributes:
+        prior_mean (float): The rating assumed for a place without reviews.
+        prior_weight (float): How many reviews the prior is worth.
+        _stats (dict): Place IDs mapped to [review count, rating total].
+        _ranking (list): Sorted (-score, -count, place_id) entries.
+        _keys (dict): Place IDs mapped to their entry in `_ranking`.
+        _lock (threading.Lock): Serializes updates.
+    """
+
+
+    def __init__(self, prior_mean=3.0, prior_weight=5):
+        """
+        Initialize an empty leaderboard.
+
+        Args:
+            prior_mean (float, optional): The rating assumed for a place without reviews.
+            prior_weight (float, optional): How many reviews the prior is worth.
+        """
+        self.prior_mean = prior_mean
+        self.prior_weight = prior_weight
+        self._stats = {}
+        self._ranking = []
+        self._keys = {}
+        self._lock = threading.Lock()
+
+
+    def score(self, count, total):
+        """
+        Return the Bayesian average of `count` ratings summing to `total`.
+        """
+        return (self.prior_weight * self.prior_mean + total) / (self.prior_weight + count)
+
+
+    def _apply(self, place_id, count_delta, total_delta):
+        """
+        Change the stats of a place and move it in the ranking.
+        """
+        stats = self._stats.setdefault(place_id, [0, 0])
+        stats[0] += count_delta
+        stats[1] += total_delta
+
+        old_key = self._keys.pop(place_id, None)
+        if old_key is not None:
+            del self._ranking[bisect_left(self._ranking, old_key)]
+
+        if stats[0] <= 0:
+            del self._stats[place_id]
+            return
+
+        key = (-self.score(*stats), -stats[0], place_id)
+        insort(self._ranking, key)
+        self._keys[place_id] = key
+
+
+    def add(self, place_id, rating):
+        """
+        Account for a new review of a place.
+        """
+        with self._lock:
+            self._apply(place_id, 1, rating)
+
+
+    def remove(self, place_id, rating):
+        """
+        Account for a deleted review of a place.
+        """
+        with self._lock:
+            self._apply(place_id, -1, -rating)
+
+
+    def change(self, place_id, old_rating, new_rating):
+        """
+        Account for a review whose rating changed.
+        """
+        with self._lock:
+            self._apply(place_id, 0, new_rating - old_rating)
+
+
+    def remove_place(self, place_id):
+        """
+        Drop a place from the leaderboard.
+        """
+        with self._lock:
+            stats = self._stats.get(place_id)
+            if stats is not None:
+                self._apply(place_id, -stats[0], -stats[1])
+
+
+    def rebuild(self, reviews):
+        """
+        Recompute the leaderboard from scratch (e.g. after restoring reviews from disk).
+
+        Args:
+            reviews (iterable): Objects with `place_id` and `rating` attributes.
+        """
+        stats = {}
+        for review in reviews:
+            place_stats = stats.setdefault(review.place_id, [0, 0])
+            place_stats[0] += 1
+            place_stats[1] += review.rating
+
+        keys = {place_id: (-self.score(*place_stats), -place_stats[0], place_id)
+                for place_id, place_stats in stats.items()}
+        with self._lock:
+            self._stats = stats
+            self._keys = keys
+            self._ranking = sorted(keys.values())
+
+
+    def stats(self, place_id):
+        """
+        Return the (review count, average rating) of a place, or None without reviews.
+        """
+        stats = self._stats.get(place_id)
+        if stats is None:
+            return None
+        count, total = stats
+        return count, total / count
+
+
+    def top(self, limit=10, min_reviews=0):
+        """
+        Return the best ranked places.
+
+        Args:
+            limit (int, optional): The maximum number of places to return.
+            min_reviews (int, optional): Skip places with fewer reviews.
+
+        Returns:
+            list: (place_id, score, review count, average rating) tuples, best first.
+        """
+        results = []
+        with self._lock:
+            for negative_score, negative_count, place_id in self._ranking:
+                if len(results) >= limit:
+                    break
+                if -negative_count >= min_reviews:
+                    count, total = self._stats[place_id]
+                    results.append((place_id, -negative_score, count, total / count))
+        return results
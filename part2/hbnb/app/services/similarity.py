@@ -0,0 +1,463 @@
+import math
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.persistence.columns import EARTH_RADIUS_KM
+from app.persistence.spatial import unit_vectors
+
+
+HILBERT_BITS = 16
+
+
+def hilbert_order(latitudes, longitudes, bits=HILBERT_BITS):
+    """
+    Return the indexes that sort points along a Hilbert curve over lat/lon.
+
+    Points close on the curve are close on the map (the converse mostly
+    holds too), so a window of the sorted points is a cheap set of nearby
+    candidates.
+    """
+    side = 1 << bits
+    x = np.clip(((np.nan_to_num(longitudes) + 180.0) / 360.0 * side).astype(np.int64), 0, side - 1)
+    y = np.clip(((np.nan_to_num(latitudes) + 90.0) / 180.0 * side).astype(np.int64), 0, side - 1)
+    d = np.zeros(len(x), dtype=np.int64)
+    s = side >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the curve stays continuous
+        flip = ~ry & rx
+        x = np.where(flip, side - 1 - x, x)
+        y = np.where(flip, side - 1 - y, y)
+        swap = ~ry
+        x, y = np.where(swap, y, x), np.where(swap, x, y)
+        s >>= 1
+    return np.argsort(d, kind='stable')
+
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(words):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int32)
+else:
+    _BYTE_COUNTS = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.int32)
+
+    def popcount(words):
+        return _BYTE_COUNTS[words.view(np.uint8)].reshape(words.shape[:-1] + (-1,)).sum(axis=-1)
+
+
+class PlaceFeatures:
+    """
+    The feature matrix of places, one row per place.
+
+    Attributes:
+        ids (numpy.ndarray): Place IDs, by row.
+        latitudes, longitudes (numpy.ndarray): Coordinates in degrees (NaN if unknown).
+        vectors (numpy.ndarray): (n, 3) positions on the unit sphere.
+        log_prices (numpy.ndarray): Log of the prices (NaN if unknown).
+        bits (numpy.ndarray): (n, words) amenity bitsets, one bit per amenity.
+        counts (numpy.ndarray): The number of amenities of each place.
+        amenity_bits (dict): Amenity IDs mapped to their bit.
+    """
+
+
+    def __init__(self, places, amenity_bits=None):
+        """
+        Extract the features of places.
+
+        Args:
+            places (list): Objects with id, latitude, longitude, price and amenities.
+            amenity_bits (dict, optional): An existing amenity to bit mapping;
+                amenities missing from it are ignored. Built from `places` if None.
+        """
+        if amenity_bits is None:
+            amenity_bits = {}
+            for place in places:
+                for amenity_id in place.amenities:
+                    amenity_bits.setdefault(amenity_id, len(amenity_bits))
+        self.amenity_bits = amenity_bits
+        words = max(1, math.ceil(len(amenity_bits) / 64))
+
+        count = len(places)
+        self.ids = np.array([place.id for place in places], dtype=object)
+        latitudes = np.fromiter((np.nan if place.latitude is None else place.latitude for place in places),
+                                dtype=float, count=count)
+        longitudes = np.fromiter((np.nan if place.longitude is None else place.longitude for place in places),
+                                 dtype=float, count=count)
+        prices = np.fromiter((np.nan if not place.price or place.price <= 0 else place.price for place in places),
+                             dtype=float, count=count)
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.vectors = unit_vectors(latitudes, longitudes)
+        self.log_prices = np.log(prices)
+
+        bits = np.zeros((count, words * 64), dtype=bool)
+        for row, place in enumerate(places):
+            for amenity_id in place.amenities:
+                bit = amenity_bits.get(amenity_id)
+                if bit is not None:
+                    bits[row, bit] = True
+        self.bits = np.packbits(bits, axis=1, bitorder='little').view(np.uint64)
+        self.counts = bits.sum(axis=1, dtype=np.int32)
+
+
+    def __len__(self):
+        return len(self.ids)
+
+
+    def arrays(self):
+        """
+        Return the numeric arrays, to ship to worker processes.
+        """
+        return self.vectors, self.log_prices, self.bits, self.counts
+
+
+def similarity(query, candidates, weights, distance_scale_km, price_span):
+    """
+    Score every (query, candidate) pair in one vectorized pass.
+
+    The score is a weighted sum of the Jaccard index of the amenity sets
+    and a price closeness (1 for equal prices, 0 from a `price_span` ratio
+    on), multiplied by exp(-distance / distance_scale_km): places far away
+    are never similar, however alike, which keeps the best candidates of a
+    place among its neighbours on the map.
+
+    Args:
+        query, candidates (tuple): (vectors, log_prices, bits, counts) arrays.
+        weights (tuple): The weights of the amenity and price terms.
+        distance_scale_km (float): The distance at which scores are divided by e.
+        price_span (float): The price ratio at which price closeness reaches 0.
+
+    Returns:
+        numpy.ndarray: A (len(query), len(candidates)) score matrix.
+    """
+    q_vectors, q_prices, q_bits, q_counts = query
+    c_vectors, c_prices, c_bits, c_counts = candidates
+    amenity_weight, price_weight = weights
+
+    shared = popcount(q_bits[:, None, :] & c_bits[None, :, :])
+    union = q_counts[:, None] + c_counts[None, :] - shared
+    scores = amenity_weight * np.divide(shared, union, out=np.zeros(shared.shape), where=union > 0)
+
+    price_gap = np.abs(q_prices[:, None] - c_prices[None, :])
+    scores += price_weight * np.nan_to_num(np.clip(1 - price_gap / math.log(price_span), 0, 1))
+
+    chord = np.sqrt(np.clip(2 - 2 * (q_vectors @ c_vectors.T), 0, 4))
+    distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / 2, 1))
+    scores *= np.nan_to_num(np.exp(-distances / distance_scale_km))
+    return scores
+
+
+def top_neighbours(arrays, order, start, end, k, window, weights, distance_scale_km, price_span):
+    """
+    Compute the k most similar places of a block of the Hilbert order.
+
+    Each place of order[start:end] is compared to the places up to `window`
+    positions before and after the block, i.e. to places nearby.
+
+    Returns:
+        tuple: (rows, neighbour rows, scores); neighbour rows are -1 (and
+        scores -inf) where fewer than k candidates exist.
+    """
+    rows = order[start:end]
+    candidates = order[max(0, start - window):min(len(order), end + window)]
+    scores = similarity(tuple(array[rows] for array in arrays), tuple(array[candidates] for array in arrays),
+                        weights, distance_scale_km, price_span)
+    scores[rows[:, None] == candidates[None, :]] = -np.inf
+
+    kept = min(k, len(candidates))
+    best = np.argpartition(-scores, kept - 1, axis=1)[:, :kept]
+    best_scores = np.take_along_axis(scores, best, axis=1)
+    ranking = np.argsort(-best_scores, axis=1, kind='stable')
+    best = np.take_along_axis(best, ranking, axis=1)
+    best_scores = np.take_along_axis(best_scores, ranking, axis=1)
+
+    neighbours = np.full((len(rows), k), -1, dtype=np.int32)
+    neighbour_scores = np.full((len(rows), k), -np.inf, dtype=np.float32)
+    neighbours[:, :kept] = np.where(np.isfinite(best_scores), candidates[best], -1)
+    neighbour_scores[:, :kept] = best_scores
+    return rows, neighbours, neighbour_scores
+
+
+_worker_arguments = None
+
+
+def _init_worker(*arguments):
+    global _worker_arguments
+    _worker_arguments = arguments
+
+
+def _top_neighbours_in_worker(start, end):
+    arrays, order, k, window, weights, distance_scale_km, price_span = _worker_arguments
+    return top_neighbours(arrays, order, start, end, k, window, weights, distance_scale_km, price_span)
+
+
+class SimilarPlaces:
+    """
+    Precomputed "similar places" of every place.
+
+    A batch build extracts a feature matrix from the places (position,
+    price, amenity bitset), sorts them along a Hilbert curve and scores
+    each place against the `window` places before and after it on the
+    curve, block by block, in worker processes. The k best neighbours of
+    every place are kept in (n, k) arrays, so a request is a dictionary
+    lookup. The build runs in a background thread, off the request path.
+
+    Registered as an aggregate of the place repository (add, remove,
+    update, replace), the cache sees every write: places created since the
+    build, or whose position, price or amenities changed, are scored on the
+    fly against the last matrix once, and the result is kept until the next
+    build. A rebuild starts after `max_changes` such places, or `max_age`
+    seconds after the last one if places changed at all. The precomputed
+    lists of unchanged places may still name a neighbour as it was before
+    its change until then.
+
+    Attributes:
+        k (int): The number of neighbours kept per place.
+        weights (tuple): The weights of the amenity and price terms.
+        distance_scale_km (float): The distance at which scores are divided by e.
+        price_span (float): The price ratio at which price closeness reaches 0.
+        window (int): The number of candidates on each side along the curve.
+        block (int): The number of places scored per task.
+        workers (int): The number of worker processes (1 builds in the calling process).
+        max_age (float): Seconds after which a build is redone if places changed.
+        max_changes (int): The number of changed places that triggers a rebuild.
+        _state (tuple): (built at, version, features, rows by ID, neighbours, scores), or None.
+        _changed (set): IDs of the places changed since the current build started.
+        _cache (dict): IDs of changed places mapped to (state, neighbours scored on the fly).
+        _rebuilding (threading.Lock): Held while a build runs.
+    """
+
+
+    inline_limit = 5000
+
+
+    def __init__(self, k=10, weights=(0.6, 0.4), distance_scale_km=25.0, price_span=4.0,
+                 window=512, block=256, workers=None, max_age=3600, max_changes=1000):
+        """
+        Initialize an empty cache; see the class attributes for the arguments.
+        """
+        self.k = k
+        self.weights = weights
+        self.distance_scale_km = distance_scale_km
+        self.price_span = price_span
+        self.window = window
+        self.block = block
+        self.workers = workers or os.cpu_count() or 1
+        self.max_age = max_age
+        self.max_changes = max_changes
+        self._state = None
+        self._changed = set()
+        self._cache = {}
+        self._rebuilding = threading.Lock()
+
+
+    def build(self, places):
+        """
+        Compute the neighbours of every place.
+
+        Args:
+            places (list): The places to index.
+
+        Returns:
+            tuple: (features, neighbours, scores) with (n, k) neighbour rows and scores.
+        """
+        features = PlaceFeatures(places)
+        arrays = features.arrays()
+        order = hilbert_order(features.latitudes, features.longitudes)
+        arguments = (arrays, order, self.k, self.window, self.weights, self.distance_scale_km, self.price_span)
+        blocks = [(start, min(start + self.block, len(order))) for start in range(0, len(order), self.block)]
+
+        neighbours = np.full((len(order), self.k), -1, dtype=np.int32)
+        scores = np.full((len(order), self.k), -np.inf, dtype=np.float32)
+        if self.workers > 1 and len(blocks) > self.workers:
+            with ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=arguments) as pool:
+                results = pool.map(_top_neighbours_in_worker, *zip(*blocks),
+                                   chunksize=max(1, len(blocks) // (self.workers * 8)))
+                for rows, block_neighbours, block_scores in results:
+                    neighbours[rows] = block_neighbours
+                    scores[rows] = block_scores
+        else:
+            for start, end in blocks:
+                rows, block_neighbours, block_scores = top_neighbours(*arguments[:2], start, end, *arguments[2:])
+                neighbours[rows] = block_neighbours
+                scores[rows] = block_scores
+        return features, neighbours, scores
+
+
+    def rebuild(self, places, version=None):
+        """
+        Build from `places` and swap the result in.
+
+        Args:
+            places (list): The places to index.
+            version (int, optional): The version of the data the places were read at.
+        """
+        features, neighbours, scores = self.build(places)
+        rows = {place_id: row for row, place_id in enumerate(features.ids.tolist())}
+        self._state = (time.monotonic(), version, features, rows, neighbours, scores)
+        self._cache = {}
+
+
+    def _load_and_rebuild(self, load, version):
+        """
+        Rebuild from `load()`, tracking the changes made from now on afresh.
+        """
+        changed, self._changed = self._changed, set()
+        try:
+            self.rebuild(load(), version)
+        except Exception:
+            self._changed |= changed
+            raise
+
+
+    def rebuild_in_background(self, load, version=None):
+        """
+        Start a rebuild in a daemon thread, unless one is already running.
+
+        Args:
+            load (callable): Returns the places to index.
+            version (int, optional): The version of the data `load` reads.
+        """
+        if not self._rebuilding.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self._load_and_rebuild(load, version)
+            finally:
+                self._rebuilding.release()
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+    def refresh(self, load, version, count):
+        """
+        Build if nothing is built yet, or rebuild in the background if stale.
+
+        Small sets of places are built inline on first use; otherwise the
+        first requests find no neighbours until the background build ends.
+
+        Args:
+            load (callable): Returns the places to index.
+            version (int): The current version of the places.
+            count (int): The current number of places.
+        """
+        state = self._state
+        if state is None:
+            if count <= self.inline_limit:
+                with self._rebuilding:
+                    if self._state is None:
+                        self._load_and_rebuild(load, version)
+            else:
+                self.rebuild_in_background(load, version)
+        elif ((state[1] != version or self._changed)
+              and (time.monotonic() - state[0] >= self.max_age or len(self._changed) >= self.max_changes)):
+            self.rebuild_in_background(load, version)
+
+
+    def add(self, obj):
+        """
+        Track a place added to the repository.
+        """
+        self._mark(obj)
+
+
+    def update(self, obj):
+        """
+        Track a place whose attributes changed.
+        """
+        self._mark(obj)
+
+
+    def replace(self, old_obj, new_obj):
+        """
+        Track the new version of a place (copy-on-write updates).
+        """
+        self._mark(new_obj)
+
+
+    def remove(self, obj):
+        """
+        Track a deleted place (it stays a candidate neighbour until the next build).
+        """
+        self._changed.add(obj.id)
+        self._cache.pop(obj.id, None)
+
+
+    def _mark(self, place):
+        """
+        Mark a place to be scored on the fly if its features differ from the build.
+        """
+        state = self._state
+        if state is None and not self._rebuilding.locked():
+            return
+        # While a build runs, the state it will swap in is unknown: mark anyway
+        if state is not None and not self._rebuilding.locked() and not self._features_changed(place, state):
+            return
+        self._changed.add(place.id)
+        self._cache.pop(place.id, None)
+
+
+    @staticmethod
+    def _features_changed(place, state):
+        features, rows = state[2], state[3]
+        row = rows.get(place.id)
+        if row is None:
+            return True
+        current = PlaceFeatures([place], features.amenity_bits)
+        return not (np.array_equal(current.latitudes, features.latitudes[row:row + 1], equal_nan=True)
+                    and np.array_equal(current.longitudes, features.longitudes[row:row + 1], equal_nan=True)
+                    and np.array_equal(current.log_prices, features.log_prices[row:row + 1], equal_nan=True)
+                    and np.array_equal(current.bits, features.bits[row:row + 1]))
+
+
+    def similar(self, place, limit=10):
+        """
+        Return the places most similar to a place.
+
+        Args:
+            place: The place (with id, latitude, longitude, price and amenities).
+            limit (int, optional): The maximum number of places, at most `k`.
+
+        Returns:
+            list: (place ID, score) tuples, most similar first.
+        """
+        state = self._state
+        if state is None:
+            return []
+        _, _, features, rows, neighbours, scores = state
+
+        row = rows.get(place.id)
+        if row is not None and place.id not in self._changed:
+            found = neighbours[row, :limit]
+            return [(features.ids[neighbour], float(score))
+                    for neighbour, score in zip(found.tolist(), scores[row, :limit].tolist()) if neighbour >= 0]
+
+        cached = self._cache.get(place.id)
+        if cached is None or cached[0] is not state:
+            cached = (state, self._score(place, features, row))
+            self._cache[place.id] = cached
+        return cached[1][:limit]
+
+
+    def _score(self, place, features, row):
+        """
+        Return the `k` best neighbours of a place created or changed since the
+        build, scored against every indexed place.
+        """
+        query = PlaceFeatures([place], features.amenity_bits).arrays()
+        place_scores = similarity(query, features.arrays(), self.weights, self.distance_scale_km,
+                                  self.price_span)[0]
+        if row is not None:
+            place_scores[row] = -np.inf
+        limit = min(self.k, int(np.isfinite(place_scores).sum()))
+        if not limit:
+            return []
+        best = np.argpartition(-place_scores, limit - 1)[:limit]
+        best = best[np.argsort(-place_scores[best], kind='stable')]
+        return [(features.ids[neighbour], float(place_scores[neighbour])) for neighbour in best.tolist()]
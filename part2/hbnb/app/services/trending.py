@@ -0,0 +1,153 @@
+import heapq
+import math
+import threading
+import time
+
+
+class TrendingPlaces:
+    """
+    Places ranked by an exponentially decayed activity score.
+
+    Each event (a new review, a view) adds its weight to the score of its
+    place, and scores lose half their value every `half_life` seconds. The
+    score at time t of events (w_i, t_i) is sum(w_i * exp(-rate * (t - t_i)))
+    = exp(-rate * t) * sum(w_i * exp(rate * t_i)). The second factor never
+    changes as time passes, so it is what the ranking is sorted on: an event
+    only moves its own place, and decay is applied lazily, when scores are
+    read. The factor is kept as a logarithm so it does not overflow.
+
+    The ranking is a heap with lazy invalidation: an event pushes the new
+    level of its place in O(log n) and leaves the previous entry behind,
+    recognized as stale because it no longer matches `_levels`. Stale
+    entries are dropped when they reach the root, and the heap is rebuilt
+    from `_levels` once they outnumber the live ones (O(n) every n writes,
+    so O(1) amortized). `top` walks the heap in order from the root and
+    skips stale entries.
+
+    Attributes:
+        half_life (float): Seconds after which a score is halved.
+        rate (float): The decay rate, ln(2) / half_life.
+        _levels (dict): Place IDs mapped to log(sum(w_i * exp(rate * t_i))).
+        _heap (list): Heap of (-level, place_id) entries, stale ones included.
+        _lock (threading.Lock): Serializes updates.
+    """
+
+
+    def __init__(self, half_life=86400):
+        """
+        Initialize an empty ranking.
+
+        Args:
+            half_life (float, optional): Seconds after which a score is halved.
+        """
+        self.half_life = half_life
+        self.rate = math.log(2) / half_life
+        self._levels = {}
+        self._heap = []
+        self._lock = threading.Lock()
+
+
+    def record(self, place_id, weight=1.0, timestamp=None):
+        """
+        Add an event of a place to its score.
+
+        Args:
+            place_id (str): The place the event is about.
+            weight (float, optional): The score the event is worth when it happens.
+            timestamp (float, optional): When it happened (seconds since the epoch; now by default).
+        """
+        if weight <= 0:
+            return
+        event_level = self.rate * (time.time() if timestamp is None else timestamp) + math.log(weight)
+
+        with self._lock:
+            level = self._levels.get(place_id)
+            if level is not None:
+                event_level = log_add(level, event_level)
+            self._levels[place_id] = event_level
+            heapq.heappush(self._heap, (-event_level, place_id))
+            self._discard_stale()
+
+
+    def remove_place(self, place_id):
+        """
+        Drop a place from the ranking.
+        """
+        with self._lock:
+            if self._levels.pop(place_id, None) is not None:
+                self._discard_stale()
+
+
+    def _is_live(self, entry):
+        return self._levels.get(entry[1]) == -entry[0]
+
+
+    def _discard_stale(self):
+        """
+        Pop the stale entries at the root, and compact the heap once most are stale.
+        """
+        heap = self._heap
+        if len(heap) > 2 * len(self._levels) + 16:
+            self._heap = [(-level, place_id) for place_id, level in self._levels.items()]
+            heapq.heapify(self._heap)
+            return
+        while heap and not self._is_live(heap[0]):
+            heapq.heappop(heap)
+
+
+    def rebuild(self, events):
+        """
+        Recompute the ranking from scratch (e.g. after restoring reviews from disk).
+
+        Args:
+            events (iterable): (place_id, weight, timestamp) tuples.
+        """
+        levels = {}
+        for place_id, weight, timestamp in events:
+            if weight <= 0:
+                continue
+            event_level = self.rate * timestamp + math.log(weight)
+            level = levels.get(place_id)
+            levels[place_id] = event_level if level is None else log_add(level, event_level)
+
+        heap = [(-level, place_id) for place_id, level in levels.items()]
+        heapq.heapify(heap)
+
+        with self._lock:
+            self._levels = levels
+            self._heap = heap
+
+
+    def top(self, limit=10, now=None):
+        """
+        Return the trending places.
+
+        Args:
+            limit (int, optional): The maximum number of places to return.
+            now (float, optional): The time to decay the scores to (now by default).
+
+        Returns:
+            list: (place_id, score) tuples, highest score first.
+        """
+        now_level = self.rate * (time.time() if now is None else now)
+        entries = []
+        with self._lock:
+            heap = self._heap
+            # Best-first walk of the heap: the children of a position are 2i+1 and 2i+2
+            frontier = [(heap[0], 0)] if heap else []
+            while frontier and len(entries) < limit:
+                entry, position = heapq.heappop(frontier)
+                if self._is_live(entry):
+                    entries.append(entry)
+                for child in (2 * position + 1, 2 * position + 2):
+                    if child < len(heap):
+                        heapq.heappush(frontier, (heap[child], child))
+        return [(place_id, math.exp(-negative_level - now_level)) for negative_level, place_id in entries]
+
+
+def log_add(a, b):
+    """
+    Return log(exp(a) + exp(b)) without overflowing.
+    """
+    high, low = (a, b) if a >= b else (b, a)
+    return high + math.log1p(math.exp(low - high))
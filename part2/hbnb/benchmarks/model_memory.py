@@ -0,0 +1,58 @@
+"""
+Memory footprint of the domain models.
+
+Creates many instances of each model (reviews and places sharing a small
+set of owners/places, as in real data) and reports the bytes allocated per
+object, measured with tracemalloc.
+
+Usage (from part2/hbnb):
+    python benchmarks/model_memory.py [count]
+"""
+
+import os
+import sys
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.review import Review
+from app.models.user import User
+
+
+def measure(factory, count):
+    """
+    Return the bytes allocated per object created by `factory(i)`.
+    """
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return (after - before) / len(objects)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    # Foreign keys arrive as new strings (e.g. decoded from JSON), not shared objects
+    owners = [str(uuid.uuid4()) for _ in range(1000)]
+    places = [str(uuid.uuid4()) for _ in range(1000)]
+
+    factories = {
+        'User': lambda i: User('First', 'Last', 'user%d@hbnb.io' % i),
+        'Place': lambda i: Place('Title %d' % i, 'A description', 100.0, 48.85, 2.35, ''.join(owners[i % 1000])),
+        'Review': lambda i: Review('Great stay', 5, ''.join(places[i % 1000]), ''.join(owners[i % 1000])),
+        'Amenity': lambda i: Amenity('Amenity %d' % i),
+    }
+
+    for name, factory in factories.items():
+        print('%-8s %6.0f bytes/object' % (name, measure(factory, count)))
+
+
+if __name__ == '__main__':
+    main()
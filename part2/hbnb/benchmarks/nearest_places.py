@@ -0,0 +1,59 @@
+"""
+k-nearest places: KD-tree against the brute-force scan.
+
+Fills a place repository, builds the spatial index, and times nearest
+queries answered by the tree, by the tree plus changes made since it was
+built, and by the vectorized brute force used until the first tree exists.
+
+Usage (from part2/hbnb):
+    python benchmarks/nearest_places.py [count]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.place import Place
+from app.persistence.columns import ColumnStore
+from app.persistence.repository import ConcurrentInMemoryRepository
+from app.persistence.spatial import SpatialIndex
+
+
+def timed(function, repeat=50):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    random.seed(0)
+    repo = ConcurrentInMemoryRepository(columns=ColumnStore(('latitude', 'longitude', 'price'), track_changes=True))
+    repo.load(Place('Place', '', 100, random.uniform(-60, 70), random.uniform(-180, 180), 'owner')
+              for _ in range(count))
+    index = SpatialIndex(repo.columns)
+
+    start = time.perf_counter()
+    index.rebuild()
+    print('%d places, tree built in %.2f s' % (count, time.perf_counter() - start))
+
+    def query():
+        return index.nearest(random.uniform(-60, 70), random.uniform(-180, 180), 10)
+
+    print('tree                %8.2f ms/query' % timed(query))
+
+    for place in random.sample(repo.get_all(), 500):
+        repo.update(place.id, {'latitude': random.uniform(-60, 70)})
+    print('tree + 500 changes  %8.2f ms/query' % timed(query))
+
+    print('brute force         %8.2f ms/query' % timed(
+        lambda: index._brute_force(random.uniform(-60, 70), random.uniform(-180, 180), 10), 10))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Vectorized place filters against Python loops.
+
+Fills a place repository (with its column store) and times the same price
+range, bounding box and radius filters evaluated by looping over the Place
+objects and by one NumPy pass over the columns.
+
+Usage (from part2/hbnb):
+    python benchmarks/place_filters.py [count]
+"""
+
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.place import Place
+from app.persistence.columns import ColumnStore, EARTH_RADIUS_KM
+from app.persistence.repository import InMemoryRepository
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return len(result), (time.perf_counter() - start) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    repo = InMemoryRepository(columns=ColumnStore(('latitude', 'longitude', 'price')))
+    repo.observe_objects = False
+    random.seed(0)
+    repo.load(Place('Place', '', random.uniform(10, 500), random.uniform(-60, 70),
+                    random.uniform(-180, 180), 'owner') for _ in range(count))
+    places = repo.get_all()
+    view = repo.columns.view()
+
+    queries = {
+        'price 80-120': (
+            lambda: [p for p in places if 80 <= p.price <= 120],
+            lambda: repo.filter_columns(view.between('price', 80, 120)),
+        ),
+        'bbox Europe': (
+            lambda: [p for p in places if 35 <= p.latitude <= 60 and -10 <= p.longitude <= 30],
+            lambda: repo.filter_columns(view.within_bbox(35, -10, 60, 30)),
+        ),
+        '50 km of Paris': (
+            lambda: [p for p in places if haversine_km(48.85, 2.35, p.latitude, p.longitude) <= 50],
+            lambda: repo.filter_columns(view.within_radius(48.85, 2.35, 50)),
+        ),
+        'price + bbox': (
+            lambda: [p for p in places if 80 <= p.price <= 120
+                     and 35 <= p.latitude <= 60 and -10 <= p.longitude <= 30],
+            lambda: repo.filter_columns(view.between('price', 80, 120)
+                                        & view.within_bbox(35, -10, 60, 30)),
+        ),
+    }
+
+    print('%d places' % count)
+    for name, (loop, vectorized) in queries.items():
+        matches, loop_ms = timed(loop)
+        vectorized_matches, vectorized_ms = timed(vectorized)
+        assert matches == vectorized_matches
+        print('%-16s %8d matches  loop %8.1f ms  vectorized %7.1f ms' % (
+            name, matches, loop_ms, vectorized_ms))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Similar places: batch build time and recall against brute force.
+
+Builds the neighbours of every place with SimilarPlaces, then compares
+them, for a sample of places, with the exact top k obtained by scoring
+the place against every other place.
+
+Usage (from part2/hbnb):
+    python benchmarks/similar_places.py [count] [workers]
+"""
+
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.place import Place
+from app.services.similarity import SimilarPlaces, similarity
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    random.seed(0)
+    amenities = ['amenity-%d' % i for i in range(40)]
+    cities = [(random.uniform(-50, 60), random.uniform(-180, 180)) for _ in range(500)]
+    places = []
+    for _ in range(count):
+        latitude, longitude = random.choice(cities)
+        places.append(Place('Place', '', random.randint(20, 400), random.gauss(latitude, 0.1),
+                            random.gauss(longitude, 0.1), 'owner', amenities=random.sample(amenities, 6)))
+
+    similar = SimilarPlaces(workers=workers)
+    start = time.perf_counter()
+    similar.rebuild(places)
+    print('%d places, %d workers: built in %.1f s' % (count, similar.workers, time.perf_counter() - start))
+
+    _, _, features, rows, neighbours, scores = similar._state
+    arrays = features.arrays()
+    hits = 0
+    sample = random.sample(range(count), 200)
+    start = time.perf_counter()
+    for row in sample:
+        exact = similarity(tuple(array[row:row + 1] for array in arrays), arrays, similar.weights,
+                           similar.distance_scale_km, similar.price_span)[0]
+        exact[row] = -np.inf
+        threshold = np.partition(exact, -similar.k)[-similar.k]
+        hits += int((scores[row] >= threshold - 1e-6).sum())
+    print('recall@%d against brute force: %.3f' % (similar.k, hits / (len(sample) * similar.k)))
+
+    start = time.perf_counter()
+    for row in sample:
+        similar.similar(places[row])
+    print('lookup: %.1f us' % ((time.perf_counter() - start) * 1e6 / len(sample)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Stress test for the thread-safe in-memory repository.
+
+Writer threads keep renaming users (first_name and last_name always set to
+the same value in one update) and changing their email, half of them
+through the repository and half in place on the stored object (as model
+methods calling `save` do), while reader threads list users, fetch them by
+id and look them up by email. Readers count torn objects (first_name !=
+last_name) and exceptions; at the end the email index is checked against
+the storage, and the script fails if the concurrent repository's is stale.
+
+Usage (from part2/hbnb):
+    python benchmarks/stress_concurrent_repository.py [threads] [seconds]
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.user import User
+from app.persistence.repository import ConcurrentInMemoryRepository, HashIndex, InMemoryRepository
+
+
+USERS = 1000
+
+
+def run(repository_class, threads, seconds):
+    repo = repository_class(indexes=[HashIndex('email', unique=True)])
+    ids = []
+    for i in range(USERS):
+        user = User('user%d' % i, 'user%d' % i, 'user%d@hbnb.io' % i)
+        repo.add(user)
+        ids.append(user.id)
+
+    stop = threading.Event()
+    stats = {'reads': 0, 'writes': 0, 'torn': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def writer(in_place):
+        writes = errors = 0
+        while not stop.is_set():
+            user_id = random.choice(ids)
+            name = 'name%d' % random.randrange(1 << 30)
+            data = {'first_name': name, 'last_name': name, 'email': '%s.%s@hbnb.io' % (name, user_id)}
+            try:
+                if in_place:
+                    repo.get(user_id).update({'email': data['email']})
+                else:
+                    repo.update(user_id, data)
+                writes += 1
+            except Exception:
+                errors += 1
+        with lock:
+            stats['writes'] += writes
+            stats['errors'] += errors
+
+    def reader():
+        reads = torn = errors = 0
+        while not stop.is_set():
+            try:
+                for user in repo.get_all()[:50]:
+                    if user.first_name != user.last_name:
+                        torn += 1
+                user = repo.get(random.choice(ids))
+                if user.first_name != user.last_name:
+                    torn += 1
+                repo.get_by_attribute('email', user.email)
+                reads += 1
+            except Exception:
+                errors += 1
+        with lock:
+            stats['reads'] += reads
+            stats['torn'] += torn
+            stats['errors'] += errors
+
+    workers = [threading.Thread(target=writer, args=(i % 2 == 1,)) for i in range(threads // 2)]
+    workers += [threading.Thread(target=reader) for _ in range(threads - threads // 2)]
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+
+    users = repo.get_all()
+    stale = sum(1 for user in users if repo.get_by_attribute('email', user.email) is not user)
+    # Entries left behind under an old email
+    stale += sum(len(holders) for holders in repo._indexes['email']._entries.values()) - len(users)
+    print('%-30s reads %8d  writes %8d  torn %6d  errors %4d  stale index %4d' % (
+        repository_class.__name__, stats['reads'], stats['writes'], stats['torn'],
+        stats['errors'], stale))
+    return stale
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    # Shorter switch interval to make races between threads more likely
+    sys.setswitchinterval(1e-6)
+
+    run(InMemoryRepository, threads, seconds)
+    if run(ConcurrentInMemoryRepository, threads, seconds):
+        sys.exit('The concurrent repository left its email index out of sync with its storage')
+
+
+if __name__ == '__main__':
+    main()
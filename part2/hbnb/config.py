@@ -3,6 +3,25 @@ import os
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
     DEBUG = False
+    # Thread-safe repositories for threaded servers, with copy-on-write updates
+    CONCURRENT_REPOSITORIES = os.getenv('CONCURRENT_REPOSITORIES', 'false').lower() == 'true'
+    # Snapshot + append-only log persistence, disabled when PERSISTENCE_DIR is unset
+    PERSISTENCE_DIR = os.getenv('PERSISTENCE_DIR')
+    JOURNAL_COMMIT_INTERVAL = float(os.getenv('JOURNAL_COMMIT_INTERVAL', 0.01))
+    JOURNAL_SNAPSHOT_EVERY = int(os.getenv('JOURNAL_SNAPSHOT_EVERY', 100000))
+    JOURNAL_SYNC = os.getenv('JOURNAL_SYNC', 'false').lower() == 'true'
+    # Bayesian average of /places/top: the rating assumed before any review, worth this many reviews
+    TOP_PLACES_PRIOR_MEAN = float(os.getenv('TOP_PLACES_PRIOR_MEAN', 3.0))
+    TOP_PLACES_PRIOR_WEIGHT = float(os.getenv('TOP_PLACES_PRIOR_WEIGHT', 5))
+    # /places/trending: seconds for an activity score to halve; a review counts 1, a view this much
+    TRENDING_HALF_LIFE = float(os.getenv('TRENDING_HALF_LIFE', 86400))
+    TRENDING_VIEW_WEIGHT = float(os.getenv('TRENDING_VIEW_WEIGHT', 0.1))
+    # /places/<id>/similar: worker processes of the batch build (all cores by default),
+    # seconds before a build is redone in the background if places changed,
+    # and the number of changed places that triggers one sooner
+    SIMILAR_PLACES_WORKERS = int(os.getenv('SIMILAR_PLACES_WORKERS', 0)) or None
+    SIMILAR_PLACES_MAX_AGE = float(os.getenv('SIMILAR_PLACES_MAX_AGE', 3600))
+    SIMILAR_PLACES_MAX_CHANGES = int(os.getenv('SIMILAR_PLACES_MAX_CHANGES', 1000))
 
 class DevelopmentConfig(Config):
     DEBUG = True
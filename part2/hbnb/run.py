@@ -1,8 +1,6 @@
 from app import create_app
-from app.services.facade import HBnBFacade
 
 app = create_app()
-facade = HBnBFacade()
 
 if __name__ == '__main__':
 
@@ -1,3 +1,11 @@
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from importlib import import_module
+
+import click
 from flask import Flask
 from flask_restx import Api
 from flask_bcrypt import Bcrypt
@@ -9,11 +17,126 @@ jwt = JWTManager()
 db = SQLAlchemy()
 
 import config
-from app.api.v1.users import api as users_ns
-from app.api.v1.amenities import api as amenities_ns
-from app.api.v1.places import api as places_ns
-from app.api.v1.reviews import api as reviews_ns
-from app.api.v1.auth import api as auth_ns
+
+
+NAMESPACES = (
+    ('app.api.v1.users', '/api/v1/users'),
+    ('app.api.v1.amenities', '/api/v1/amenities'),
+    ('app.api.v1.places', '/api/v1/places'),
+    ('app.api.v1.reviews', '/api/v1/reviews'),
+    ('app.api.v1.bookings', '/api/v1/bookings'),
+    ('app.api.v1.auth', '/api/v1/auth'),
+    ('app.api.v1.changes', '/api/v1/changes'),
+)
+
+
+def register_namespaces(api):
+    """
+    Import the API namespaces and register them on the given Api.
+
+    Namespaces are imported here rather than at module import so that
+    importing `app` (models, seed, CLI commands) stays cheap.
+
+    Args:
+        api (Api): The Flask-RESTx Api to register the namespaces on.
+    """
+
+    for module_name, path in NAMESPACES:
+        api.add_namespace(import_module(module_name).api, path=path)
+
+
+def swagger_fingerprint(app, api):
+    """
+    Hash what the Swagger document is built from: routes and API models.
+
+    A cache file written for a different set of endpoints or payloads gets
+    a different fingerprint, so it is not served after a deploy.
+
+    Returns:
+        str: A hex digest of the registered routes and models.
+    """
+
+    routes = sorted(
+        (rule.rule, sorted(rule.methods), rule.endpoint)
+        for rule in app.url_map.iter_rules()
+    )
+    models = {name: model.__schema__ for name, model in api.models.items()}
+    payload = json.dumps([api.version, routes, models],
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def load_swagger_cache(app, api):
+    """
+    Preload the Swagger document from `SWAGGER_CACHE_FILE` if it exists.
+
+    Flask-RESTx only builds the schema when `_schema` is empty, so a
+    preloaded document is served as is without walking every resource.
+    A file whose fingerprint does not match the running app is ignored
+    with a warning and the document is built on demand instead.
+    """
+
+    cache_file = app.config.get('SWAGGER_CACHE_FILE')
+
+    if not cache_file or not os.path.exists(cache_file):
+        return
+
+    with open(cache_file) as f:
+        cached = json.load(f)
+
+    if (not isinstance(cached, dict)
+            or cached.get('fingerprint') != swagger_fingerprint(app, api)):
+        app.logger.warning(
+            "Ignoring stale swagger cache %s; run `flask dump-swagger` "
+            "to refresh it.", cache_file)
+        return
+
+    api._schema = cached['schema']
+
+
+def dump_swagger_cache(app, api):
+    """
+    Build the Swagger document once and write it to `SWAGGER_CACHE_FILE`.
+
+    Returns:
+        str: The path of the written file.
+    """
+
+    cache_file = app.config['SWAGGER_CACHE_FILE']
+
+    with app.test_request_context():
+        schema = api.__schema__
+
+    with open(cache_file, 'w') as f:
+        json.dump({'fingerprint': swagger_fingerprint(app, api),
+                   'schema': schema}, f)
+
+    return cache_file
+
+
+def reset_after_fork(app):
+    """
+    Make a preloaded application safe to use in a forked worker process.
+
+    Called from gunicorn's `post_fork` hook (see gunicorn.conf.py) rather
+    than from an `os.register_at_fork` hook, which could not be removed and
+    would also run in every multiprocessing child (e.g. the rescan pool).
+
+    Pooled connections inherited from the parent are dropped without being
+    closed (the parent still owns the sockets) and the facade is rebuilt so
+    its caches are private to the worker.
+
+    Args:
+        app (Flask): The application loaded before the fork.
+    """
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+    from app.services import init_facade
+    init_facade(app)
+
 
 def create_app(config_class="config.DevelopmentConfig"):
     app = Flask(__name__)
@@ -32,17 +155,61 @@ def create_app(config_class="config.DevelopmentConfig"):
                 'description': 'Bearer authentication token'
                 }
             },
-        security='BearerAuth'
+        security='BearerAuth',
+        doc='/' if app.config.get('SWAGGER_UI_ENABLED', True) else False
     )
 
-    api.add_namespace(users_ns, path='/api/v1/users')
-    api.add_namespace(amenities_ns, path='/api/v1/amenities')
-    api.add_namespace(places_ns, path='/api/v1/places')
-    api.add_namespace(reviews_ns, path='/api/v1/reviews')
-    api.add_namespace(auth_ns, path='/api/v1/auth')
+    register_namespaces(api)
+    load_swagger_cache(app, api)
+
+    @app.cli.command('dump-swagger')
+    def dump_swagger():
+        """Precompute swagger.json into SWAGGER_CACHE_FILE."""
+        print(dump_swagger_cache(app, api))
 
     bcrypt.init_app(app)
     jwt.init_app(app)
     db.init_app(app)
 
-    return app
\ No newline at end of file
+    from app.persistence.engine import configure_engines, sync_sqlite_replica
+    configure_engines(app)
+
+    @app.cli.command('sync-replica')
+    @click.option('--interval', type=float, default=0, help='Repeat the copy every INTERVAL seconds.')
+    def sync_replica(interval):
+        """Copy the primary SQLite database into the read replica."""
+        while True:
+            print(sync_sqlite_replica(app))
+            if not interval:
+                break
+            time.sleep(interval)
+
+    from app.services import init_facade
+    init_facade(app)
+
+    @app.cli.command('rescan-duplicates')
+    @click.option('--workers', type=int, default=None, help='Number of processes (all cores by default).')
+    @click.option('--batch-size', type=int, default=1000, help='Places read and written per batch.')
+    def rescan_duplicates(workers, batch_size):
+        """Recompute the duplicate-detection signatures of every place."""
+        from app.services import facade
+        count = facade.rescan_duplicates(workers, batch_size)
+        print('%d places rescanned, %d duplicate pairs' % (count, len(facade.get_duplicate_pairs())))
+
+    @app.cli.command('replay-review-journals')
+    def replay_review_journals():
+        """Commit the queued reviews left in the journals of stopped workers."""
+        from app.services import facade
+        if facade.review_queue is None or not facade.review_queue.journal_dir:
+            print('REVIEW_WRITE_BEHIND and REVIEW_JOURNAL_DIR are not both set.')
+            return
+        print('%d journals replayed' % facade.review_queue.replay_journals())
+
+    @app.cli.command('prune-changes')
+    @click.option('--days', type=int, default=30, help='Keep the changes of the last DAYS days.')
+    def prune_changes(days):
+        """Delete the old entries of the change feed."""
+        from app.services import facade
+        print('%d changes deleted' % facade.prune_changes(datetime.utcnow() - timedelta(days=days)))
+
+    return app
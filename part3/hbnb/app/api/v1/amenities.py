@@ -3,14 +3,16 @@ This module defines the API endpoints for managing amenities using Flask-RESTx.
 
 Endpoints:
     - /amenities/: Allows listing all amenities and creating a new amenity.
+    - /amenities/suggest: Autocompletes amenity names.
     - /amenities/<amenity_id>: Allows retrieving, updating, and managing a specific amenity.
 """
 
 
+from flask import request
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services import facade
-from app.services.facade import HBnBFacade
+from app.api.v1.delta import DELTA_PARAMS, delta_response, is_delta_request
 
 
 api = Namespace('amenities', description='Amenity operations')
@@ -21,7 +23,8 @@ amenity_model = api.model('Amenity', {
 })
 
 
-facade = HBnBFacade()
+def serialize_amenity(amenity):
+    return {'id': amenity.id, 'name': amenity.name}
 
 
 @api.route('/')
@@ -69,18 +72,61 @@ class AmenityList(Resource):
             return {'message': 'Failed to create amenity'}, 400
 
 
+    @api.doc(params=DELTA_PARAMS)
     @api.response(200, 'List of amenities retrieved successfully')
+    @api.response(400, 'Invalid updated_since, cursor or limit')
     def get(self):
         """
-        Retrieve a list of all amenities.
+        Retrieve a list of all amenities, or with `updated_since` only those changed or deleted since.
 
         Returns:
             list: A list of all amenities with their details.
-            HTTP Status: 200.
+            HTTP Status: 200, or 400 if the delta parameters are invalid.
         """
 
+        if is_delta_request():
+            return delta_response('amenity', serialize_amenity)
+
         amenities = facade.get_all_amenities()
-        return [{'id': amenity.id, 'name': amenity.name} for amenity in amenities], 200
+        return [serialize_amenity(amenity) for amenity in amenities], 200
+
+
+@api.route('/suggest')
+class AmenitySuggestions(Resource):
+    """
+    Resource class for the autocomplete of amenities.
+
+    Methods:
+        get: Suggest amenities whose name starts with a prefix.
+    """
+
+
+    @api.doc(params={
+        'prefix': 'What the user typed so far (case and accents are ignored)',
+        'limit': 'Maximum number of suggestions (default and maximum 10)'
+    })
+    @api.response(200, 'Suggestions retrieved successfully')
+    @api.response(400, 'Missing prefix')
+    def get(self):
+        """
+        Suggest amenities whose name starts with a prefix, most used first.
+
+        Served from an in-memory prefix index kept in sync by the facade, so
+        keystroke-rate requests never query the database.
+
+        Returns:
+            list: Up to `limit` suggestions.
+            HTTP Status: 200, or 400 if the prefix is missing.
+        """
+
+        prefix = request.args.get('prefix', '')
+        limit = min(max(request.args.get('limit', 10, type=int), 0), 10)
+
+        if not prefix.strip() or len(prefix) > 100:
+            return {'message': 'prefix must be 1 to 100 characters.'}, 400
+
+        return [{'id': obj_id, 'name': label, 'places': weight}
+                for obj_id, label, weight in facade.suggest_amenities(prefix, limit)], 200
 
 
 @api.route('/<amenity_id>')
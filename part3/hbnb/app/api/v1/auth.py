@@ -8,7 +8,7 @@ Endpoints:
 
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import create_access_token
-from app.services.facade import HBnBFacade
+from app.services import facade
 
 
 api = Namespace('auth', description='Authentication operations')
@@ -20,9 +20,6 @@ login_model = api.model('Login', {
 })
 
 
-facade = HBnBFacade()
-
-
 @api.route('/login')
 class Login(Resource):
     """
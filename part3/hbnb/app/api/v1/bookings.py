@@ -0,0 +1,161 @@
+"""
+This module defines the API endpoints for booking places, using Flask-RESTx.
+
+Endpoints:
+    - /bookings/: Book a place.
+    - /bookings/<booking_id>: Retrieve or cancel a specific booking.
+"""
+
+
+from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
+from flask_restx import Namespace, Resource, fields
+from app.models.booking import BookingConflict
+from app.services import facade
+
+
+api = Namespace('bookings', description='Booking operations')
+
+
+booking_model = api.model('Booking', {
+    'place_id': fields.String(required=True, description='ID of the place'),
+    'check_in': fields.String(required=True, description='First night (YYYY-MM-DD)'),
+    'check_out': fields.String(required=True, description='Day of departure (YYYY-MM-DD)')
+})
+
+
+def serialize_booking(booking):
+    return {
+        'id': booking.id,
+        'place_id': booking.place_id,
+        'user_id': booking.user_id,
+        'check_in': booking.check_in.isoformat(),
+        'check_out': booking.check_out.isoformat()
+    }
+
+
+@api.route('/')
+class BookingList(Resource):
+    """
+    Resource class for creating bookings.
+
+    Methods:
+        post: Book a place.
+    """
+
+
+    @api.expect(booking_model, validate=True)
+    @api.response(201, 'Booking successfully created')
+    @api.response(400, 'Invalid dates')
+    @api.response(404, 'Place not found')
+    @api.response(409, 'The place is already booked for some of these nights')
+    @jwt_required()
+    def post(self):
+        """
+        Book a place for a stay.
+
+        Requires a valid JWT token. Users cannot book their own places.
+        Overlapping bookings are rejected by the database, so two
+        concurrent requests for the same nights cannot both succeed.
+
+        Returns:
+            dict: Details of the created booking.
+            HTTP Status: 201 if successful, 400, 404 or 409 otherwise.
+        """
+
+        booking_data = api.payload
+        user_id = get_jwt_identity()
+
+        place = facade.get_place(booking_data['place_id'])
+
+        if not place:
+            return {'error': 'Place not found'}, 404
+
+        if place.owner_id == user_id:
+            return {'error': 'You cannot book your own place'}, 400
+
+        try:
+            booking = facade.create_booking({
+                'place_id': place.id,
+                'user_id': user_id,
+                'check_in': booking_data['check_in'],
+                'check_out': booking_data['check_out']
+            })
+        except BookingConflict as e:
+            return {'error': str(e)}, 409
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        return serialize_booking(booking), 201
+
+
+@api.route('/<booking_id>')
+class BookingResource(Resource):
+    """
+    Resource class for handling operations on a specific booking.
+
+    Methods:
+        get: Retrieve a specific booking.
+        delete: Cancel a specific booking.
+    """
+
+
+    @api.response(200, 'Booking details retrieved successfully')
+    @api.response(403, 'Unauthorized action')
+    @api.response(404, 'Booking not found')
+    @jwt_required()
+    def get(self, booking_id):
+        """
+        Retrieve details of a specific booking.
+
+        Only the guest, the owner of the place or an admin can see it.
+
+        Args:
+            booking_id (str): The ID of the booking to retrieve.
+
+        Returns:
+            dict: Details of the requested booking.
+            HTTP Status: 200 if successful, 403 or 404 otherwise.
+        """
+
+        booking = facade.get_booking(booking_id)
+
+        if not booking:
+            return {'error': 'Booking not found'}, 404
+
+        user_id = get_jwt_identity()
+        if booking.user_id != user_id and not get_jwt().get('is_admin', False):
+            place = facade.get_place(booking.place_id)
+            if not place or place.owner_id != user_id:
+                return {'error': 'Unauthorized action'}, 403
+
+        return serialize_booking(booking), 200
+
+
+    @api.response(204, 'Booking cancelled')
+    @api.response(403, 'Unauthorized action')
+    @api.response(404, 'Booking not found')
+    @jwt_required()
+    def delete(self, booking_id):
+        """
+        Cancel a booking, freeing its nights.
+
+        Only the guest or an admin can do this.
+
+        Args:
+            booking_id (str): The ID of the booking to cancel.
+
+        Returns:
+            HTTP Status: 204 if successful, 403 or 404 otherwise.
+        """
+
+        booking = facade.get_booking(booking_id)
+
+        if not booking:
+            return {'error': 'Booking not found'}, 404
+
+        if booking.user_id != get_jwt_identity() and not get_jwt().get('is_admin', False):
+            return {'error': 'Unauthorized action'}, 403
+
+        facade.cancel_booking(booking_id)
+
+        return '', 204
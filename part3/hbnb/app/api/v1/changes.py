@@ -0,0 +1,75 @@
+"""
+This module defines the change feed endpoint, for clients keeping a copy of
+the data in sync, using Flask-RESTx.
+
+Endpoints:
+    - /changes/: List the changes following a position of the feed.
+"""
+
+
+from flask import request
+from flask_restx import Namespace, Resource
+from app.services import facade
+
+
+api = Namespace('changes', description='Change feed for incremental sync')
+
+
+MAX_LIMIT = 1000
+
+
+@api.route('/')
+class ChangeList(Resource):
+    """
+    Resource class for the change feed.
+
+    Methods:
+        get: List the changes following a position of the feed.
+    """
+
+
+    @api.doc(params={
+        'after': 'The last sequence number already seen (default 0, the start of the feed)',
+        'limit': 'Maximum number of changes (default 100, maximum 1000)'
+    })
+    @api.response(200, 'Changes retrieved successfully')
+    @api.response(400, 'Invalid cursor or limit')
+    def get(self):
+        """
+        List the users, places, reviews and amenities created, updated or deleted after a position.
+
+        Every facade mutation writes its change in its own transaction, so
+        the feed holds exactly the committed changes, in order. Clients
+        store `next` and pass it as `after` on their next poll, then fetch
+        the changed entities from their endpoints; an empty page means they
+        are up to date.
+
+        Returns:
+            dict: The changes and the cursor to continue from.
+            HTTP Status: 200, or 400 if `after` or `limit` is invalid.
+        """
+
+        try:
+            after = int(request.args.get('after', 0))
+            limit = int(request.args.get('limit', 100))
+        except ValueError:
+            return {'error': 'after and limit must be integers.'}, 400
+
+        if after < 0:
+            return {'error': 'after must be a non-negative integer.'}, 400
+
+        if not 1 <= limit <= MAX_LIMIT:
+            return {'error': f'limit must be between 1 and {MAX_LIMIT}.'}, 400
+
+        changes = facade.get_changes(after, limit)
+
+        return {
+            'changes': [{
+                'seq': change.seq,
+                'entity': change.entity,
+                'id': change.entity_id,
+                'op': change.op,
+                'at': change.created_at.isoformat()
+            } for change in changes],
+            'next': changes[-1].seq if changes else after
+        }, 200
@@ -0,0 +1,101 @@
+"""
+This module implements the `updated_since` delta queries shared by the list
+endpoints (users, places, reviews, amenities).
+
+A sync job passes `updated_since` once, then follows the `X-Next-Cursor`
+header of each page with `cursor` until a page comes back short; it keeps
+the last cursor for its next run. Items are returned in (updated_at, id)
+order, deleted ones as `{"id": ..., "deleted": true}`. Changes are only
+returned once `CHANGES_SETTLE_SECONDS` old, so that a cursor never moves
+past a transaction that has not committed yet.
+"""
+
+
+import base64
+import binascii
+from datetime import datetime, timezone
+
+from flask import request
+from app.services import facade
+
+
+MAX_LIMIT = 1000
+
+DELTA_PARAMS = {
+    'updated_since': 'Only return what changed or was deleted at or after this ISO 8601 time',
+    'cursor': 'Continue after the X-Next-Cursor header of the previous page',
+    'limit': 'Maximum number of items of a delta page (default 100, maximum 1000)'
+}
+
+
+def is_delta_request():
+    """
+    Tell whether the request asks for a delta rather than the full list.
+    """
+
+    return 'updated_since' in request.args or 'cursor' in request.args
+
+
+def parse_time(text):
+    """
+    Parse an ISO 8601 time into the naive UTC datetime the models store.
+    """
+
+    value = datetime.fromisoformat(text)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def encode_cursor(updated_at, obj_id):
+    return base64.urlsafe_b64encode(f'{updated_at.isoformat()}|{obj_id}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Return the (updated_at, id) keyset position of a cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+
+    try:
+        updated_at, obj_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Invalid cursor.')
+    return parse_time(updated_at), obj_id
+
+
+def delta_response(entity, serialize):
+    """
+    Answer a delta request on a list endpoint.
+
+    Args:
+        entity (str): 'user', 'place', 'review' or 'amenity'.
+        serialize (function): Turns an object into the dict the endpoint lists.
+
+    Returns:
+        tuple: The body, the status and the X-Next-Cursor header, or an error and 400.
+    """
+
+    try:
+        if 'cursor' in request.args:
+            since, after_id = decode_cursor(request.args['cursor'])
+        else:
+            since, after_id = parse_time(request.args['updated_since']), ''
+        limit = int(request.args.get('limit', 100))
+    except ValueError as e:
+        return {'error': f'Invalid updated_since, cursor or limit: {e}'}, 400
+
+    if not 1 <= limit <= MAX_LIMIT:
+        return {'error': f'limit must be between 1 and {MAX_LIMIT}.'}, 400
+
+    items = facade.get_changed_since(entity, since, after_id, limit)
+    body = [
+        dict(serialize(obj), updated_at=updated_at.isoformat()) if obj is not None
+        else {'id': obj_id, 'deleted': True, 'updated_at': updated_at.isoformat()}
+        for updated_at, obj_id, obj in items
+    ]
+    last = items[-1][:2] if items else (since, after_id)
+
+    return body, 200, {'X-Next-Cursor': encode_cursor(*last)}
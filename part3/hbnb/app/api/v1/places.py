@@ -4,16 +4,24 @@ and associations with amenities, owners, and reviews, using Flask-RESTx.
 
 Endpoints:
     - /places/: List places or create a new place.
+    - /places/suggest: Autocomplete place titles.
+    - /places/duplicates: List near-duplicate listings (admin).
+    - /places/available: List the places of a bounding box free for a stay.
     - /places/<place_id>: Retrieve, update, or manage a specific place.
+    - /places/<place_id>/amenities: List or replace the amenities of a place.
+    - /places/<place_id>/duplicates: List the near-duplicates of a place (admin).
+    - /places/<place_id>/availability: Tell whether a place is free for a stay.
 """
 
 
 from flask_restx import Namespace, Resource, fields
-from app.services.facade import HBnBFacade
+from app.services import facade
+from app.api.v1.delta import DELTA_PARAMS, delta_response, is_delta_request
+from app.models.booking import Booking
 from app.api.v1.users import user_model
 from app.api.v1.amenities import amenity_model
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from flask import jsonify
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from flask import jsonify, request
 
 
 api = Namespace('places', description='Place operations')
@@ -54,7 +62,24 @@ place_model = api.model('Place', {
 })
 
 
-facade = HBnBFacade()
+place_amenities_model = api.model('PlaceAmenities', {
+    'amenities': fields.List(fields.String, required=True, description="IDs of all the amenities of the place")
+})
+
+
+def serialize_amenities(amenities):
+    return [{'id': amenity.id, 'name': amenity.name} for amenity in amenities]
+
+
+def serialize_place_summary(place):
+    return {
+        'id': place.id,
+        'title': place.title,
+        'price': float(place.price),
+        'rating': place.rating,
+        'latitude': place.latitude,
+        'longitude': place.longitude
+    }
 
 
 @api.route('/')
@@ -93,14 +118,9 @@ class PlaceList(Resource):
         if user is None:
             return {'error': 'Invalid owner_id.'}, 400
 
-        if current_user['id'] != user.id:
+        if current_user != user.id:
             return {'error': 'Unauthorized action.'}, 403
 
-        if place_data.get('amenities'):
-            for amenity in place_data.get('amenities'):
-                if facade.get_amenity(amenity['id']) is None:
-                    return {'error': 'Invalid amenity ID.'}, 400
-
         try:
             place = facade.create_place(place_data)
             return {
@@ -117,24 +137,202 @@ class PlaceList(Resource):
             return {'error': str(e)}, 400
 
 
+    @api.doc(params={
+        'amenities': 'Comma-separated amenity names or IDs the places must all have',
+        'filter': 'Filter expression, e.g. price<=120 and rating>=4',
+        'sort': 'Comma-separated fields to sort on, - for descending, e.g. -rating,price',
+        **DELTA_PARAMS
+    })
     @api.response(200, 'List of places retrieved successfully')
+    @api.response(400, 'Invalid filter or delta parameters')
     def get(self):
         """
         Retrieve a list of all places.
 
+        The `amenities` query parameter keeps the places having all the
+        listed amenities. The `filter` parameter takes comparisons on title,
+        owner_id, price, latitude, longitude, rating and reviews (=, !=, <,
+        <=, >, >=) combined with and, or, not and parentheses, and `sort`
+        orders the result; both are compiled into a single SQL query.
+        With `updated_since`, only the places changed or deleted since are
+        returned, in update order (see delta.py).
+
         Returns:
             list: A list of places with basic details.
-            HTTP Status: 200.
+            HTTP Status: 200, or 400 if the filter, sort or delta parameters are invalid.
         """
 
-        places = facade.get_all_places()
+        amenities = [key.strip() for key in request.args.get('amenities', '').split(',') if key.strip()]
+        filter_text = request.args.get('filter')
+        sort_text = request.args.get('sort')
+
+        if is_delta_request():
+            if amenities or filter_text or sort_text:
+                return {'error': 'updated_since cannot be combined with amenities, filter or sort.'}, 400
+            return delta_response('place', serialize_place_summary)
+
+        if filter_text or sort_text:
+            try:
+                places = facade.find_places(filter_text, sort_text, amenities)
+            except ValueError as e:
+                return {'error': str(e)}, 400
+        elif amenities:
+            places = facade.get_places_with_amenities(amenities)
+        else:
+            places = facade.get_all_places()
         
+        return [serialize_place_summary(place) for place in places], 200
+
+
+@api.route('/suggest')
+class PlaceSuggestions(Resource):
+    """
+    Resource class for the autocomplete of places.
+
+    Methods:
+        get: Suggest places whose title starts with a prefix.
+    """
+
+
+    @api.doc(params={
+        'prefix': 'What the user typed so far (case and accents are ignored)',
+        'limit': 'Maximum number of suggestions (default and maximum 10)'
+    })
+    @api.response(200, 'Suggestions retrieved successfully')
+    @api.response(400, 'Missing prefix')
+    def get(self):
+        """
+        Suggest places whose title starts with a prefix, most reviewed first.
+
+        Served from an in-memory prefix index kept in sync by the facade, so
+        keystroke-rate requests never query the database.
+
+        Returns:
+            list: Up to `limit` suggestions.
+            HTTP Status: 200, or 400 if the prefix is missing.
+        """
+
+        prefix = request.args.get('prefix', '')
+        limit = min(max(request.args.get('limit', 10, type=int), 0), 10)
+
+        if not prefix.strip() or len(prefix) > 100:
+            return {'error': 'prefix must be 1 to 100 characters.'}, 400
+
+        return [{'id': obj_id, 'title': label, 'reviews': weight}
+                for obj_id, label, weight in facade.suggest_places(prefix, limit)], 200
+
+
+def read_threshold():
+    """
+    Return the similarity threshold of the request, or None if it is invalid.
+    """
+
+    threshold = request.args.get('threshold', 0.8, type=float)
+    if threshold is None or not 0.5 <= threshold <= 1:
+        return None
+    return threshold
+
+
+@api.route('/duplicates')
+class PlaceDuplicateList(Resource):
+    """
+    Resource class for the near-duplicate listings of the catalogue.
+
+    Methods:
+        get: List every pair of near-duplicate places.
+    """
+
+
+    @api.doc(params={'threshold': 'Minimum estimated similarity of the texts, 0.5 to 1 (default 0.8)'})
+    @api.response(200, 'Duplicate pairs retrieved successfully')
+    @api.response(400, 'Invalid threshold')
+    @api.response(403, 'Admin privileges required')
+    @jwt_required()
+    def get(self):
+        """
+        List every pair of places whose title and description are nearly the same.
+
+        Pairs are found from the LSH buckets of the MinHash signatures kept
+        by the facade, then confirmed on the full signatures; only admins
+        can do this.
+
+        Returns:
+            list: Pairs of places with their estimated similarity, most similar first.
+            HTTP Status: 200, 400 or 403.
+        """
+
+        if not get_jwt().get('is_admin', False):
+            return {'error': 'Admin privileges required'}, 403
+
+        threshold = read_threshold()
+        if threshold is None:
+            return {'error': 'threshold must be a number between 0.5 and 1.'}, 400
+
+        return facade.get_duplicate_pairs(threshold), 200
+
+
+def read_stay():
+    """
+    Return the check-in and check-out dates of the request.
+
+    Raises:
+        ValueError: If a date is missing or malformed, or the stay is invalid.
+    """
+
+    return Booking.validate_dates(request.args.get('check_in'), request.args.get('check_out'))
+
+
+@api.route('/available')
+class AvailablePlaceList(Resource):
+    """
+    Resource class for the places free for a stay.
+
+    Methods:
+        get: List the places of a bounding box with no booking on the dates.
+    """
+
+
+    @api.doc(params={
+        'south': 'Minimum latitude', 'west': 'Minimum longitude',
+        'north': 'Maximum latitude', 'east': 'Maximum longitude',
+        'check_in': 'First night (YYYY-MM-DD)', 'check_out': 'Day of departure (YYYY-MM-DD)'
+    })
+    @api.response(200, 'Available places retrieved successfully')
+    @api.response(400, 'Invalid bounding box or dates')
+    def get(self):
+        """
+        List the places inside a bounding box that are free for a stay.
+
+        The box is answered from the (latitude, longitude) index, then each
+        place is checked against the bitmap of its booked nights held by
+        the in-memory booking calendar.
+
+        Returns:
+            list: The available places with basic details.
+            HTTP Status: 200, or 400 if the box or the dates are invalid.
+        """
+
+        bbox = [request.args.get(name, type=float) for name in ('south', 'west', 'north', 'east')]
+
+        if None in bbox:
+            return {'error': 'south, west, north and east must be numbers.'}, 400
+
+        south, west, north, east = bbox
+        if not (-90 <= south <= north <= 90 and -180 <= west <= east <= 180):
+            return {'error': 'Invalid bounding box.'}, 400
+
+        try:
+            check_in, check_out = read_stay()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
         return [{
             'id': place.id,
             'title': place.title,
+            'price': float(place.price),
             'latitude': place.latitude,
             'longitude': place.longitude
-        } for place in places], 200
+        } for place in facade.find_available_places(bbox, check_in, check_out)], 200
 
 
 @api.route('/<place_id>')
@@ -174,7 +372,7 @@ class PlaceResource(Resource):
             'latitude': place.latitude,
             'longitude': place.longitude,
             'owner': place.owner_id,
-            'amenities': place.amenities,
+            'amenities': serialize_amenities(place.amenities),
         }, 200
 
 
@@ -183,7 +381,7 @@ class PlaceResource(Resource):
     @api.response(404, 'Place not found')
     @api.response(400, 'Invalid input data')
     @api.response(403, 'Unauthorized action')
-    @jwt_required
+    @jwt_required()
     def put(self, place_id):
         """
         Update an existing place.
@@ -203,11 +401,9 @@ class PlaceResource(Resource):
         if not place:
             return {'error': 'Place not found'}, 404
             
-        current_user = get_jwt_identity()
-
-        is_admin = current_user.get('is_admin', False)
+        is_admin = get_jwt().get('is_admin', False)
 
-        user_id = current_user.get('id')
+        user_id = get_jwt_identity()
 
         if not is_admin and place.owner_id != user_id:
             return {'error': 'Unauthorized action'}, 403
@@ -227,8 +423,168 @@ class PlaceResource(Resource):
                 'latitude': place_update.latitude,
                 'longitude': place_update.longitude,
                 'owner_id': place_update.owner_id,
-                'amenities': place_update.amenities
+                'amenities': serialize_amenities(place_update.amenities)
             }, 200
 
         except ValueError as e:
-            return {'error': str(e)}, 400
\ No newline at end of file
+            return {'error': str(e)}, 400
+
+
+@api.route('/<place_id>/amenities')
+class PlaceAmenityList(Resource):
+    """
+    Resource class for the amenities of a specific place.
+
+    Methods:
+        get: List the amenities of a place.
+        put: Replace the amenities of a place.
+    """
+
+
+    @api.response(200, 'Amenities of the place retrieved successfully')
+    @api.response(404, 'Place not found')
+    def get(self, place_id):
+        """
+        List the amenities of a place.
+
+        Args:
+            place_id (str): The ID of the place.
+
+        Returns:
+            list: The amenities of the place.
+            HTTP Status: 200 if successful, 404 if not found.
+        """
+
+        place = facade.get_place(place_id)
+
+        if not place:
+            return {'error': 'Place not found'}, 404
+
+        return serialize_amenities(place.amenities), 200
+
+
+    @api.expect(place_amenities_model, validate=True)
+    @api.response(200, 'Amenities of the place updated successfully')
+    @api.response(400, 'Invalid amenity ID')
+    @api.response(403, 'Unauthorized action')
+    @api.response(404, 'Place not found')
+    @jwt_required()
+    def put(self, place_id):
+        """
+        Replace the amenities of a place.
+
+        Attaches the listed amenities that are missing and detaches the
+        others; all IDs are validated in one query and only the difference
+        is written. Only the owner of the place or an admin can do this.
+
+        Args:
+            place_id (str): The ID of the place.
+
+        Returns:
+            list: The amenities of the place after the update.
+            HTTP Status: 200 if successful, 400, 403 or 404 otherwise.
+        """
+
+        place = facade.get_place(place_id)
+
+        if not place:
+            return {'error': 'Place not found'}, 404
+
+        if not get_jwt().get('is_admin', False) and place.owner_id != get_jwt_identity():
+            return {'error': 'Unauthorized action'}, 403
+
+        try:
+            amenities = facade.set_place_amenities(place_id, api.payload['amenities'])
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        return serialize_amenities(amenities), 200
+
+
+@api.route('/<place_id>/duplicates')
+class PlaceDuplicates(Resource):
+    """
+    Resource class for the near-duplicates of a specific place.
+
+    Methods:
+        get: List the places whose text is nearly the same.
+    """
+
+
+    @api.doc(params={'threshold': 'Minimum estimated similarity of the texts, 0.5 to 1 (default 0.8)'})
+    @api.response(200, 'Duplicates retrieved successfully')
+    @api.response(400, 'Invalid threshold')
+    @api.response(403, 'Admin privileges required')
+    @api.response(404, 'Place not found')
+    @jwt_required()
+    def get(self, place_id):
+        """
+        List the places whose title and description are nearly the same as a place's.
+
+        Only the places sharing one of its LSH buckets are compared, so the
+        lookup does not grow with the catalogue; only admins can do this.
+
+        Args:
+            place_id (str): The ID of the place.
+
+        Returns:
+            list: The duplicates with their estimated similarity, most similar first.
+            HTTP Status: 200 if successful, 400, 403 or 404 otherwise.
+        """
+
+        if not get_jwt().get('is_admin', False):
+            return {'error': 'Admin privileges required'}, 403
+
+        threshold = read_threshold()
+        if threshold is None:
+            return {'error': 'threshold must be a number between 0.5 and 1.'}, 400
+
+        if not facade.get_place(place_id):
+            return {'error': 'Place not found'}, 404
+
+        return facade.find_duplicates(place_id, threshold), 200
+
+
+@api.route('/<place_id>/availability')
+class PlaceAvailability(Resource):
+    """
+    Resource class for the availability of a specific place.
+
+    Methods:
+        get: Tell whether a place is free for a stay.
+    """
+
+
+    @api.doc(params={'check_in': 'First night (YYYY-MM-DD)', 'check_out': 'Day of departure (YYYY-MM-DD)'})
+    @api.response(200, 'Availability retrieved successfully')
+    @api.response(400, 'Invalid dates')
+    @api.response(404, 'Place not found')
+    def get(self, place_id):
+        """
+        Tell whether a place is free for a stay, and which bookings are in the way.
+
+        Answered from the in-memory booking calendar in O(log n) per place.
+
+        Args:
+            place_id (str): The ID of the place.
+
+        Returns:
+            dict: Whether the place is available and the overlapping stays.
+            HTTP Status: 200 if successful, 400 or 404 otherwise.
+        """
+
+        try:
+            check_in, check_out = read_stay()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        if not facade.get_place(place_id):
+            return {'error': 'Place not found'}, 404
+
+        available, bookings = facade.get_place_availability(place_id, check_in, check_out)
+
+        return {
+            'available': available,
+            'booked': [{'check_in': start.isoformat(), 'check_out': end.isoformat()}
+                       for start, end, _ in bookings]
+        }, 200
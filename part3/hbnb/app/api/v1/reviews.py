@@ -11,7 +11,8 @@ Endpoints:
 
 from flask_jwt_extended import get_jwt_identity, jwt_required
 from flask_restx import Namespace, Resource, fields
-from app.services.facade import HBnBFacade
+from app.services import facade
+from app.api.v1.delta import DELTA_PARAMS, delta_response, is_delta_request
 
 
 api = Namespace('reviews', description='Review operations')
@@ -25,7 +26,8 @@ review_model = api.model('Review', {
 })
 
 
-facade = HBnBFacade()
+def serialize_review_summary(review):
+    return {'id': review.id, 'text': review.text, 'rating': review.rating}
 
 
 @api.route('/')
@@ -41,6 +43,7 @@ class ReviewList(Resource):
 
     @api.expect(review_model)
     @api.response(201, 'Review successfully created')
+    @api.response(202, 'Review accepted, committed shortly (write-behind mode)')
     @api.response(400, 'Invalid input data or validation error')
     @api.response(404, 'Place not found')
     @jwt_required()
@@ -49,11 +52,13 @@ class ReviewList(Resource):
         Create a new review for a place.
 
         Requires a valid JWT token. Users cannot review their own places 
-        or submit duplicate reviews for the same place.
+        or submit duplicate reviews for the same place. In write-behind mode
+        the review is queued and committed with others a few milliseconds
+        later; it can be read back meanwhile.
 
         Returns:
             dict: Details of the created review.
-            HTTP Status: 201 if successful, 400 or 404 otherwise.
+            HTTP Status: 201 if successful (202 if queued), 400 or 404 otherwise.
         """
 
         review_data = api.payload.copy()
@@ -86,25 +91,30 @@ class ReviewList(Resource):
                 "rating": new_review.rating,
                 "user_id": new_review.user_id,
                 "place_id": new_review.place_id
-            }, 201
+            }, 202 if facade.review_queue is not None else 201
 
         except (ValueError, TypeError) as e:
             return {'message': f'Invalid input data: {str(e)}'}, 400
 
 
+    @api.doc(params=DELTA_PARAMS)
     @api.response(200, 'List of reviews retrieved successfully')
+    @api.response(400, 'Invalid updated_since, cursor or limit')
     def get(self):
         """
-        Retrieve all reviews.
+        Retrieve all reviews, or with `updated_since` only those changed or deleted since.
 
         Returns:
             list: A list of all reviews.
-            HTTP Status: 200.
+            HTTP Status: 200, or 400 if the delta parameters are invalid.
         """
 
+        if is_delta_request():
+            return delta_response('review', serialize_review_summary)
+
         reviews = facade.get_all_reviews()
 
-        return [{'id': r.id, 'text': r.text, 'rating': r.rating} for r in reviews], 200
+        return [serialize_review_summary(r) for r in reviews], 200
 
 
 @api.route('/<review_id>')
@@ -10,7 +10,8 @@ Endpoints:
 from flask_restx import Namespace, Resource, fields
 from app.models.user import User
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.services.facade import HBnBFacade
+from app.services import facade
+from app.api.v1.delta import DELTA_PARAMS, delta_response, is_delta_request
 
 
 api = Namespace('users', description='User operations')
@@ -30,10 +31,13 @@ update_user_model = api.model('UpdateUser', {
 })
 
 
-facade = HBnBFacade()
 user_email = User()
 
 
+def serialize_user(user):
+    return {'id': user.id, 'first_name': user.first_name, 'last_name': user.last_name, 'email': user.email}
+
+
 @api.route('/')
 class UserList(Resource):
     """
@@ -45,22 +49,24 @@ class UserList(Resource):
     """
 
 
+    @api.doc(params=DELTA_PARAMS)
     @api.response(200, 'Users retrieved successfully')
+    @api.response(400, 'Invalid updated_since, cursor or limit')
     def get(self):
         """
-        Retrieve all users.
+        Retrieve all users, or with `updated_since` only those changed or deleted since.
 
         Returns:
             list: A list of user details.
-            HTTP Status: 200.
+            HTTP Status: 200, or 400 if the delta parameters are invalid.
         """
 
+        if is_delta_request():
+            return delta_response('user', serialize_user)
+
         users = facade.get_all_users()
 
-        return [
-            {'id': user.id, 'first_name': user.first_name, 'last_name': user.last_name, 'email': user.email}
-            for user in users
-        ], 200
+        return [serialize_user(user) for user in users], 200
 
 
     @jwt_required()
@@ -1,4 +1,6 @@
 from app import db
+from app.models.base_model import updated_at_index
+from datetime import datetime
 from uuid import uuid4
 
 class Amenity(db.Model):
@@ -6,6 +8,10 @@ class Amenity(db.Model):
 
     id = db.Column(db.String(60), primary_key=True, default=lambda: str(uuid4()))
     name = db.Column(db.String(128), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (updated_at_index('amenities'),)
 
     def __init__(self, **kwargs):
         super(Amenity, self).__init__(**kwargs)
@@ -3,6 +3,15 @@ import uuid
 from datetime import datetime
 
 
+def updated_at_index(tablename):
+    """
+    Return the (updated_at, id) index of a table, serving the `updated_since`
+    delta queries in keyset order (see SQLAlchemyRepository.get_changed_since).
+    """
+
+    return db.Index('ix_%s_updated_at_id' % tablename, 'updated_at', 'id')
+
+
 class BaseModel(db.Model):
     """
     A base model to include common fields and methods for other models.
@@ -0,0 +1,113 @@
+from datetime import date, datetime
+
+from app import db
+from app.models.base_model import BaseModel
+
+
+MAX_NIGHTS = 365
+# How far ahead a stay can start: the calendar keeps a bitmap of every
+# booked night from today, so a far-future booking would inflate it
+MAX_ADVANCE_DAYS = 730
+
+# One row per booked night. The primary key makes overlapping bookings of a
+# place fail on insert, whichever transaction commits second, without
+# locking the table (see BookingRepository.add).
+booking_night = db.Table(
+    'booking_nights',
+    db.Column('place_id', db.String(36), db.ForeignKey('places.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('night', db.Date, primary_key=True),
+    db.Column('booking_id', db.String(36), db.ForeignKey('bookings.id', ondelete='CASCADE'), nullable=False),
+    db.Index('ix_booking_nights_booking_id', 'booking_id'),
+)
+
+
+class BookingConflict(ValueError):
+    """
+    Raised when a booking overlaps an existing booking of the same place.
+    """
+
+
+class Booking(BaseModel):
+    __tablename__ = 'bookings'
+
+    place_id = db.Column(db.String(36), db.ForeignKey('places.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+    check_in = db.Column(db.Date, nullable=False)
+    check_out = db.Column(db.Date, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_bookings_place_id_check_in', 'place_id', 'check_in'),
+    )
+
+
+    @classmethod
+    def create(cls, place_id, user_id, check_in, check_out):
+        """
+        Factory method to create a new booking instance.
+        Validates the dates before creating the booking.
+
+        Args:
+            place_id (str): ID of the booked place.
+            user_id (str): ID of the user booking it.
+            check_in (str or date): First night, as an ISO date.
+            check_out (str or date): Day of departure, as an ISO date.
+
+        Returns:
+            Booking instance.
+        """
+
+        check_in, check_out = cls.validate_dates(check_in, check_out)
+
+        return cls(place_id=place_id, user_id=user_id, check_in=check_in, check_out=check_out)
+
+
+    @staticmethod
+    def validate_dates(check_in, check_out, allow_past=False):
+        """
+        Validate a stay: check-out after check-in, at most MAX_NIGHTS nights,
+        starting at most MAX_ADVANCE_DAYS days from today.
+
+        Args:
+            check_in (str or date): First night, as an ISO date.
+            check_out (str or date): Day of departure, as an ISO date.
+            allow_past (bool, optional): Accept a check-in before today.
+
+        Returns:
+            tuple: The check-in and check-out dates.
+
+        Raises:
+            ValueError: If a date is malformed or the stay is invalid.
+        """
+
+        try:
+            if not isinstance(check_in, date):
+                check_in = date.fromisoformat(check_in)
+            if not isinstance(check_out, date):
+                check_out = date.fromisoformat(check_out)
+        except (TypeError, ValueError):
+            raise ValueError("Dates must be given as YYYY-MM-DD.")
+
+        if check_out <= check_in:
+            raise ValueError("Check-out must be after check-in.")
+
+        if (check_out - check_in).days > MAX_NIGHTS:
+            raise ValueError(f"A stay is at most {MAX_NIGHTS} nights.")
+
+        today = datetime.utcnow().date()
+
+        if not allow_past and check_in < today:
+            raise ValueError("Check-in cannot be in the past.")
+
+        if (check_in - today).days > MAX_ADVANCE_DAYS:
+            raise ValueError(f"Check-in is at most {MAX_ADVANCE_DAYS} days ahead.")
+
+        return check_in, check_out
+
+
+    @property
+    def nights(self):
+        """
+        Return the booked nights, from check-in to the night before check-out.
+        """
+
+        return [date.fromordinal(day) for day in range(self.check_in.toordinal(), self.check_out.toordinal())]
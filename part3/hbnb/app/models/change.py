@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from app import db
+
+
+class Change(db.Model):
+    """
+    One row of the outbox: an entity created, updated or deleted.
+
+    Rows are written in the transaction of the change itself (see
+    app/persistence/outbox.py), so a change is in the feed if and only if
+    it was committed. `seq` increases with every row and is the cursor of
+    GET /changes, served from the primary key.
+
+    Attributes:
+        seq (int): The position of the change in the feed.
+        entity (str): 'user', 'place', 'review' or 'amenity'.
+        entity_id (str): The ID of the changed entity.
+        op (str): 'created', 'updated' or 'deleted'.
+        created_at (datetime): When the change was written.
+    """
+
+    __tablename__ = 'changes'
+
+    seq = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.String(60), nullable=False)
+    op = db.Column(db.String(10), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # Without AUTOINCREMENT, SQLite reuses the largest rowid once it is
+    # deleted (e.g. by prune-changes), and a reader past it would miss the row
+    __table_args__ = {'sqlite_autoincrement': True}
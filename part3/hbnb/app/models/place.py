@@ -1,7 +1,29 @@
 from sqlalchemy.ext.hybrid import hybrid_property
 
 from app import db
-from app.models.base_model import BaseModel
+from app.models.base_model import BaseModel, updated_at_index
+
+
+# Many-to-many Place <-> Amenity. The primary key serves lookups by place,
+# the second index lookups by amenity (places having a given amenity).
+place_amenity = db.Table(
+    'place_amenity',
+    db.Column('place_id', db.String(36), db.ForeignKey('places.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('amenity_id', db.String(60), db.ForeignKey('amenities.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_place_amenity_amenity_id', 'amenity_id', 'place_id'),
+)
+
+# LSH buckets of the MinHash signature of each place, one row per band (see
+# app/services/duplicates.py). Places sharing a (band, bucket) pair are
+# candidate near-duplicates, found through the second index.
+place_lsh_band = db.Table(
+    'place_lsh_bands',
+    db.Column('place_id', db.String(36), db.ForeignKey('places.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('band', db.SmallInteger, primary_key=True),
+    db.Column('bucket', db.BigInteger, nullable=False),
+    db.Index('ix_place_lsh_bands_band_bucket', 'band', 'bucket'),
+)
+
 
 class Place(BaseModel):
     __tablename__ = 'places'
@@ -12,6 +34,22 @@ class Place(BaseModel):
     _latitude = db.Column(db.Float, nullable=False)
     _longitude = db.Column(db.Float, nullable=False)
     _owner_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    # Average rating and number of reviews, kept up to date by the review
+    # writes (see PlaceRepository.refresh_rating) so they can be indexed
+    rating = db.Column(db.Float, nullable=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    # MinHash signature of the title and description, for duplicate detection
+    text_signature = db.Column(db.LargeBinary, nullable=True)
+    amenities = db.relationship('Amenity', secondary=place_amenity, passive_deletes=True)
+
+    # Indexes for the filter and sort fields of GET /places (see PlaceRepository.find)
+    __table_args__ = (
+        db.Index('ix_places_price', '_price'),
+        db.Index('ix_places_rating', 'rating'),
+        db.Index('ix_places_latitude_longitude', '_latitude', '_longitude'),
+        db.Index('ix_places_owner_id', '_owner_id'),
+        updated_at_index('places'),
+    )
     
     @hybrid_property
     def title(self):
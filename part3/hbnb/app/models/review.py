@@ -1,4 +1,4 @@
-from app.models.base_model import BaseModel
+from app.models.base_model import BaseModel, updated_at_index
 from app import db
 
 
@@ -7,9 +7,11 @@ class Review(BaseModel):
 
     text = db.Column(db.Text, nullable=False)
     rating = db.Column(db.Integer, nullable=False)
-    place_id = db.Column(db.String(36), db.ForeignKey('places.id'), nullable=False)
+    place_id = db.Column(db.String(36), db.ForeignKey('places.id'), nullable=False, index=True)
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
 
+    __table_args__ = (updated_at_index('reviews'),)
+
 
     @classmethod
     def create(cls, text, rating, place_id, user_id):
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from app import db
+
+
+class Tombstone(db.Model):
+    """
+    A deleted entity, kept so `updated_since` delta queries return deletions too.
+
+    Written in the transaction of the deletion (see app/persistence/outbox.py).
+
+    Attributes:
+        entity (str): 'user', 'place', 'review' or 'amenity'.
+        entity_id (str): The ID of the deleted entity.
+        deleted_at (datetime): When it was deleted.
+    """
+
+    __tablename__ = 'tombstones'
+
+    entity = db.Column(db.String(20), primary_key=True)
+    entity_id = db.Column(db.String(60), primary_key=True)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_tombstones_entity_deleted_at_entity_id', 'entity', 'deleted_at', 'entity_id'),
+    )
@@ -1,5 +1,5 @@
 import re
-from app.models.base_model import BaseModel
+from app.models.base_model import BaseModel, updated_at_index
 from app import bcrypt, db
 
 
@@ -12,6 +12,8 @@ class User(BaseModel):
     password = db.Column(db.String(128), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
 
+    __table_args__ = (updated_at_index('users'),)
+
 
     @classmethod
     def create_user(cls, first_name, last_name, email, password, is_admin=False):
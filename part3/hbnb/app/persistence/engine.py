@@ -0,0 +1,87 @@
+import sqlite3
+
+from flask import g, has_app_context
+from sqlalchemy import event
+
+from app import db
+
+
+@event.listens_for(db.session, 'after_flush')
+def mark_read_your_writes(session, flush_context):
+    """
+    Pin the rest of the current request to the primary once it has written.
+    """
+
+    if has_app_context():
+        g.read_your_writes = True
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """
+    Run the given PRAGMA statements on every new SQLite connection.
+
+    Args:
+        engine (Engine): The SQLAlchemy engine to configure.
+        pragmas (dict): PRAGMA names mapped to their values.
+    """
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute('PRAGMA {}={}'.format(name, value))
+        cursor.close()
+
+
+def configure_engines(app):
+    """
+    Apply the `SQLITE_PRAGMAS` setting to every SQLite engine of the app.
+
+    Args:
+        app (Flask): The application whose engines are configured.
+    """
+
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+
+    if not pragmas:
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                apply_sqlite_pragmas(engine, pragmas)
+
+
+def sync_sqlite_replica(app):
+    """
+    Copy the primary SQLite database into the read replica file.
+
+    Uses the SQLite online backup API, so the copy is consistent even while
+    the primary is being written. This stands in for real replication when
+    testing read/write splitting locally.
+
+    Args:
+        app (Flask): The application whose primary and read bind are synced.
+
+    Returns:
+        str: The path of the replica database.
+    """
+
+    read_bind = app.config.get('SQLALCHEMY_READ_BIND')
+
+    if not read_bind:
+        raise ValueError("SQLALCHEMY_READ_BIND is not configured")
+
+    with app.app_context():
+        primary = db.engines[None].url.database
+        replica = db.engines[read_bind].url.database
+
+    source = sqlite3.connect(primary)
+    target = sqlite3.connect(replica)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+    return replica
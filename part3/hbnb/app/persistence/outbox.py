@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.amenity import Amenity
+from app.models.change import Change
+from app.models.place import Place
+from app.models.review import Review
+from app.models.tombstone import Tombstone
+from app.models.user import User
+
+
+# Models whose changes are published in the feed, mapped to their entity name
+TRACKED = {User: 'user', Place: 'place', Review: 'review', Amenity: 'amenity'}
+
+
+def record_changes(entity, entity_ids, op, session=None):
+    """
+    Write outbox rows for changes made with Core statements.
+
+    ORM changes are recorded by the flush hook below; repositories writing
+    tracked tables with Core INSERT/UPDATE/DELETE statements call this
+    before committing, so the rows share the transaction of the change.
+    Deletions also leave tombstones.
+
+    Args:
+        entity (str): The entity name, a value of TRACKED.
+        entity_ids (iterable): The IDs of the changed entities.
+        op (str): 'created', 'updated' or 'deleted'.
+        session (Session, optional): The session to write with (db.session by default).
+    """
+
+    now = datetime.utcnow()
+    rows = [{'entity': entity, 'entity_id': entity_id, 'op': op, 'created_at': now} for entity_id in entity_ids]
+    write_changes(rows, (session or db.session).connection())
+
+
+def write_changes(rows, connection):
+    """
+    Insert change rows, and a tombstone for each deletion among them.
+    """
+
+    if rows:
+        connection.execute(Change.__table__.insert(), rows)
+    tombstones = [{'entity': row['entity'], 'entity_id': row['entity_id'], 'deleted_at': row['created_at']}
+                  for row in rows if row['op'] == 'deleted']
+    if tombstones:
+        connection.execute(Tombstone.__table__.insert(), tombstones)
+
+
+@event.listens_for(Session, 'after_flush')
+def record_flushed_changes(session, flush_context):
+    """
+    Write outbox rows (and tombstones) for the tracked objects a flush inserted, updated or deleted.
+
+    Runs after the flush (new objects have their IDs) and inside its
+    transaction; the session collections still hold the pre-flush state.
+    """
+
+    rows = []
+    now = datetime.utcnow()
+    for objects, op in ((session.new, 'created'), (session.dirty, 'updated'), (session.deleted, 'deleted')):
+        for obj in objects:
+            entity = TRACKED.get(type(obj))
+            if entity is None or op == 'updated' and not session.is_modified(obj):
+                continue
+            rows.append({'entity': entity, 'entity_id': obj.id, 'op': op, 'created_at': now})
+    write_changes(rows, session.connection())
@@ -0,0 +1,253 @@
+import operator
+import re
+
+from app import db
+
+
+MAX_COMPARISONS = 32
+
+NEGATED = {'=': '!=', '!=': '=', '<': '>=', '<=': '>', '>': '<=', '>=': '<'}
+
+TOKEN = re.compile(r'''\s*(?:
+    (?P<op><=|>=|!=|=|<|>)
+  | (?P<paren>[()])
+  | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<word>[^\s()<>=!"']+)
+)''', re.VERBOSE)
+
+NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?$')
+
+
+class QueryError(ValueError):
+    """
+    Raised for a filter or sort expression that cannot be parsed or used.
+    """
+
+
+def tokenize(text):
+    """
+    Split a filter expression into (kind, text) tokens.
+    """
+
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise QueryError('Unexpected character at position %d.' % position)
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'word' and value.lower() in ('and', 'or', 'not'):
+            kind = value.lower()
+        tokens.append((kind, value))
+    return tokens
+
+
+def parse_filter(text, fields):
+    """
+    Parse a filter expression into a tree of comparisons.
+
+    The grammar is `field op value` comparisons (op is one of = != < <= > >=)
+    combined with `and`, `or`, `not` and parentheses, `and` binding tighter
+    than `or`. Values are numbers, quoted strings or bare words. `not` is
+    pushed down to the comparisons while parsing, so the tree only holds
+    ('and', [...]), ('or', [...]) and ('cmp', field, op, value) nodes.
+
+    A comparison with a missing value (e.g. the rating of a place without
+    reviews) is false, whatever the operator, as in SQL.
+
+    Args:
+        text (str): The expression, e.g. `price<=120 and rating>=4`.
+        fields (dict): The allowed field names mapped to their type (float or str).
+
+    Returns:
+        tuple: The root node.
+
+    Raises:
+        QueryError: If the expression is malformed or uses an unknown field.
+    """
+
+    tokens = tokenize(text)
+    if not tokens:
+        raise QueryError('Empty filter.')
+    position = 0
+    comparisons = 0
+
+    def peek():
+        return tokens[position][0] if position < len(tokens) else None
+
+    def take(kind=None, expected='a value'):
+        nonlocal position
+        if position >= len(tokens):
+            raise QueryError('Expected %s at the end of the filter.' % expected)
+        if kind and tokens[position][0] != kind:
+            raise QueryError('Expected %s, got %r.' % (expected, tokens[position][1]))
+        position += 1
+        return tokens[position - 1]
+
+    def disjunction(negated):
+        children = [conjunction(negated)]
+        while peek() == 'or':
+            take()
+            children.append(conjunction(negated))
+        return combine('and' if negated else 'or', children)
+
+    def conjunction(negated):
+        children = [term(negated)]
+        while peek() == 'and':
+            take()
+            children.append(term(negated))
+        return combine('or' if negated else 'and', children)
+
+    def term(negated):
+        nonlocal comparisons
+        if peek() == 'not':
+            take()
+            return term(not negated)
+        if peek() == 'paren' and tokens[position][1] == '(':
+            take()
+            node = disjunction(negated)
+            if take('paren', "')'")[1] != ')':
+                raise QueryError("Expected ')', got '('.")
+            return node
+
+        field = take('word', 'a field')[1]
+        if field not in fields:
+            raise QueryError('Unknown field %r; expected one of %s.' % (field, ', '.join(sorted(fields))))
+        op = take('op', 'an operator after %s' % field)[1]
+        kind, raw = take(expected='a value after %s%s' % (field, op))
+        if kind == 'string':
+            value = re.sub(r'\\(.)', r'\1', raw[1:-1])
+        elif kind == 'word':
+            value = raw
+        else:
+            raise QueryError('Expected a value after %s%s.' % (field, op))
+        if fields[field] is float:
+            if kind == 'string' or not NUMBER.match(value):
+                raise QueryError('%s must be compared to a number.' % field)
+            value = float(value)
+
+        comparisons += 1
+        if comparisons > MAX_COMPARISONS:
+            raise QueryError('A filter may have at most %d comparisons.' % MAX_COMPARISONS)
+        return ('cmp', field, NEGATED[op] if negated else op, value)
+
+    node = disjunction(False)
+    if position < len(tokens):
+        raise QueryError('Unexpected %r.' % tokens[position][1])
+    return node
+
+
+def combine(kind, children):
+    """
+    Build an 'and'/'or' node, flattening nested nodes of the same kind.
+    """
+
+    if len(children) == 1:
+        return children[0]
+    flat = []
+    for child in children:
+        flat.extend(child[1] if child[0] == kind else [child])
+    return (kind, flat)
+
+
+def parse_sort(text, fields):
+    """
+    Parse a sort expression: comma-separated fields, `-` for descending.
+
+    Args:
+        text (str): The expression, e.g. `-rating,price`.
+        fields (iterable): The allowed field names.
+
+    Returns:
+        list: (field, descending) tuples, most significant first.
+    """
+
+    keys = []
+    for item in text.split(','):
+        item = item.strip()
+        descending = item.startswith('-')
+        field = item.lstrip('+-').strip()
+        if field not in fields:
+            raise QueryError('Cannot sort on %r; expected one of %s.' % (field, ', '.join(sorted(fields))))
+        if any(field == key for key, _ in keys):
+            raise QueryError('%s is sorted on twice.' % field)
+        keys.append((field, descending))
+    return keys
+
+
+OPERATORS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+def compile_filter(node, columns):
+    """
+    Compile a filter tree into a SQLAlchemy condition.
+
+    Args:
+        node (tuple): A tree returned by `parse_filter`.
+        columns (dict): Field names mapped to the column they compare.
+
+    Returns:
+        A condition for `select(...).where()`.
+    """
+
+    if node[0] == 'cmp':
+        _, field, op, value = node
+        return OPERATORS[op](columns[field], value)
+
+    children = [compile_filter(child, columns) for child in node[1]]
+    return db.and_(*children) if node[0] == 'and' else db.or_(*children)
+
+
+def compile_sort(keys, columns):
+    """
+    Compile (field, descending) sort keys into ORDER BY clauses.
+    """
+
+    return [columns[field].desc() if descending else columns[field].asc() for field, descending in keys]
+
+
+def leading_columns(table):
+    """
+    Return the names of the columns an index of a table (or its primary key) starts with.
+    """
+
+    names = {column.name for column in list(table.primary_key.columns)[:1]}
+    names.update(list(index.columns)[0].name for index in table.indexes)
+    return names
+
+
+def scan_fields(node, indexed):
+    """
+    Return the fields that force a full table scan to evaluate a filter tree.
+
+    A comparison can be answered from an index if its field leads one and it
+    is not `!=`; a conjunction if any of its terms can (the others are then
+    checked on the rows found); a disjunction only if all of its terms can.
+
+    Args:
+        node (tuple): A tree returned by `parse_filter`.
+        indexed (set): The fields leading an index.
+
+    Returns:
+        set: Empty if the matching rows can be found through indexes, the
+        unindexed fields responsible for the scan otherwise.
+    """
+
+    if node[0] == 'cmp':
+        _, field, op, _ = node
+        return set() if field in indexed and op != '!=' else {field}
+
+    results = [scan_fields(child, indexed) for child in node[1]]
+    if node[0] == 'and' and not all(results):
+        return set()
+    return set().union(*results)
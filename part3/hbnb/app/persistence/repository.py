@@ -1,7 +1,19 @@
 from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+from flask import current_app, g
+from sqlalchemy.exc import IntegrityError
 
 from app import db
+from app.models.amenity import Amenity
+from app.models.booking import Booking, BookingConflict, booking_night
+from app.models.change import Change
+from app.models.place import Place, place_amenity, place_lsh_band
+from app.models.review import Review
+from app.models.tombstone import Tombstone
 from app.models.user import User
+from app.persistence.outbox import TRACKED, record_changes
+from app.persistence.query import QueryError, compile_filter, compile_sort, leading_columns, scan_fields
 
 
 class Repository(ABC):
@@ -30,35 +42,171 @@ class Repository(ABC):
         pass
 
 
+def read_bind():
+    """
+    Return the engine reads should go to, or None to use the primary.
+
+    Reads go to the `SQLALCHEMY_READ_BIND` engine unless the current request
+    has already written (read-your-writes stickiness, see engine.py).
+    """
+
+    key = current_app.config.get('SQLALCHEMY_READ_BIND')
+
+    if not key or g.get('read_your_writes'):
+        return None
+
+    return db.engines[key]
+
+
 class SQLAlchemyRepository(Repository):
     def __init__(self, model):
         self.model = model
 
+    def _read(self, statement):
+        return self._read_rows(statement).scalars()
+
+    def _read_rows(self, statement):
+        bind = read_bind()
+        bind_arguments = {'bind': bind} if bind is not None else None
+        return db.session.execute(statement, bind_arguments=bind_arguments)
+
     def add(self, obj):
         db.session.add(obj)
         db.session.commit()
 
+    def add_rows(self, rows):
+        """
+        Insert many rows in one transaction, skipping the IDs already stored.
+
+        Skipping makes a replayed batch harmless. On failure the transaction
+        is rolled back, so the session can be used again right away (an
+        aborted PostgreSQL transaction rejects every further statement).
+
+        Args:
+            rows (list): Column values of the new objects, IDs included.
+
+        Raises:
+            IntegrityError: If a row violates a constraint; nothing is inserted.
+        """
+
+        try:
+            existing = set(db.session.execute(
+                db.select(self.model.id).where(self.model.id.in_([row['id'] for row in rows]))).scalars())
+            rows = [row for row in rows if row['id'] not in existing]
+            if rows:
+                db.session.execute(db.insert(self.model), rows)
+                if self.model in TRACKED:
+                    record_changes(TRACKED[self.model], [row['id'] for row in rows], 'created')
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def get_changed_since(self, since, after_id='', limit=100):
+        """
+        Return the objects changed or deleted after a keyset position, oldest first.
+
+        Positions are (updated_at, id) pairs: the page starts after
+        (`since`, `after_id`), so an empty `after_id` returns everything
+        updated at or after `since`, and the last item of a page is where
+        the next one starts. Live objects are read from the (updated_at, id)
+        index and deleted ones from the tombstones; both are merged in
+        position order.
+
+        `updated_at` is stamped when a row is flushed, not when it commits,
+        so as in `ChangeRepository.get_after`, changes more recent than
+        `CHANGES_SETTLE_SECONDS` are held back: a transaction committing
+        after a client read past its time would otherwise be skipped.
+
+        Args:
+            since (datetime): The update time to start from.
+            after_id (str, optional): The ID of the last item already seen at `since`.
+            limit (int, optional): The maximum number of items.
+
+        Returns:
+            list: (updated_at, id, object) tuples; the object is None for a deletion.
+        """
+
+        model = self.model
+        statement = db.select(model).where(
+            model.updated_at >= since, db.or_(model.updated_at > since, model.id > after_id))
+        settle = current_app.config.get('CHANGES_SETTLE_SECONDS', 0)
+        if settle:
+            until = datetime.utcnow() - timedelta(seconds=settle)
+            statement = statement.where(model.updated_at <= until)
+        objects = self._read(statement.order_by(model.updated_at, model.id).limit(limit)).all()
+        items = [(obj.updated_at, obj.id, obj) for obj in objects]
+
+        if model in TRACKED:
+            statement = db.select(Tombstone.deleted_at, Tombstone.entity_id).where(
+                Tombstone.entity == TRACKED[model], Tombstone.deleted_at >= since,
+                db.or_(Tombstone.deleted_at > since, Tombstone.entity_id > after_id))
+            if settle:
+                statement = statement.where(Tombstone.deleted_at <= until)
+            items += [(deleted_at, entity_id, None) for deleted_at, entity_id in self._read_rows(
+                statement.order_by(Tombstone.deleted_at, Tombstone.entity_id).limit(limit))]
+
+        return sorted(items, key=lambda item: item[:2])[:limit]
+
     def get(self, obj_id):
-        return self.model.query.get(obj_id)
+        bind = read_bind()
+        if bind is None:
+            return db.session.get(self.model, obj_id)
+        return db.session.get(self.model, obj_id, bind_arguments={'bind': bind})
+
+    def get_for_write(self, obj_id, lock=False):
+        """
+        Return an object about to be modified, read from the primary.
+
+        A replica may lag behind: the row is reloaded from the primary even
+        if the session already holds a copy read from the replica. With
+        `lock`, the row is also locked (SELECT ... FOR UPDATE) until the
+        transaction ends, so concurrent writers of the object run one after
+        the other.
+        """
+
+        return db.session.get(self.model, obj_id, populate_existing=True, with_for_update=lock)
 
     def get_all(self):
-        return self.model.query.all()
+        return self._read(db.select(self.model)).all()
 
     def update(self, obj_id, data):
-        obj = self.get(obj_id)
+        obj = self.get_for_write(obj_id)
         if obj:
             for key, value in data.items():
                 setattr(obj, key, value)
             db.session.commit()
 
     def delete(self, obj_id):
-        obj = self.get(obj_id)
+        obj = self.get_for_write(obj_id)
         if obj:
             db.session.delete(obj)
             db.session.commit()
 
     def get_by_attribute(self, attr_name, attr_value):
-        return self.model.query.filter_by(**{attr_name: attr_value}).first()
+        return self._read(db.select(self.model).filter_by(**{attr_name: attr_value}).limit(1)).first()
+
+    def get_for_write_by(self, **values):
+        """
+        Return the first object matching all the given attribute values, read
+        from the primary, e.g. to check for a duplicate before inserting one.
+        """
+
+        return db.session.execute(db.select(self.model).filter_by(**values).limit(1)).scalars().first()
+
+    def get_many(self, values, attr_name='id'):
+        """
+        Return the objects whose attribute (the ID by default) is one of
+        `values`, in one `IN (...)` query.
+
+        Values matching no object are simply absent from the result.
+        """
+
+        values = list(set(values))
+        if not values:
+            return []
+        column = getattr(self.model, attr_name)
+        return self._read(db.select(self.model).where(column.in_(values))).all()
 
 
 class UserRepository(SQLAlchemyRepository):
@@ -66,4 +214,434 @@ class UserRepository(SQLAlchemyRepository):
         super().__init__(User)
 
     def get_by_email(self, email):
-        return self.model.query.filter_by(email=email).first()
\ No newline at end of file
+        return self.get_by_attribute('email', email)
+
+
+class PlaceRepository(SQLAlchemyRepository):
+    # Fields of the filter and sort expressions, mapped to (type, column)
+    query_fields = {
+        'title': (str, Place._title),
+        'owner_id': (str, Place._owner_id),
+        'price': (float, Place._price),
+        'latitude': (float, Place._latitude),
+        'longitude': (float, Place._longitude),
+        'rating': (float, Place.rating),
+        'reviews': (float, Place.review_count),
+    }
+
+    def __init__(self):
+        super().__init__(Place)
+        leading = leading_columns(Place.__table__)
+        self.indexed_fields = {name for name, (_, column) in self.query_fields.items()
+                               if column.expression.name in leading}
+
+    def get_amenity_ids(self, place_id):
+        """
+        Return the set of amenity IDs attached to a place.
+        """
+
+        return set(self._read(self._amenity_ids_of(place_id)))
+
+    @staticmethod
+    def _amenity_ids_of(place_id):
+        return db.select(place_amenity.c.amenity_id).where(place_amenity.c.place_id == place_id)
+
+    def update_with_amenities(self, place_id, data, amenity_ids=None):
+        """
+        Update the fields and, if given, the amenities of a place in one transaction.
+
+        The fields are set first, so an invalid value is rejected before
+        anything is written. The place row is locked before the amenity
+        difference is computed, so concurrent updates of a place see each
+        other's rows; where the lock is not supported (SQLite), an insert
+        racing another one fails on the primary key and is retried once.
+
+        Args:
+            place_id (str): The ID of the place.
+            data (dict): New values of the place fields.
+            amenity_ids (iterable, optional): The complete new set of amenity IDs.
+
+        Returns:
+            tuple: The place (None if not found) and the sets of attached and detached amenity IDs.
+
+        Raises:
+            ValueError: If a field value is invalid; nothing is written.
+        """
+
+        for attempt in range(2):
+            place = self.get_for_write(place_id, lock=True)
+            if place is None:
+                return None, set(), set()
+            try:
+                for key, value in data.items():
+                    if not hasattr(place, key):
+                        raise AttributeError(f"Attribute {key} not found on Place.")
+                    setattr(place, key, value)
+                attached = detached = set()
+                if amenity_ids is not None:
+                    attached, detached = self._set_amenities(place_id, amenity_ids)
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                if attempt:
+                    raise
+                continue
+            except Exception:
+                db.session.rollback()
+                raise
+            return place, attached, detached
+
+    def _set_amenities(self, place_id, amenity_ids):
+        """
+        Make the amenities of a place exactly `amenity_ids`, without committing.
+
+        Only the difference with the current rows is written: one DELETE for
+        the detached amenities and one multi-row INSERT for the attached ones.
+
+        Returns:
+            tuple: The sets of attached and detached amenity IDs.
+        """
+
+        amenity_ids = set(amenity_ids)
+        # Read from the primary: the diff must be computed against what is written
+        current = set(db.session.execute(self._amenity_ids_of(place_id)).scalars())
+        attached = amenity_ids - current
+        detached = current - amenity_ids
+
+        if detached:
+            db.session.execute(place_amenity.delete().where(
+                place_amenity.c.place_id == place_id,
+                place_amenity.c.amenity_id.in_(detached)))
+        if attached:
+            db.session.execute(place_amenity.insert().values(
+                [{'place_id': place_id, 'amenity_id': amenity_id} for amenity_id in attached]))
+        if attached or detached:
+            db.session.execute(
+                db.update(Place).where(Place.id == place_id).values(updated_at=datetime.utcnow()),
+                execution_options={'synchronize_session': False})
+            record_changes('place', [place_id], 'updated')
+            place = db.session.get(Place, place_id)
+            if place is not None:
+                db.session.expire(place, ['amenities'])
+
+        return attached, detached
+
+    def get_with_all_amenities(self, amenity_ids):
+        """
+        Return the places having every one of the given amenities.
+
+        Answered from the amenity-side index of the association table.
+        """
+
+        amenity_ids = set(amenity_ids)
+        if not amenity_ids:
+            return self.get_all()
+        return self._read(db.select(Place).where(Place.id.in_(self._with_all_amenities(amenity_ids)))).all()
+
+    @staticmethod
+    def _with_all_amenities(amenity_ids):
+        return (db.select(place_amenity.c.place_id)
+                .where(place_amenity.c.amenity_id.in_(amenity_ids))
+                .group_by(place_amenity.c.place_id)
+                .having(db.func.count() == len(amenity_ids)))
+
+    def find(self, node=None, sort=(), amenity_ids=None):
+        """
+        Return the places matching a filter tree, in the order of sort keys.
+
+        The filter and sort are compiled into one SELECT. A filter the
+        database could only answer by scanning the whole table (no term on
+        an indexed field narrows it down) is logged as a warning, or
+        rejected if the `QUERY_UNINDEXED_FILTERS` setting is 'reject'.
+
+        Args:
+            node (tuple, optional): A tree returned by `parse_filter`.
+            sort (list, optional): (field, descending) keys returned by `parse_sort`.
+            amenity_ids (iterable, optional): Amenities the places must all have.
+
+        Raises:
+            QueryError: If the filter is rejected for lack of an index.
+        """
+
+        columns = {name: column for name, (_, column) in self.query_fields.items()}
+        statement = db.select(Place)
+
+        if amenity_ids is not None:
+            amenity_ids = set(amenity_ids)
+            if amenity_ids:
+                statement = statement.where(Place.id.in_(self._with_all_amenities(amenity_ids)))
+
+        if node is not None:
+            unindexed = scan_fields(node, self.indexed_fields)
+            if unindexed and not amenity_ids:
+                message = 'Filter on %s needs a full table scan; add a condition on one of %s.' % (
+                    ', '.join(sorted(unindexed)), ', '.join(sorted(self.indexed_fields)))
+                if current_app.config.get('QUERY_UNINDEXED_FILTERS', 'warn') == 'reject':
+                    raise QueryError(message)
+                current_app.logger.warning(message)
+            statement = statement.where(compile_filter(node, columns))
+
+        statement = statement.order_by(*compile_sort(sort, columns), Place.id)
+        return self._read(statement).all()
+
+    def get_suggestion_rows(self):
+        """
+        Return (id, title, review count) rows for every place, to fill the title autocomplete.
+        """
+
+        return self._read_rows(db.select(Place.id, Place._title, Place.review_count)).all()
+
+    def refresh_rating(self, place_id):
+        """
+        Recompute the average rating and review count of a place from its reviews.
+
+        Done in one UPDATE with subqueries, so concurrent review writes
+        cannot leave a stale value behind the last of them.
+        """
+
+        reviews = db.select(Review.rating).where(Review.place_id == place_id).subquery()
+        db.session.execute(
+            db.update(Place).where(Place.id == place_id).values(
+                rating=db.select(db.func.avg(reviews.c.rating)).scalar_subquery(),
+                review_count=db.select(db.func.count()).select_from(reviews).scalar_subquery()),
+            execution_options={'synchronize_session': False})
+        record_changes('place', [place_id], 'updated')
+        db.session.commit()
+        place = db.session.get(Place, place_id)
+        if place is not None:
+            db.session.expire(place, ['rating', 'review_count'])
+        return place
+
+    def set_signature(self, place_id, signature, buckets):
+        """
+        Store the MinHash signature of a place and replace its LSH band rows.
+
+        Args:
+            place_id (str): The ID of the place.
+            signature (bytes): Its signature, or None for a place without text.
+            buckets (list): Its (band, bucket) pairs.
+        """
+
+        self._write_signatures([(place_id, signature, buckets)])
+        db.session.commit()
+        place = db.session.get(Place, place_id)
+        if place is not None:
+            db.session.expire(place, ['text_signature'])
+
+    def store_signatures(self, rows):
+        """
+        Store the signatures of many places in bulk, in one transaction.
+
+        Args:
+            rows (list): (place_id, signature, buckets) tuples.
+        """
+
+        self._write_signatures(rows)
+        db.session.commit()
+
+    @staticmethod
+    def _write_signatures(rows):
+        if not rows:
+            return
+        place_ids = [place_id for place_id, _, _ in rows]
+        db.session.execute(place_lsh_band.delete().where(place_lsh_band.c.place_id.in_(place_ids)))
+        places = Place.__table__
+        db.session.execute(
+            places.update().where(places.c.id == db.bindparam('place_id'))
+            # Keep updated_at: a signature is derived data, not a change clients sync
+            .values(text_signature=db.bindparam('signature'), updated_at=places.c.updated_at),
+            [{'place_id': place_id, 'signature': signature} for place_id, signature, _ in rows])
+        bands = [{'place_id': place_id, 'band': band, 'bucket': bucket}
+                 for place_id, _, buckets in rows for band, bucket in buckets]
+        if bands:
+            db.session.execute(place_lsh_band.insert(), bands)
+
+    def get_signature_candidates(self, place_id):
+        """
+        Return the places sharing an LSH bucket with a place, with their signatures.
+
+        Answered from the (band, bucket) index: only the places colliding
+        with one of the bands of `place_id` are read.
+
+        Returns:
+            list: (place_id, title, signature) rows.
+        """
+
+        own = db.select(place_lsh_band.c.band, place_lsh_band.c.bucket).where(
+            place_lsh_band.c.place_id == place_id).subquery()
+        colliding = (db.select(place_lsh_band.c.place_id)
+                     .join(own, db.and_(place_lsh_band.c.band == own.c.band,
+                                        place_lsh_band.c.bucket == own.c.bucket))
+                     .where(place_lsh_band.c.place_id != place_id))
+        return self._read_rows(
+            db.select(Place.id, Place._title, Place.text_signature).where(Place.id.in_(colliding))).all()
+
+    def get_candidate_pairs(self):
+        """
+        Return every pair of places sharing at least one LSH bucket, with their signatures.
+
+        A self-join of the band table on (band, bucket); each pair is
+        returned once, lowest ID first.
+
+        Returns:
+            list: (id, title, signature, other id, other title, other signature) rows.
+        """
+
+        a = place_lsh_band.alias('a')
+        b = place_lsh_band.alias('b')
+        pairs = (db.select(a.c.place_id.label('first'), b.c.place_id.label('second'))
+                 .join(b, db.and_(a.c.band == b.c.band, a.c.bucket == b.c.bucket, a.c.place_id < b.c.place_id))
+                 .distinct().subquery())
+        first = db.aliased(Place)
+        second = db.aliased(Place)
+        return self._read_rows(
+            db.select(first.id, first._title, first.text_signature, second.id, second._title, second.text_signature)
+            .select_from(pairs)
+            .join(first, first.id == pairs.c.first)
+            .join(second, second.id == pairs.c.second)).all()
+
+    def get_ids_in_bbox(self, south, west, north, east):
+        """
+        Return the IDs of the places inside a bounding box, from the (latitude, longitude) index.
+        """
+
+        return self._read(db.select(Place.id).where(
+            Place._latitude.between(south, north), Place._longitude.between(west, east))).all()
+
+    def iter_texts(self, batch_size=1000):
+        """
+        Yield the (id, title, description) rows of every place, in batches.
+
+        Paged on the primary key, so each batch is one indexed range read.
+        """
+
+        last_id = ''
+        while True:
+            batch = self._read_rows(
+                db.select(Place.id, Place._title, Place._description)
+                .where(Place.id > last_id).order_by(Place.id).limit(batch_size)).all()
+            if not batch:
+                return
+            yield [tuple(row) for row in batch]
+            last_id = batch[-1][0]
+
+
+class AmenityRepository(SQLAlchemyRepository):
+    def __init__(self):
+        super().__init__(Amenity)
+
+    def get_suggestion_rows(self):
+        """
+        Return (id, name, number of places) rows for every amenity, to fill the name autocomplete.
+        """
+
+        return self._read_rows(
+            db.select(Amenity.id, Amenity.name, db.func.count(place_amenity.c.place_id))
+            .outerjoin(place_amenity, place_amenity.c.amenity_id == Amenity.id)
+            .group_by(Amenity.id, Amenity.name)).all()
+
+    def count_places(self, amenity_ids):
+        """
+        Return the number of places having each amenity, from the amenity-side index.
+
+        Returns:
+            dict: Amenity IDs mapped to their number of places (0 included).
+        """
+
+        amenity_ids = set(amenity_ids)
+        if not amenity_ids:
+            return {}
+        counts = dict(db.session.execute(
+            db.select(place_amenity.c.amenity_id, db.func.count())
+            .where(place_amenity.c.amenity_id.in_(amenity_ids))
+            .group_by(place_amenity.c.amenity_id)).all())
+        return {amenity_id: counts.get(amenity_id, 0) for amenity_id in amenity_ids}
+
+
+class BookingRepository(SQLAlchemyRepository):
+    def __init__(self):
+        super().__init__(Booking)
+
+    def add(self, booking):
+        """
+        Insert a booking and one row per night, in one transaction.
+
+        The (place_id, night) primary key of the night rows makes the second
+        of two overlapping bookings fail on insert, so concurrent requests
+        cannot double-book a place and no lock is taken.
+
+        Raises:
+            BookingConflict: If a night is already booked.
+        """
+
+        db.session.add(booking)
+        try:
+            db.session.flush()
+            db.session.execute(booking_night.insert(), [
+                {'place_id': booking.place_id, 'night': night, 'booking_id': booking.id}
+                for night in booking.nights])
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            raise BookingConflict('The place is already booked for some of these nights.')
+
+    def delete(self, obj_id):
+        booking = self.get_for_write(obj_id)
+        if booking:
+            db.session.execute(booking_night.delete().where(booking_night.c.booking_id == obj_id))
+            db.session.delete(booking)
+            db.session.commit()
+
+    def get_by_place(self, place_id, since=None):
+        """
+        Return the bookings of a place, by check-in date, ending after `since` if given.
+        """
+
+        statement = db.select(Booking).where(Booking.place_id == place_id)
+        if since is not None:
+            statement = statement.where(Booking.check_out > since)
+        return self._read(statement.order_by(Booking.check_in)).all()
+
+    def get_calendar_rows(self):
+        """
+        Return (id, place_id, check_in, check_out) rows for every booking not over yet, to fill the calendar.
+        """
+
+        today = datetime.utcnow().date()
+        return self._read_rows(
+            db.select(Booking.id, Booking.place_id, Booking.check_in, Booking.check_out)
+            .where(Booking.check_out > today)).all()
+
+
+class ChangeRepository(SQLAlchemyRepository):
+    def __init__(self):
+        super().__init__(Change)
+
+    def get_after(self, after, limit):
+        """
+        Return the changes following a position of the feed, in order.
+
+        One range read on the primary key. With `CHANGES_SETTLE_SECONDS`
+        set, the most recent changes are held back that long: on databases
+        running transactions concurrently, a lower `seq` may commit after a
+        higher one, and a client whose cursor already passed it would miss it.
+
+        Args:
+            after (int): The last `seq` the client has seen (0 for the start).
+            limit (int): The maximum number of changes.
+        """
+
+        statement = db.select(Change).where(Change.seq > after)
+        settle = current_app.config.get('CHANGES_SETTLE_SECONDS', 0)
+        if settle:
+            statement = statement.where(Change.created_at <= datetime.utcnow() - timedelta(seconds=settle))
+        return self._read(statement.order_by(Change.seq).limit(limit)).all()
+
+    def prune(self, before):
+        """
+        Delete the changes written before a date; return how many.
+        """
+
+        result = db.session.execute(db.delete(Change).where(Change.created_at < before))
+        db.session.commit()
+        return result.rowcount
@@ -0,0 +1,48 @@
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+from app.services.facade import HBnBFacade
+from app.services.write_behind import ReviewWriteQueue
+
+
+def init_facade(app):
+    """
+    Create the single HBnBFacade shared by every namespace of the application.
+
+    The facade (and the repositories it owns) is stored in `app.extensions`
+    so that caches, indexes and pools are built once per application instead
+    of once per API module.
+
+    Args:
+        app (Flask): The application to register the facade on.
+
+    Returns:
+        HBnBFacade: The registered facade.
+    """
+
+    instance = HBnBFacade(
+        suggest_refresh_interval=app.config.get('SUGGEST_REFRESH_INTERVAL', 60),
+        availability_refresh_interval=app.config.get('AVAILABILITY_REFRESH_INTERVAL', 30),
+        app=app
+    )
+    if app.config.get('REVIEW_WRITE_BEHIND'):
+        instance.review_queue = ReviewWriteQueue(
+            app, instance.write_reviews,
+            flush_interval=app.config.get('REVIEW_FLUSH_INTERVAL_MS', 50) / 1000,
+            max_batch=app.config.get('REVIEW_FLUSH_MAX_ROWS', 200),
+            journal_dir=app.config.get('REVIEW_JOURNAL_DIR'),
+            sync=app.config.get('REVIEW_JOURNAL_SYNC', 'fsync')
+        )
+    app.extensions['hbnb_facade'] = instance
+    return instance
+
+
+def get_facade():
+    """
+    Return the facade registered on the current application.
+    """
+
+    return current_app.extensions['hbnb_facade']
+
+
+facade = LocalProxy(get_facade)
@@ -0,0 +1,283 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+
+
+class IntervalList:
+    """
+    The bookings of one place, as a sorted list of disjoint [start, end) intervals.
+
+    Intervals never overlap (the database rejects overlapping bookings), so
+    sorting by start also sorts by end and "is [start, end) free" only has
+    to look at the two intervals around `start`: O(log n) with bisect.
+
+    Attributes:
+        starts (list): Start days (ordinals), sorted.
+        ends (list): End days (ordinals), in the same order.
+        ids (list): Booking IDs, in the same order.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty list.
+        """
+
+        self.starts = []
+        self.ends = []
+        self.ids = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def is_free(self, start, end):
+        """
+        Tell whether no interval overlaps the days [start, end).
+        """
+
+        position = bisect_right(self.starts, start)
+        if position and self.ends[position - 1] > start:
+            return False
+        return position == len(self.starts) or self.starts[position] >= end
+
+    def overlapping(self, start, end):
+        """
+        Return the (start, end, booking ID) intervals overlapping the days [start, end).
+        """
+
+        position = max(bisect_right(self.starts, start) - 1, 0)
+        if position < len(self.starts) and self.ends[position] <= start:
+            position += 1
+        stop = bisect_left(self.starts, end, position)
+        return list(zip(self.starts[position:stop], self.ends[position:stop], self.ids[position:stop]))
+
+    def add(self, start, end, booking_id):
+        position = bisect_left(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.ids.insert(position, booking_id)
+
+    def remove(self, start, booking_id):
+        position = bisect_left(self.starts, start)
+        while position < len(self.starts) and self.starts[position] == start:
+            if self.ids[position] == booking_id:
+                del self.starts[position], self.ends[position], self.ids[position]
+                return
+            position += 1
+
+
+class AvailabilityCalendar:
+    """
+    In-memory booking calendar of every place, for availability queries.
+
+    Each place has an IntervalList, answering "is it free from X to Y" in
+    O(log n), and a bitmap of its booked nights (bit i set if night
+    `origin + i` is booked, in an int), so filtering many places for the
+    same dates, e.g. the places of a bounding box, costs one AND per place.
+    Nights before `origin` (the first day of the calendar) are dropped.
+
+    Bookings are written to the database first, which rejects overlaps;
+    the calendar only mirrors them. With a `load` function, it fills itself
+    on first use and reloads every `refresh_interval` seconds, to pick up
+    bookings made by other processes; writes made meanwhile in this process
+    are replayed on top (adding or removing a booking twice is harmless).
+    Only the first load blocks; later ones run in a background thread.
+
+    Attributes:
+        origin (int): The ordinal of the first day covered by the bitmaps.
+        _intervals (dict): Place IDs mapped to their IntervalList.
+        _bitmaps (dict): Place IDs mapped to the bitmap of their booked nights.
+        _bookings (dict): Booking IDs mapped to (place ID, start, end).
+        _lock (threading.Lock): Serializes writes.
+    """
+
+    def __init__(self, load=None, refresh_interval=None):
+        """
+        Initialize an empty calendar.
+
+        Args:
+            load (callable, optional): Returns (booking ID, place ID, check-in, check-out) rows.
+            refresh_interval (float, optional): Seconds after which `load` is called again.
+        """
+
+        self.load = load
+        self.refresh_interval = refresh_interval
+        self._loaded_at = None
+        self._loading = threading.Lock()
+        self._pending = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    @staticmethod
+    def today():
+        return datetime.utcnow().date().toordinal()
+
+    def _reset(self):
+        self.origin = self.today()
+        self._intervals = {}
+        self._bitmaps = {}
+        self._bookings = {}
+
+    def _mask(self, start, end):
+        """
+        Return the bitmap of the nights [start, end), clipped to the origin.
+        """
+
+        start = max(start - self.origin, 0)
+        end = end - self.origin
+        if end <= start:
+            return 0
+        return ((1 << (end - start)) - 1) << start
+
+    def _add(self, booking_id, place_id, start, end):
+        if booking_id in self._bookings:
+            return
+        self._bookings[booking_id] = (place_id, start, end)
+        self._intervals.setdefault(place_id, IntervalList()).add(start, end, booking_id)
+        self._bitmaps[place_id] = self._bitmaps.get(place_id, 0) | self._mask(start, end)
+
+    def _remove(self, booking_id):
+        booking = self._bookings.pop(booking_id, None)
+        if booking is None:
+            return
+        place_id, start, end = booking
+        intervals = self._intervals[place_id]
+        intervals.remove(start, booking_id)
+        bitmap = self._bitmaps[place_id] & ~self._mask(start, end)
+        if intervals:
+            self._bitmaps[place_id] = bitmap
+        else:
+            del self._intervals[place_id], self._bitmaps[place_id]
+
+    def _write(self, method, *args):
+        with self._lock:
+            method(*args)
+            if self._pending is not None:
+                self._pending.append((method, args))
+
+    def add(self, booking_id, place_id, check_in, check_out):
+        """
+        Add a booking.
+
+        Args:
+            booking_id (str): The ID of the booking.
+            place_id (str): The ID of the booked place.
+            check_in (date): The first night.
+            check_out (date): The day of departure.
+        """
+
+        self._write(self._add, booking_id, place_id, check_in.toordinal(), check_out.toordinal())
+
+    def remove(self, booking_id):
+        """
+        Remove a booking.
+        """
+
+        self._write(self._remove, booking_id)
+
+    def rebuild(self, rows):
+        """
+        Replace the content of the calendar.
+
+        Args:
+            rows (iterable): (booking ID, place ID, check-in, check-out) tuples.
+        """
+
+        calendar = AvailabilityCalendar()
+        for booking_id, place_id, check_in, check_out in rows:
+            calendar._add(booking_id, place_id, check_in.toordinal(), check_out.toordinal())
+
+        with self._lock:
+            self.origin = calendar.origin
+            self._intervals = calendar._intervals
+            self._bitmaps = calendar._bitmaps
+            self._bookings = calendar._bookings
+
+    def _reload(self):
+        """
+        Call `load` and rebuild from its rows, replaying the writes made meanwhile.
+        """
+
+        with self._lock:
+            self._pending = []
+        try:
+            self.rebuild(self.load())
+        finally:
+            with self._lock:
+                pending, self._pending = self._pending, None
+                for method, args in pending:
+                    method(*args)
+        self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self.load is None:
+            if self.origin != self.today():
+                # The bitmaps shift by one night per day
+                self.rebuild([(booking_id, place_id, *map(date.fromordinal, days))
+                              for booking_id, (place_id, *days) in list(self._bookings.items())])
+            return
+        if self._loaded_at is None:
+            with self._loading:
+                if self._loaded_at is None:
+                    self._reload()
+        elif (self.refresh_interval is not None and time.monotonic() - self._loaded_at >= self.refresh_interval
+              or self.origin != self.today()):
+            # Answers stay correct from the current bitmaps (an old origin only
+            # keeps past nights) until the reload swaps in the new ones
+            self.reload_in_background()
+
+    def reload_in_background(self):
+        """
+        Start a reload in a daemon thread, unless one is already running.
+        """
+
+        if not self._loading.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self._reload()
+            except Exception:
+                # Retry after another interval, not on every call until then
+                self._loaded_at = time.monotonic()
+                raise
+            finally:
+                self._loading.release()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def is_free(self, place_id, check_in, check_out):
+        """
+        Tell whether a place has no booking from `check_in` to `check_out`, in O(log n).
+        """
+
+        self._ensure_loaded()
+        intervals = self._intervals.get(place_id)
+        return intervals is None or intervals.is_free(check_in.toordinal(), check_out.toordinal())
+
+    def bookings(self, place_id, check_in, check_out):
+        """
+        Return the bookings of a place overlapping a stay.
+
+        Returns:
+            list: (check-in, check-out, booking ID) tuples, in date order.
+        """
+
+        self._ensure_loaded()
+        intervals = self._intervals.get(place_id)
+        if intervals is None:
+            return []
+        return [(date.fromordinal(start), date.fromordinal(end), booking_id)
+                for start, end, booking_id in intervals.overlapping(check_in.toordinal(), check_out.toordinal())]
+
+    def free_places(self, place_ids, check_in, check_out):
+        """
+        Return the places of `place_ids` with no booking from `check_in` to `check_out`.
+
+        Checked against the bitmaps, one AND per place.
+        """
+
+        self._ensure_loaded()
+        mask = self._mask(check_in.toordinal(), check_out.toordinal())
+        bitmaps = self._bitmaps
+        return [place_id for place_id in place_ids if not bitmaps.get(place_id, 0) & mask]
@@ -0,0 +1,113 @@
+import hashlib
+import os
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.services.suggestions import normalize
+
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+DUPLICATE_THRESHOLD = 0.8
+
+# Multiply-shift hash functions h(x) = (a * x + b) >> 32 over 64 bits, a odd;
+# fixed seed, so signatures stay comparable across processes and restarts
+_generator = np.random.default_rng(20240601)
+_A = _generator.integers(1, 2 ** 63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _generator.integers(0, 2 ** 63, NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text):
+    """
+    Return the set of CRC32 hashes of the character shingles of a normalized text.
+    """
+
+    text = normalize(text)
+    if len(text) <= SHINGLE_SIZE:
+        return {zlib.crc32(text.encode())} if text else set()
+    return {zlib.crc32(text[i:i + SHINGLE_SIZE].encode()) for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(title, description=None):
+    """
+    Return the MinHash signature of a listing, as bytes.
+
+    Each of the NUM_PERM hash functions keeps the minimum hash of the
+    shingles of the title and description; two signatures agree on a
+    position with probability equal to the Jaccard similarity of the two
+    shingle sets.
+
+    Returns:
+        bytes: NUM_PERM little-endian uint32 values, or None for an empty text.
+    """
+
+    hashes = shingles('%s %s' % (title or '', description or ''))
+    if not hashes:
+        return None
+    values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+    with np.errstate(over='ignore'):
+        permuted = (_A[:, None] * values[None, :] + _B[:, None]) >> np.uint64(32)
+    return permuted.min(axis=1).astype('<u4').tobytes()
+
+
+def band_buckets(signature):
+    """
+    Return the LSH buckets of a signature: one (band, bucket) pair per band.
+
+    Signatures are cut into BANDS bands of ROWS values; listings sharing a
+    bucket in any band are candidate duplicates. With 16 bands of 8 rows,
+    pairs above a Jaccard similarity of about 0.7 collide with high
+    probability and dissimilar pairs almost never do.
+    """
+
+    buckets = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(signature[band * ROWS * 4:(band + 1) * ROWS * 4], digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, 'little', signed=True)))
+    return buckets
+
+
+def estimated_similarity(signature, other):
+    """
+    Return the share of equal positions of two signatures (the estimated Jaccard similarity).
+    """
+
+    return float(np.mean(np.frombuffer(signature, '<u4') == np.frombuffer(other, '<u4')))
+
+
+def _signatures(rows):
+    return [(place_id, minhash(title, description)) for place_id, title, description in rows]
+
+
+def compute_signatures(batches, workers=None):
+    """
+    Compute the signatures of batches of listings in a process pool.
+
+    At most two batches per worker are in flight, so the catalogue is never
+    held in memory as a whole.
+
+    Args:
+        batches (iterable): Lists of (place_id, title, description) rows.
+        workers (int, optional): The number of processes (all cores by default).
+
+    Yields:
+        list: (place_id, signature) pairs, one list per batch, in order.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from map(_signatures, batches)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(_signatures, batch))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -1,18 +1,59 @@
+import uuid
+from datetime import datetime
+
 from app.models.user import User
 from app.models.place import Place
 from app.models.amenity import Amenity
 from app.models.review import Review
+from app.models.booking import Booking
 from app.persistence.repository import SQLAlchemyRepository
 from app.persistence.repository import UserRepository
+from app.persistence.repository import PlaceRepository
+from app.persistence.repository import AmenityRepository
+from app.persistence.repository import BookingRepository
+from app.persistence.repository import ChangeRepository
+from app.persistence.query import parse_filter, parse_sort
+from app.services.suggestions import PrefixIndex
+from app.services.availability import AvailabilityCalendar
+from app.services.duplicates import DUPLICATE_THRESHOLD, band_buckets, compute_signatures, estimated_similarity, minhash
 from app import bcrypt
 
 
+def in_app_context(app, load):
+    """
+    Wrap a loader so it runs in its own application context (and database
+    session), as the periodic reloads of the in-memory indexes run in a
+    background thread. Returned as is without an application.
+    """
+
+    if app is None:
+        return load
+
+    def run():
+        with app.app_context():
+            return load()
+
+    return run
+
+
 class HBnBFacade:
-    def __init__(self):
+    def __init__(self, suggest_refresh_interval=60, availability_refresh_interval=30, app=None):
         self.user_repo = UserRepository()
-        self.place_repo = SQLAlchemyRepository(Place)
+        self.place_repo = PlaceRepository()
         self.review_repo = SQLAlchemyRepository(Review)
-        self.amenity_repo = SQLAlchemyRepository(Amenity)
+        self.amenity_repo = AmenityRepository()
+        self.booking_repo = BookingRepository()
+        self.change_repo = ChangeRepository()
+        # ReviewWriteQueue set by init_facade when REVIEW_WRITE_BEHIND is on
+        self.review_queue = None
+        # Autocomplete served from memory, weighted by review and place counts
+        self.place_suggestions = PrefixIndex(load=in_app_context(app, self.place_repo.get_suggestion_rows),
+                                             refresh_interval=suggest_refresh_interval)
+        self.amenity_suggestions = PrefixIndex(load=in_app_context(app, self.amenity_repo.get_suggestion_rows),
+                                               refresh_interval=suggest_refresh_interval)
+        # Availability served from memory; the database is authoritative on overlaps
+        self.availability = AvailabilityCalendar(load=in_app_context(app, self.booking_repo.get_calendar_rows),
+                                                 refresh_interval=availability_refresh_interval)
 
     def create_user(self, user_data):
         """Create a new user with the given data."""
@@ -34,7 +75,7 @@ class HBnBFacade:
 
     def update_user(self, user_id, updated_data):
         """ Update an existing user by its ID."""
-        user = self.user_repo.get(user_id)
+        user = self.user_repo.get_for_write(user_id)
         if not user:
             return None
         user.update(updated_data)
@@ -48,6 +89,7 @@ class HBnBFacade:
         
         amenity = Amenity(name=amenity_data['name'])
         self.amenity_repo.add(amenity)
+        self.amenity_suggestions.set(amenity.id, amenity.name, 0)
         return amenity
 
     def get_amenity(self, amenity_id):
@@ -61,9 +103,17 @@ class HBnBFacade:
         """Retrieve all amenities."""
         return self.amenity_repo.get_all()
 
+    def get_amenities(self, amenity_ids):
+        """Retrieve several amenities by ID in one query; raise if one is missing."""
+        amenity_ids = {a.get('id') if isinstance(a, dict) else a for a in amenity_ids}
+        amenities = self.amenity_repo.get_many(amenity_ids)
+        if len(amenities) != len(amenity_ids):
+            raise ValueError("Invalid amenity ID.")
+        return amenities
+
     def update_amenity(self, amenity_id, amenity_data):
         """Update an existing amenity by its ID."""
-        amenity = self.amenity_repo.get(amenity_id)
+        amenity = self.amenity_repo.get_for_write(amenity_id)
         if not amenity:
             raise ValueError("Amenity not found")
 
@@ -71,12 +121,28 @@ class HBnBFacade:
             amenity.name = amenity_data['name']
         
         self.amenity_repo.add(amenity)
+        self.amenity_suggestions.set(amenity.id, amenity.name)
         return amenity
 
+    def suggest_amenities(self, prefix, limit=10):
+        """ Suggest amenities whose name starts with a prefix, most used first."""
+        return self.amenity_suggestions.suggest(prefix, limit)
+
+    def refresh_amenity_weights(self, amenity_ids):
+        """ Update the place counts the amenity suggestions are weighted by."""
+        for amenity_id, count in self.amenity_repo.count_places(amenity_ids).items():
+            self.amenity_suggestions.set(amenity_id, weight=count)
+
     def create_place(self, place_data):
         """ Create a new place with the given data."""
+        place_data = dict(place_data)
+        amenities = self.get_amenities(place_data.pop('amenities', None) or [])
         place = Place(**place_data)
+        place.amenities = amenities
         self.place_repo.add(place)
+        self.index_place_text(place)
+        self.place_suggestions.set(place.id, place.title, 0)
+        self.refresh_amenity_weights(amenity.id for amenity in amenities)
         return place
 
     def get_place(self, place_id):
@@ -87,64 +153,231 @@ class HBnBFacade:
         """ Retrieve all places."""
         return self.place_repo.get_all()
 
+    def resolve_amenity_ids(self, amenity_keys):
+        """ Map amenity names or IDs to IDs; None if one of them is unknown."""
+        amenity_keys = set(amenity_keys)
+        amenities = self.amenity_repo.get_many(amenity_keys) + self.amenity_repo.get_many(amenity_keys, 'name')
+        resolved = {key: amenity.id for amenity in amenities for key in (amenity.id, amenity.name) if key in amenity_keys}
+        if len(resolved) != len(amenity_keys):
+            return None
+        return set(resolved.values())
+
+    def get_places_with_amenities(self, amenity_keys):
+        """ Retrieve the places having all the given amenities (names or IDs)."""
+        amenity_ids = self.resolve_amenity_ids(amenity_keys)
+        if amenity_ids is None:
+            return []
+        return self.place_repo.get_with_all_amenities(amenity_ids)
+
+    def suggest_places(self, prefix, limit=10):
+        """ Suggest places whose title starts with a prefix, most reviewed first."""
+        return self.place_suggestions.suggest(prefix, limit)
+
+    def find_places(self, filter_text=None, sort_text=None, amenity_keys=None):
+        """ Retrieve the places matching a filter expression, sorted, in one query."""
+        types = {name: kind for name, (kind, _) in self.place_repo.query_fields.items()}
+        node = parse_filter(filter_text, types) if filter_text else None
+        sort = parse_sort(sort_text, types) if sort_text else []
+        amenity_ids = None
+        if amenity_keys:
+            amenity_ids = self.resolve_amenity_ids(amenity_keys)
+            if amenity_ids is None:
+                return []
+        return self.place_repo.find(node, sort, amenity_ids)
+
+    def set_place_amenities(self, place_id, amenity_ids):
+        """ Replace the amenities of a place, writing only the difference."""
+        amenities = self.get_amenities(amenity_ids)
+        _, attached, detached = self.place_repo.update_with_amenities(
+            place_id, {}, [amenity.id for amenity in amenities])
+        self.refresh_amenity_weights(attached | detached)
+        return amenities
+
     def update_place(self, place_id, place_data):
-        """ Update an existing place by its ID."""
-        place = self.place_repo.get(place_id)
+        """ Update an existing place by its ID, its fields and amenities in one transaction."""
+        place_data = dict(place_data)
+        amenity_ids = place_data.pop('amenities', None)
+        if amenity_ids is not None:
+            amenity_ids = [amenity.id for amenity in self.get_amenities(amenity_ids)]
+        place, attached, detached = self.place_repo.update_with_amenities(place_id, place_data, amenity_ids)
         if not place:
             return None
-        place.update(place_data)
-        self.place_repo.update(place_id, place_data)
+        self.refresh_amenity_weights(attached | detached)
+        if 'title' in place_data:
+            self.place_suggestions.set(place.id, place.title)
+        if 'title' in place_data or 'description' in place_data:
+            self.index_place_text(place)
         return place
 
+    def index_place_text(self, place):
+        """ Store the MinHash signature and LSH buckets of a place's title and description."""
+        signature = minhash(place.title, place.description)
+        self.place_repo.set_signature(place.id, signature, band_buckets(signature) if signature else [])
+
+    def find_duplicates(self, place_id, threshold=DUPLICATE_THRESHOLD):
+        """ Retrieve the places whose text is nearly the same as a place's, most similar first."""
+        place = self.place_repo.get(place_id)
+        if not place or not place.text_signature:
+            return []
+        duplicates = []
+        for other_id, title, signature in self.place_repo.get_signature_candidates(place_id):
+            score = estimated_similarity(place.text_signature, signature)
+            if score >= threshold:
+                duplicates.append({'id': other_id, 'title': title, 'similarity': round(score, 3)})
+        return sorted(duplicates, key=lambda duplicate: (-duplicate['similarity'], duplicate['id']))
+
+    def get_duplicate_pairs(self, threshold=DUPLICATE_THRESHOLD):
+        """ Retrieve every pair of near-duplicate places in the catalogue, most similar first."""
+        pairs = []
+        for first_id, first_title, first, second_id, second_title, second in self.place_repo.get_candidate_pairs():
+            score = estimated_similarity(first, second)
+            if score >= threshold:
+                pairs.append({'places': [{'id': first_id, 'title': first_title},
+                                         {'id': second_id, 'title': second_title}],
+                              'similarity': round(score, 3)})
+        return sorted(pairs, key=lambda pair: (-pair['similarity'], pair['places'][0]['id']))
+
+    def rescan_duplicates(self, workers=None, batch_size=1000):
+        """ Recompute the signatures of the whole catalogue in a process pool; return the number of places."""
+        count = 0
+        for signatures in compute_signatures(self.place_repo.iter_texts(batch_size), workers):
+            self.place_repo.store_signatures([(place_id, signature, band_buckets(signature) if signature else [])
+                                              for place_id, signature in signatures])
+            count += len(signatures)
+        return count
+
     def create_review(self, review_data):
-        """ Create a new review with the given data."""
-        validated_data = {
-            'text': str(review_data.get('text')),
-            'rating': int(review_data.get('rating')),
-            'place_id': str(review_data.get('place_id')),
-            'user_id': str(review_data.get('user_id'))
-        }
-        new_review = Review(**validated_data)
-        self.review_repo.add(new_review)
+        """ Create a new review with the given data (queued if the write-behind mode is on)."""
+        new_review = Review.create(
+            text=str(review_data.get('text')),
+            rating=int(review_data.get('rating')),
+            place_id=str(review_data.get('place_id')),
+            user_id=str(review_data.get('user_id'))
+        )
+        if self.review_queue is None:
+            self.review_repo.add(new_review)
+            self.refresh_place_rating(new_review.place_id)
+            return new_review
+        new_review.id = str(uuid.uuid4())
+        new_review.created_at = new_review.updated_at = datetime.utcnow()
+        self.review_queue.submit(new_review, {column: getattr(new_review, column)
+                                              for column in ('id', 'text', 'rating', 'place_id', 'user_id',
+                                                             'created_at', 'updated_at')})
         return new_review
 
+    def write_reviews(self, rows):
+        """ Insert queued reviews in one transaction and refresh the ratings of their places."""
+        self.review_repo.add_rows(rows)
+        for place_id in {row['place_id'] for row in rows}:
+            self.refresh_place_rating(place_id)
+
+    def pending_reviews(self):
+        """ Retrieve the reviews queued but not committed yet."""
+        return list(self.review_queue.pending.values()) if self.review_queue is not None else []
+
+    def _commit_if_pending(self, review_id):
+        if self.review_queue is not None and review_id in self.review_queue.pending:
+            self.review_queue.flush()
+
+    def refresh_place_rating(self, place_id):
+        """ Recompute the rating of a place and its weight in the suggestions."""
+        place = self.place_repo.refresh_rating(place_id)
+        if place is not None:
+            self.place_suggestions.set(place.id, weight=place.review_count)
+
     def get_all_reviews(self):
         """ Retrieve all reviews."""
-        return self.review_repo.get_all()
+        reviews = self.review_repo.get_all()
+        committed = {review.id for review in reviews}
+        return reviews + [review for review in self.pending_reviews() if review.id not in committed]
     
     def get_review(self, review_id):
         """ Retrieve a review by its ID."""
+        if self.review_queue is not None and review_id in self.review_queue.pending:
+            return self.review_queue.pending[review_id]
         return self.review_repo.get(review_id)
 
     def get_reviews_by_place(self, place_id):
         """ Retrieve all reviews for a given place."""
-        all_reviews = self.review_repo.get_all()
+        all_reviews = self.get_all_reviews()
         reviews_for_place = [review for review in all_reviews if review.place_id == place_id]
         return reviews_for_place
 
     def update_review(self, review_id, data):
         """ Update an existing review by its ID."""
-        review = self.review_repo.get(review_id)
+        self._commit_if_pending(review_id)
+        review = self.review_repo.get_for_write(review_id)
         if not review:
             raise ValueError("Review not found")
+        place_id = review.place_id
         review.update(data)
         self.review_repo.add(review)
+        self.refresh_place_rating(review.place_id)
+        if review.place_id != place_id:
+            self.refresh_place_rating(place_id)
         return review
 
     def delete_review(self, review_id):
         """ Delete a review by its ID."""
-        review = self.review_repo.get(review_id)
+        self._commit_if_pending(review_id)
+        review = self.review_repo.get_for_write(review_id)
         if not review:
             raise ValueError('Review not found')
+        place_id = review.place_id
         self.review_repo.delete(review_id)
+        self.refresh_place_rating(place_id)
 
     def get_review_by_user_and_place(self, user_id, place_id):
         """Check if a user has already reviewed a specific place."""
-        all_reviews = self.review_repo.get_all()
-        for review in all_reviews:
+        for review in self.pending_reviews():
             if review.user_id == user_id and review.place_id == place_id:
                 return review
-        return None
+        return self.review_repo.get_for_write_by(place_id=place_id, user_id=user_id)
+
+    def create_booking(self, booking_data):
+        """ Book a place; raises BookingConflict if a night is already taken."""
+        booking = Booking.create(**booking_data)
+        self.booking_repo.add(booking)
+        self.availability.add(booking.id, booking.place_id, booking.check_in, booking.check_out)
+        return booking
+
+    def get_booking(self, booking_id):
+        """ Retrieve a booking by its ID."""
+        return self.booking_repo.get(booking_id)
+
+    def get_bookings_by_place(self, place_id, since=None):
+        """ Retrieve the bookings of a place, ending after a date if given."""
+        return self.booking_repo.get_by_place(place_id, since)
+
+    def cancel_booking(self, booking_id):
+        """ Delete a booking and free its nights."""
+        self.booking_repo.delete(booking_id)
+        self.availability.remove(booking_id)
+
+    def get_place_availability(self, place_id, check_in, check_out):
+        """ Tell whether a place is free for a stay, with the bookings in the way."""
+        if self.availability.is_free(place_id, check_in, check_out):
+            return True, []
+        return False, self.availability.bookings(place_id, check_in, check_out)
+
+    def find_available_places(self, bbox, check_in, check_out):
+        """ Retrieve the places of a bounding box (south, west, north, east) free for a stay."""
+        place_ids = self.place_repo.get_ids_in_bbox(*bbox)
+        return self.place_repo.get_many(self.availability.free_places(place_ids, check_in, check_out))
+
+    def get_changed_since(self, entity, since, after_id='', limit=100):
+        """ Retrieve the users, places, reviews or amenities changed or deleted since a keyset position."""
+        repos = {'user': self.user_repo, 'place': self.place_repo, 'review': self.review_repo,
+                 'amenity': self.amenity_repo}
+        return repos[entity].get_changed_since(since, after_id, limit)
+
+    def get_changes(self, after=0, limit=100):
+        """ Retrieve the changes of the feed following a sequence number."""
+        return self.change_repo.get_after(after, limit)
+
+    def prune_changes(self, before):
+        """ Delete the changes of the feed written before a date."""
+        return self.change_repo.prune(before)
 
     def hash_password(self, password):
         """Hashes the password before storing it."""
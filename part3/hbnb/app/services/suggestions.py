@@ -0,0 +1,282 @@
+import heapq
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+
+
+def normalize(text):
+    """
+    Return the form of a label prefixes are matched against.
+
+    Accents are dropped, case is folded and runs of whitespace become one
+    space, so "Café  du Port" is found by "cafe du".
+    """
+
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+class PrefixIndex:
+    """
+    In-memory prefix autocomplete over labels, best weighted first.
+
+    Entries are kept in a list of (normalized label, ID) sorted with bisect,
+    so the labels starting with a prefix are one contiguous range. On top of
+    it, every prefix of up to `depth` characters (the nodes of a trie) keeps
+    its `k` heaviest entries, computed bottom-up from the `k` best of its
+    children: short prefixes, which match the most labels, are answered
+    without scanning anything, and longer ones scan a range that is small by
+    then. A write only recomputes the `depth + 1` nodes on its label's path.
+
+    With a `load` function, the index fills itself on first use and reloads
+    every `refresh_interval` seconds, to pick up writes made by other
+    processes; writes made meanwhile in this process are replayed on top
+    (they set absolute values, so replaying one the load saw is harmless).
+    Only the first load blocks; later ones run in a background thread while
+    suggestions keep being served from the current entries, so `load` must
+    not depend on the caller's context.
+
+    Attributes:
+        k (int): The number of suggestions kept per node.
+        depth (int): The longest prefix with precomputed suggestions.
+        _entries (dict): IDs mapped to their (-weight, key, id, label) entry.
+        _keys (list): Sorted (key, id) pairs.
+        _tops (dict): Prefixes mapped to their best entries, best first.
+        _children (dict): Prefixes shorter than `depth` mapped to a Counter
+            of the characters that follow them.
+        _lock (threading.Lock): Serializes writes and range scans.
+    """
+
+    def __init__(self, k=10, depth=4, load=None, refresh_interval=None):
+        """
+        Initialize an empty index.
+
+        Args:
+            k (int, optional): The number of suggestions kept per node.
+            depth (int, optional): The longest prefix with precomputed suggestions.
+            load (callable, optional): Returns (id, label, weight) rows to fill the index with.
+            refresh_interval (float, optional): Seconds after which `load` is called again.
+        """
+
+        self.k = k
+        self.depth = depth
+        self.load = load
+        self.refresh_interval = refresh_interval
+        self._loaded_at = None
+        self._loading = threading.Lock()
+        self._pending = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._entries = {}
+        self._keys = []
+        self._tops = {}
+        self._children = {}
+
+    def _prefixes(self, key):
+        return [key[:length] for length in range(min(len(key), self.depth) + 1)]
+
+    def _scan(self, prefix):
+        """
+        Return the entries whose key starts with `prefix`, from the sorted keys.
+        """
+
+        keys = self._keys
+        position = bisect_left(keys, (prefix,))
+        while position < len(keys) and keys[position][0].startswith(prefix):
+            yield self._entries[keys[position][1]]
+            position += 1
+
+    def _compute(self, prefix):
+        if len(prefix) >= self.depth:
+            return heapq.nsmallest(self.k, self._scan(prefix))
+        candidates = []
+        for entry in self._scan(prefix):
+            if entry[1] != prefix:
+                break
+            candidates.append(entry)
+        for char in self._children.get(prefix, ()):
+            candidates.extend(self._tops.get(prefix + char, ()))
+        return heapq.nsmallest(self.k, candidates)
+
+    def _refresh(self, prefixes):
+        """
+        Recompute the best entries of some nodes, deepest first.
+        """
+
+        for prefix in sorted(prefixes, key=len, reverse=True):
+            top = self._compute(prefix)
+            if top:
+                self._tops[prefix] = top
+            else:
+                self._tops.pop(prefix, None)
+
+    def _link(self, entry):
+        key = entry[1]
+        self._entries[entry[2]] = entry
+        insort(self._keys, (key, entry[2]))
+        for length in range(min(len(key), self.depth)):
+            self._children.setdefault(key[:length], Counter())[key[length]] += 1
+
+    def _unlink(self, entry):
+        key = entry[1]
+        del self._entries[entry[2]]
+        del self._keys[bisect_left(self._keys, (key, entry[2]))]
+        for length in range(min(len(key), self.depth)):
+            children = self._children[key[:length]]
+            children[key[length]] -= 1
+            if children[key[length]] <= 0:
+                del children[key[length]]
+                if not children:
+                    del self._children[key[:length]]
+
+    def _set(self, obj_id, label=None, weight=None):
+        old = self._entries.get(obj_id)
+        if old is None and label is None:
+            return
+        if label is None:
+            label = old[3]
+        if weight is None:
+            weight = -old[0] if old is not None else 0
+        entry = (-weight, normalize(label), obj_id, label)
+        if entry == old:
+            return
+
+        prefixes = set(self._prefixes(entry[1]))
+        if old is not None:
+            self._unlink(old)
+            prefixes.update(self._prefixes(old[1]))
+        self._link(entry)
+        self._refresh(prefixes)
+
+    def _remove(self, obj_id):
+        old = self._entries.get(obj_id)
+        if old is not None:
+            self._unlink(old)
+            self._refresh(self._prefixes(old[1]))
+
+    def _write(self, method, *args):
+        with self._lock:
+            method(*args)
+            if self._pending is not None:
+                self._pending.append((method.__name__, args))
+
+    def set(self, obj_id, label=None, weight=None):
+        """
+        Add or update an entry.
+
+        Args:
+            obj_id (str): The ID of the object.
+            label (str, optional): Its label; unchanged if None.
+            weight (float, optional): Its popularity; unchanged (0 for a new entry) if None.
+        """
+
+        self._write(self._set, obj_id, label, weight)
+
+    def remove(self, obj_id):
+        """
+        Remove an entry.
+        """
+
+        self._write(self._remove, obj_id)
+
+    def rebuild(self, rows):
+        """
+        Replace the content of the index.
+
+        Args:
+            rows (iterable): (id, label, weight) tuples.
+        """
+
+        entries = {obj_id: (-(weight or 0), normalize(label), obj_id, label) for obj_id, label, weight in rows}
+        index = PrefixIndex(self.k, self.depth)
+        index._entries = entries
+        index._keys = sorted((entry[1], obj_id) for obj_id, entry in entries.items())
+        prefixes = set()
+        for key, _ in index._keys:
+            for length in range(min(len(key), self.depth)):
+                index._children.setdefault(key[:length], Counter())[key[length]] += 1
+            prefixes.update(index._prefixes(key))
+        index._refresh(prefixes)
+
+        with self._lock:
+            self._entries = index._entries
+            self._keys = index._keys
+            self._tops = index._tops
+            self._children = index._children
+
+    def _reload(self):
+        """
+        Call `load` and rebuild from its rows, replaying the writes made meanwhile.
+        """
+
+        with self._lock:
+            self._pending = []
+        try:
+            self.rebuild(self.load())
+        finally:
+            with self._lock:
+                pending, self._pending = self._pending, None
+                for name, args in pending:
+                    getattr(self, name)(*args)
+        self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self.load is None:
+            return
+        if self._loaded_at is None:
+            # Nothing to answer from yet: every caller waits for the first load
+            with self._loading:
+                if self._loaded_at is None:
+                    self._reload()
+        elif (self.refresh_interval is not None
+              and time.monotonic() - self._loaded_at >= self.refresh_interval):
+            self.reload_in_background()
+
+    def reload_in_background(self):
+        """
+        Start a reload in a daemon thread, unless one is already running.
+
+        Suggestions keep being answered from the current entries meanwhile.
+        """
+
+        if not self._loading.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self._reload()
+            except Exception:
+                # Retry after another interval, not on every call until then
+                self._loaded_at = time.monotonic()
+                raise
+            finally:
+                self._loading.release()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def suggest(self, prefix, limit=10):
+        """
+        Return the heaviest entries whose label starts with `prefix`.
+
+        Args:
+            prefix (str): What the user typed so far.
+            limit (int, optional): The maximum number of suggestions (at most `k`
+                for prefixes up to `depth` characters).
+
+        Returns:
+            list: (id, label, weight) tuples, heaviest first, then by label.
+        """
+
+        self._ensure_loaded()
+        key = normalize(prefix)
+        if len(key) <= self.depth:
+            top = self._tops.get(key, [])[:limit]
+        else:
+            with self._lock:
+                top = heapq.nsmallest(limit, self._scan(key))
+        return [(obj_id, label, -negative_weight) for negative_weight, _, obj_id, label in top]
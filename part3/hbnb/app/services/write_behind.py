@@ -0,0 +1,224 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+try:
+    import fcntl
+except ImportError:  # Windows: journals are not locked
+    fcntl = None
+
+
+class ReviewWriteQueue:
+    """
+    Write-behind queue for review creations, committed in groups.
+
+    `submit` only appends the review to the queue (and to a journal file
+    when one is configured) and returns; a background thread commits the
+    queued rows in one transaction every `flush_interval` seconds, or as
+    soon as `max_batch` rows are waiting. Until then, the queued reviews
+    are served from `pending` (the read-your-writes overlay).
+
+    Durability depends on the journal: without one, queued reviews are lost
+    if the process dies; with `sync='flush'` they survive a crash of the
+    process, with `sync='fsync'` a crash of the machine. Each process
+    writes its own journal, locked while the process lives; journals left
+    behind by dead processes are replayed (skipping the reviews already
+    committed) when the writer starts or by `flask replay-review-journals`.
+
+    Attributes:
+        write (callable): Commits a list of review rows in one transaction.
+        pending (dict): Review IDs mapped to their queued (transient) Review.
+    """
+
+    def __init__(self, app, write, flush_interval=0.05, max_batch=200, journal_dir=None, sync='fsync'):
+        """
+        Initialize an idle queue; the writer thread starts on the first submit.
+
+        Args:
+            app (Flask): The application the writer runs in the context of.
+            write (callable): Commits a list of review rows in one transaction.
+            flush_interval (float, optional): Seconds a queued review waits at most.
+            max_batch (int, optional): Rows committed per transaction at most.
+            journal_dir (str, optional): Directory of the journal files; none if None.
+            sync (str, optional): 'fsync' or 'flush', how journal appends are made durable.
+        """
+
+        self.app = app
+        self.write = write
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.journal_dir = journal_dir
+        self.sync = sync
+        self.pending = {}
+        self._queue = []
+        self._oldest = None
+        self._condition = threading.Condition()
+        self._flushing = threading.Lock()
+        self._journal = None
+        self._thread = None
+
+    def submit(self, review, row):
+        """
+        Queue a validated review for insertion.
+
+        Args:
+            review (Review): The transient review, served to readers meanwhile.
+            row (dict): Its column values, ID included.
+        """
+
+        with self._condition:
+            if self._thread is None:
+                self._start()
+            if self._journal is not None:
+                self._journal.write(json.dumps(row, default=datetime.isoformat) + '\n')
+                self._journal.flush()
+                if self.sync == 'fsync':
+                    os.fsync(self._journal.fileno())
+            self.pending[row['id']] = review
+            self._queue.append(row)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._condition.notify()
+
+    def _start(self):
+        if self.journal_dir:
+            os.makedirs(self.journal_dir, exist_ok=True)
+            path = os.path.join(self.journal_dir, 'reviews-%d-%s.log' % (os.getpid(), uuid.uuid4().hex[:8]))
+            self._journal = open(path, 'a')
+            if fcntl is not None:
+                fcntl.flock(self._journal, fcntl.LOCK_EX)
+        self._thread = threading.Thread(target=self._run, name='review-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        if self.journal_dir:
+            try:
+                with self.app.app_context():
+                    self.replay_journals()
+            except Exception:
+                self.app.logger.exception('Could not replay the review journals')
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                while len(self._queue) < self.max_batch:
+                    remaining = self._oldest + self.flush_interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+            if not self._flush_once():
+                time.sleep(1)
+
+    def _take(self):
+        """
+        Pop the next batch off the queue (the rows stay in `pending` until written).
+        """
+
+        with self._condition:
+            batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+            self._oldest = time.monotonic() if self._queue else None
+            return batch
+
+    def _flush_once(self):
+        """
+        Commit one batch; return False if the database could not be reached.
+        """
+
+        with self._flushing:
+            return self._commit_batch()
+
+    def _commit_batch(self):
+        """
+        Take and commit one batch; the caller holds `_flushing`.
+        """
+
+        batch = self._take()
+        if not batch:
+            return True
+        with self.app.app_context():
+            try:
+                self._write_batch(batch)
+            except Exception:
+                self.app.logger.exception('Could not commit %d queued reviews, retrying', len(batch))
+                with self._condition:
+                    self._queue[:0] = batch
+                    self._oldest = self._oldest or time.monotonic()
+                return False
+        with self._condition:
+            for row in batch:
+                self.pending.pop(row['id'], None)
+            if not self._queue and self._journal is not None:
+                self._journal.truncate(0)
+        return True
+
+    def _write_batch(self, batch):
+        try:
+            self.write(batch)
+        except IntegrityError:
+            # One bad row (e.g. its place was deleted meanwhile) must not drop the others
+            for row in batch:
+                try:
+                    self.write([row])
+                except IntegrityError:
+                    self.app.logger.error('Dropped queued review %s: %s', row['id'], row)
+
+    def flush(self):
+        """
+        Commit every queued review now, in batches, before returning.
+
+        Batches are only taken under `_flushing`, so holding it while the
+        queue is checked also waits for a batch the writer thread took but
+        has not committed yet.
+        """
+
+        while True:
+            with self._flushing:
+                if not self._queue or not self._commit_batch():
+                    return
+
+    def replay_journals(self):
+        """
+        Commit the reviews of the journals left behind by dead processes, then delete them.
+
+        Journals still locked by a live process are skipped. Must run in an
+        application context.
+
+        Returns:
+            int: The number of journal files replayed.
+        """
+
+        replayed = 0
+        own = self._journal.name if self._journal is not None else None
+        for path in sorted(glob.glob(os.path.join(self.journal_dir, 'reviews-*.log'))):
+            if path == own:
+                continue
+            with open(path) as journal:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue
+                rows = []
+                for line in journal:
+                    if line.endswith('\n'):  # A torn last line was never acknowledged
+                        rows.append(self._parse(line))
+                for start in range(0, len(rows), self.max_batch):
+                    self._write_batch(rows[start:start + self.max_batch])
+                os.remove(path)
+            replayed += 1
+        return replayed
+
+    @staticmethod
+    def _parse(line):
+        row = json.loads(line)
+        for key in ('created_at', 'updated_at'):
+            row[key] = datetime.fromisoformat(row[key])
+        return row
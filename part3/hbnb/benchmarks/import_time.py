@@ -0,0 +1,101 @@
+"""
+Cold start benchmark for the HBnB API.
+
+Runs `python -X importtime` in a fresh interpreter for a few startup
+scenarios and prints a summary: total import time, the slowest top-level
+imports, and the wall time of `create_app()` and of the first request to
+`/swagger.json` (with and without a precomputed SWAGGER_CACHE_FILE).
+
+Usage (from part3/hbnb):
+    python benchmarks/import_time.py
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+SCENARIOS = {
+    'import app': 'import app',
+    'import app.models': 'import app.models.user, app.models.place, app.models.review',
+    'create_app()': 'from app import create_app; create_app()',
+}
+
+
+TIMED = """
+import time
+start = time.perf_counter()
+from app import create_app
+app = create_app()
+created = time.perf_counter()
+app.test_client().get('/swagger.json')
+served = time.perf_counter()
+print('%.1f %.1f' % ((created - start) * 1000, (served - created) * 1000))
+"""
+
+
+def run(code, env=None):
+    """
+    Run `code` in a fresh interpreter and return its (stdout, stderr).
+    """
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return result.stdout, result.stderr
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output into (cumulative_us, depth, module) tuples.
+    """
+
+    rows = []
+
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative_us), depth, name.strip()))
+
+    return rows
+
+
+def summarize(label, stderr, top=5):
+    rows = parse_importtime(stderr)
+    slowest = sorted((r for r in rows if r[1] <= 1), reverse=True)
+    total = sum(r[0] for r in rows if r[1] == 0)
+
+    print('%-18s total %7.1f ms' % (label, total / 1000))
+    for cumulative_us, _, name in slowest[:top]:
+        print('    %-36s %7.1f ms' % (name, cumulative_us / 1000))
+
+
+def main():
+    for label, code in SCENARIOS.items():
+        _, stderr = run(code)
+        summarize(label, stderr)
+
+    env = dict(os.environ)
+    env.pop('SWAGGER_CACHE_FILE', None)
+    stdout, _ = run(TIMED, env)
+    print('\nwithout swagger cache: create_app %s ms, first /swagger.json %s ms' % tuple(stdout.split()))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env['SWAGGER_CACHE_FILE'] = os.path.join(tmp, 'swagger.json')
+        subprocess.run(
+            [sys.executable, '-m', 'flask', '--app', 'app', 'dump-swagger'],
+            cwd=ROOT, env=env, capture_output=True, check=True
+        )
+        stdout, _ = run(TIMED, env)
+        print('with swagger cache:    create_app %s ms, first /swagger.json %s ms' % tuple(stdout.split()))
+
+
+if __name__ == '__main__':
+    main()
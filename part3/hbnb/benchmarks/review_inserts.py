@@ -0,0 +1,80 @@
+"""
+Review insert throughput with the development and production engine profiles.
+
+Creates a fresh SQLite file per profile, seeds one owner, one reviewer and a
+place, then creates reviews through `HBnBFacade.create_review` (one commit per
+review, as the API does) and prints reviews per second.
+
+Usage (from part3/hbnb):
+    python benchmarks/review_inserts.py [count]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from config import DevelopmentConfig, ProductionConfig
+
+
+def make_config(base, path):
+    """
+    Return a copy of the `base` config class pointing at the SQLite file `path`.
+    """
+
+    return type(base.__name__, (base,), {'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + path})
+
+
+def seed():
+    """
+    Insert the rows the reviews point to and return (user_id, place_id).
+    """
+
+    from app.models.user import User
+    from app.models.place import Place
+
+    owner = User(first_name='Owner', last_name='Bench', email='owner@bench.io', password='x')
+    reviewer = User(first_name='Reviewer', last_name='Bench', email='reviewer@bench.io', password='x')
+    db.session.add_all([owner, reviewer])
+    db.session.flush()
+
+    place = Place(title='Bench', description='', price=100.0, latitude=1.0, longitude=1.0, owner_id=owner.id)
+    db.session.add(place)
+    db.session.commit()
+
+    return reviewer.id, place.id
+
+
+def run(base, count):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(make_config(base, os.path.join(tmp, 'bench.db')))
+
+        with app.app_context():
+            db.create_all()
+            user_id, place_id = seed()
+            facade = app.extensions['hbnb_facade']
+
+            start = time.perf_counter()
+            for i in range(count):
+                facade.create_review({'text': 'Review %d' % i, 'rating': 4, 'place_id': place_id, 'user_id': user_id})
+            elapsed = time.perf_counter() - start
+
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+    return count / elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    for base in (DevelopmentConfig, ProductionConfig):
+        print('%-18s %8.0f reviews/s' % (base.__name__, run(base, count)))
+
+
+if __name__ == '__main__':
+    main()
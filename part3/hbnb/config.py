@@ -3,13 +3,58 @@ import os
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
     DEBUG = False
+    SWAGGER_UI_ENABLED = os.getenv('SWAGGER_UI_ENABLED', 'true').lower() == 'true'
+    SWAGGER_CACHE_FILE = os.getenv('SWAGGER_CACHE_FILE')
+    # 'warn' or 'reject' GET /places filters that need a full table scan
+    QUERY_UNINDEXED_FILTERS = os.getenv('QUERY_UNINDEXED_FILTERS', 'warn')
+    # Seconds before the in-memory autocomplete reloads writes of other workers
+    SUGGEST_REFRESH_INTERVAL = float(os.getenv('SUGGEST_REFRESH_INTERVAL', 60))
+    # Seconds before the in-memory booking calendar reloads bookings of other workers
+    AVAILABILITY_REFRESH_INTERVAL = float(os.getenv('AVAILABILITY_REFRESH_INTERVAL', 30))
+    # Queue review creations and commit them in batches from a background thread
+    REVIEW_WRITE_BEHIND = os.getenv('REVIEW_WRITE_BEHIND', 'false').lower() == 'true'
+    REVIEW_FLUSH_INTERVAL_MS = int(os.getenv('REVIEW_FLUSH_INTERVAL_MS', 50))
+    REVIEW_FLUSH_MAX_ROWS = int(os.getenv('REVIEW_FLUSH_MAX_ROWS', 200))
+    # Directory of the queue journals (none if unset), synced with 'fsync' or just 'flush'
+    REVIEW_JOURNAL_DIR = os.getenv('REVIEW_JOURNAL_DIR')
+    REVIEW_JOURNAL_SYNC = os.getenv('REVIEW_JOURNAL_SYNC', 'fsync')
+    # Seconds GET /changes and updated_since queries hold back recent changes,
+    # for transactions committing out of order
+    CHANGES_SETTLE_SECONDS = float(os.getenv('CHANGES_SETTLE_SECONDS', 0))
 
 class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///development.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+class ProductionConfig(Config):
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///production.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SWAGGER_UI_ENABLED = os.getenv('SWAGGER_UI_ENABLED', 'false').lower() == 'true'
+    QUERY_UNINDEXED_FILTERS = os.getenv('QUERY_UNINDEXED_FILTERS', 'reject')
+    CHANGES_SETTLE_SECONDS = float(os.getenv('CHANGES_SETTLE_SECONDS', 2))
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+        'query_cache_size': 1200,
+    }
+    # Reads go to the 'replica' bind when DATABASE_REPLICA_URL is set
+    SQLALCHEMY_READ_BIND = 'replica' if os.getenv('DATABASE_REPLICA_URL') else None
+    SQLALCHEMY_BINDS = {
+        'replica': dict(SQLALCHEMY_ENGINE_OPTIONS, url=os.getenv('DATABASE_REPLICA_URL'))
+    } if SQLALCHEMY_READ_BIND else {}
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,
+        'cache_size': -64000,
+        'busy_timeout': 5000,
+    }
+
 config = {
     'development': DevelopmentConfig,
+    'production': ProductionConfig,
     'default': DevelopmentConfig
-}
\ No newline at end of file
+}
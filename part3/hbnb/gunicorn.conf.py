@@ -0,0 +1,17 @@
+import multiprocessing
+import os
+
+# Pre-fork mode: the app is created once in the master and forked into the
+# workers. Each worker resets its engines and facade in post_fork (see
+# app.reset_after_fork), so caches are per worker.
+wsgi_app = 'wsgi:app'
+preload_app = True
+bind = os.getenv('HBNB_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('HBNB_WORKERS', multiprocessing.cpu_count()))
+
+
+def post_fork(server, worker):
+    from app import reset_after_fork
+    from wsgi import app
+
+    reset_after_fork(app)
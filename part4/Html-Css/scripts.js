@@ -66,19 +66,12 @@ document.addEventListener('DOMContentLoaded', function () {
             <option value="100">$100</option>
         `;
 
-        // Implement client-side filtering
+        // Let the API filter and sort the places instead of hiding cards
         priceFilter.addEventListener('change', (event) => {
-            const selectedPrice = event.target.value;
-            const placeCards = document.querySelectorAll('.place-card');
-            placeCards.forEach(card => {
-                const priceText = card.querySelector('p').textContent;
-                const price = parseInt(priceText.replace('Price per night: $', ''));
-                if (selectedPrice === 'All' || price <= parseInt(selectedPrice)) {
-                    card.style.display = 'block';
-                } else {
-                    card.style.display = 'none';
-                }
-            });
+            const token = getCookie('token');
+            if (token) {
+                fetchPlaces(token, event.target.value);
+            }
         });
     }
 
@@ -122,10 +115,15 @@ function getCookie(cookie_name) {
 }
 
 
-// Fetch places data dynamically if the user is authenticated
-async function fetchPlaces(token) {
+// Fetch places data dynamically if the user is authenticated,
+// at most maxPrice per night when given (the API does the filtering)
+async function fetchPlaces(token, maxPrice = 'All') {
+    const params = new URLSearchParams({ sort: 'price' });
+    if (maxPrice !== 'All') {
+        params.set('filter', `price<=${parseInt(maxPrice)}`);
+    }
     try {
-        const response = await fetch('http://127.0.0.1:5000/api/v1/places', {
+        const response = await fetch(`http://127.0.0.1:5000/api/v1/places/?${params}`, {
             method: 'GET',
             headers: {
                 'Authorization': `Bearer ${token}`,